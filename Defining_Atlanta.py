@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+import numpy as np
 import os
+import time
 from styles import load_css
-import base64
 
 # Set page config
 st.set_page_config(
@@ -17,7 +19,9 @@ st.set_page_config(
 load_css(page_name="Defining_Atlanta")
 
 # Import shared components
-from shared_components import create_sidebar
+from shared_components import create_sidebar, render_image, deferred_section
+from models.grid_losses import CUSTOMER_CLASSES, ENERGY_PRICE, TIERS, GridNetwork
+from models.hosting_capacity import LIMITS, MIDDAY_LOAD_SHARE, ROOFTOP_MW, RadialFeeder
 
 # Store current page in session state for sidebar to access
 st.session_state['current_page'] = __file__
@@ -27,39 +31,6 @@ create_sidebar(os.path.basename(__file__))
 
 ######################## PAGE CONTENT ########################
 
-# Load the required images
-energydef_path = os.path.join(os.getcwd(), "assets", "energyshed_define.png")
-supply_path = os.path.join(os.getcwd(), "assets", "supply_area.png")
-demand_path = os.path.join(os.getcwd(), "assets", "demand_area.png")
-how_it_is_changing_path = os.path.join(os.getcwd(), "assets", "defining_atlanta_how_changing.png")
-looking_forward_path = os.path.join(os.getcwd(), "assets", "defining_atlanta_looking_forward.png")
-grid_structure_path = os.path.join(os.getcwd(), "assets", "grid_structure.png")
-
-# Read the image files as bytes and convert to base64
-with open(energydef_path, "rb") as f:
-    energydef_bytes = f.read()
-energydef_base64 = base64.b64encode(energydef_bytes).decode()
-
-with open(supply_path, "rb") as f:
-    supply_bytes = f.read()
-supply_base64 = base64.b64encode(supply_bytes).decode()
-
-with open(demand_path, "rb") as f:
-    demand_bytes = f.read()
-demand_base64 = base64.b64encode(demand_bytes).decode()
-
-with open(how_it_is_changing_path, "rb") as f:
-    how_it_is_changing_bytes = f.read()
-how_it_is_changing_base64 = base64.b64encode(how_it_is_changing_bytes).decode()
-
-with open(looking_forward_path, "rb") as f:
-    looking_forward_bytes = f.read()
-looking_forward_base64 = base64.b64encode(looking_forward_bytes).decode()
-
-with open(grid_structure_path, "rb") as f:
-    grid_structure_bytes = f.read()
-grid_structure_base64 = base64.b64encode(grid_structure_bytes).decode()
-
 # Create two columns for the main content
 col1, col2 = st.columns([1, 2])
 
@@ -83,13 +54,7 @@ with col1:
     """, unsafe_allow_html=True)
     
     # Display the energyshed definition image
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 20px;">
-        <img src="data:image/png;base64,{energydef_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);" 
-             alt="Energyshed Definition">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("energyshed_define.png", 1/3, alt="Energyshed Definition", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);", container_style="text-align: center; margin-bottom: 20px;", lazy=False)
 
 with col2:
     # Right column - Supply and Demand
@@ -110,25 +75,11 @@ with col2:
     
     with img_col1:
         # Supply area image
-        st.markdown(f"""
-        <div style="text-align: center;">
-            <img src="data:image/png;base64,{supply_base64}" 
-                 style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);" 
-                 alt="Supply Area">
-            <p style="text-align: center; margin-top: 10px; font-weight: bold;">Balancing Authority of Energy Supply and Demand</p>
-        </div>
-        """, unsafe_allow_html=True)
+        render_image("supply_area.png", 2/3 * 0.6, alt="Supply Area", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);", container_style="text-align: center;", caption="Balancing Authority of Energy Supply and Demand", caption_style="text-align: center; margin-top: 10px; font-weight: bold;", lazy=False)
     
     with img_col2:
         # Demand area image
-        st.markdown(f"""
-        <div style="text-align: center;">
-            <img src="data:image/png;base64,{demand_base64}" 
-                 style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);" 
-                 alt="Demand Area">
-            <p style="text-align: center; margin-top: 10px; font-weight: bold;">High demand metro Atlanta area</p>
-        </div>
-        """, unsafe_allow_html=True)
+        render_image("demand_area.png", 2/3 * 0.4, alt="Demand Area", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);", container_style="text-align: center;", caption="High demand metro Atlanta area", caption_style="text-align: center; margin-top: 10px; font-weight: bold;", lazy=False)
 
 # Add a divider
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
@@ -137,13 +88,7 @@ st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsaf
 image_col, text_col = st.columns([2, 1])
 
 with image_col:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 20px;">
-        <img src="data:image/png;base64,{grid_structure_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);" 
-             alt="Grid Structure">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("grid_structure.png", 2/3, alt="Grid Structure", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);", container_style="text-align: center; margin-bottom: 20px;")
 
 with text_col:
     st.markdown("""
@@ -159,6 +104,88 @@ with text_col:
     </div>
     """, unsafe_allow_html=True)
 
+# Add a divider before the delivery cost section
+st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
+
+# Customers per class on the synthetic network, roughly in proportion to Georgia's mix.
+CUSTOMERS_PER_CLASS = {"transmission": 60, "substation": 300, "primary": 3000, "secondary": 200000}
+TIER_COLORS = {"transmission": "#0D3B66", "substation": "#1E5C8E", "primary": "#4F8FC0", "secondary": "#9CC3E4"}
+
+@st.cache_resource
+def supply_network():
+    network = GridNetwork()
+    return network, *network.customers(CUSTOMERS_PER_CLASS)
+
+def delivery_cost_figure(costs, classes):
+    names = [CUSTOMER_CLASSES[key].split(" (")[0] for key in CUSTOMER_CLASSES]
+    means = [{key: value[classes == c].mean(axis=0) for key, value in costs.items()} for c in range(len(CUSTOMER_CLASSES))]
+    bars = [("Energy", [100 * m["energy"] for m in means], "#808080"),
+            ("Energy lost on the way", [100 * m["losses"].sum() for m in means], "#D32F2F")]
+    bars += [(f"{spec['label']} upkeep", [100 * m["wires"][t] for m in means], TIER_COLORS[tier])
+             for t, (tier, spec) in enumerate(TIERS.items())]
+    fig = go.Figure([go.Bar(x=names, y=y, name=name, marker_color=color,
+                            hovertemplate="%{x}: %{y:.2f}¢/kWh<extra>%{fullData.name}</extra>")
+                     for name, y, color in bars])
+    fig.update_layout(barmode="stack", height=380, margin=dict(t=30, b=10, l=10, r=10), yaxis_title="Cost to deliver 1 kWh (¢)",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+def loss_spread_figure(costs, classes):
+    fig = go.Figure([
+        go.Box(y=100 * costs["loss_share"][classes == c], name=label.split(" (")[0], marker_color="#1E5C8E", boxpoints=False)
+        for c, label in enumerate(CUSTOMER_CLASSES.values())
+    ])
+    fig.update_layout(height=380, margin=dict(t=30, b=10, l=10, r=10), yaxis_title="Energy lost on the way (%)", showlegend=False)
+    return fig
+
+# Isolated so that moving a slider reprices only this section. Each node's
+# losses back to the power plants are precomputed, so pricing every customer
+# is an array lookup.
+@st.fragment
+def render_delivery_cost():
+    network, nodes, classes = supply_network()
+    c1, c2, c3 = st.columns(3)
+    customer_class = c1.selectbox("You are a", list(CUSTOMER_CLASSES), index=len(CUSTOMER_CLASSES) - 1, format_func=CUSTOMER_CLASSES.get)
+    load_level = c2.slider("How busy the grid is (% of peak)", 30, 100, 70, step=5) / 100
+    energy_price = c3.slider("Price of power at the plant (¢/kWh)", 2.0, 15.0, 100 * ENERGY_PRICE, step=0.5) / 100
+
+    start = time.perf_counter()
+    costs = network.delivery_cost(nodes, load_level, energy_price)
+    seconds = time.perf_counter() - start
+    mine = classes == list(CUSTOMER_CLASSES).index(customer_class)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Cost to deliver 1 kWh to you", f"{100 * costs['total'][mine].mean():.1f}¢")
+    c2.metric("Energy lost on the way", f"{costs['loss_share'][mine].mean():.1%}")
+    c3.metric("Grid upkeep in that cost", f"{costs['wires'][mine].sum(axis=1).mean() / costs['total'][mine].mean():.0%}")
+
+    left, right = st.columns(2)
+    with left:
+        st.markdown("##### What delivering 1 kWh costs, by customer type")
+        st.plotly_chart(delivery_cost_figure(costs, classes), use_container_width=True)
+    with right:
+        st.markdown("##### Losses depend on where you connect")
+        st.plotly_chart(loss_spread_figure(costs, classes), use_container_width=True)
+    st.caption(f"{nodes.size:,} customers on a synthetic {network.n:,}-node grid priced in {seconds * 1000:,.0f} ms. "
+               "Loss rates and upkeep costs are illustrative.")
+
+def render_delivery_cost_section():
+    st.markdown("""
+    <h2 style="color: #1E5C8E; margin-bottom: 0.75rem;">What It Costs to Deliver 1 kWh to You</h2>
+    """, unsafe_allow_html=True)
+
+    st.markdown("""
+    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 20px; border-radius: 5px; margin-bottom: 20px;">
+        <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.6;">
+            Every line and transformer between a power plant and a customer loses a little energy as heat, and every tier of the grid has to be built and maintained. The further down the grid a customer connects, the more energy is lost on the way and the more equipment their power passes through. Choose a customer type to see what it costs to get 1 kWh to them.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    render_delivery_cost()
+
+deferred_section("delivery_cost", "What It Costs to Deliver 1 kWh to You", render_delivery_cost_section,
+                 description="Follow energy losses and grid costs from the power plant to each type of customer.")
+
 # Add a divider
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
 
@@ -167,13 +194,7 @@ st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsaf
 col1, col2 = st.columns([1, 3])
 
 with col1:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 20px;">
-        <img src="data:image/png;base64,{how_it_is_changing_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);" 
-             alt="How It's Changing">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("defining_atlanta_how_changing.png", 1/4, alt="How It's Changing", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);", container_style="text-align: center; margin-bottom: 20px;")
 
 with col2:
     st.markdown("""
@@ -191,108 +212,167 @@ with col2:
 # Add a divider before the 3-column format content
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
 
-# Load the required images for the 3-row format
-efficiency_path = os.path.join(os.getcwd(), "assets", "defining_energy_efficiency.png")
-local_gen_path = os.path.join(os.getcwd(), "assets", "defining_local_gen_storage.png")
-grid_path = os.path.join(os.getcwd(), "assets", "defining_grid.png")
-
-# Read the image files as bytes and convert to base64
-with open(efficiency_path, "rb") as f:
-    efficiency_bytes = f.read()
-efficiency_base64 = base64.b64encode(efficiency_bytes).decode()
+def render_topic_overview():
+    # Create three columns for the content sections
+    col1, col2, col3 = st.columns(3)
 
-with open(local_gen_path, "rb") as f:
-    local_gen_bytes = f.read()
-local_gen_base64 = base64.b64encode(local_gen_bytes).decode()
+    # First column - Energy Efficiency
+    with col1:
+        st.markdown("""
+        <h3 style="text-align: center; color: #1E5C8E; margin-bottom: 1rem;">What Energy Efficiency <br> Measures are There?</h3>
+        """, unsafe_allow_html=True)
 
-with open(grid_path, "rb") as f:
-    grid_bytes = f.read()
-grid_base64 = base64.b64encode(grid_bytes).decode()
+        # Display the energy efficiency image
+        render_image("defining_energy_efficiency.png", 1/3, alt="Energy Efficiency Measures", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
+
+        # Energy efficiency text
+        st.markdown("""
+        <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+            <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+                Energy efficiency improvements are vital for a more resilient and affordable energy use as demand increases. Heat pumps provide efficient heating and cooling, reducing energy use by up to 50%. Building envelope improvements—better insulation, air sealing, and high-performance windows—minimize waste and improve comfort.
+            </p>
+            <div style="text-align: center; margin-top: 15px;">
+                <a href="https://www.energy.gov/energysaver/energy-saver" style="color: #1E5C8E; font-weight: bold;">CLICK for more info</a>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
 
-# Create three columns for the content sections
-col1, col2, col3 = st.columns(3)
+    # Second column - Local Generation and Storage
+    with col2:
+        st.markdown("""
+        <h3 style="text-align: center; color: #1E5C8E; margin-bottom: 1rem;">Local Generation <br> and Storage</h3>
+        """, unsafe_allow_html=True)
 
-# First column - Energy Efficiency
-with col1:
-    st.markdown("""
-    <h3 style="text-align: center; color: #1E5C8E; margin-bottom: 1rem;">What Energy Efficiency <br> Measures are There?</h3>
-    """, unsafe_allow_html=True)
-    
-    # Display the energy efficiency image
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{efficiency_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Energy Efficiency Measures">
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Energy efficiency text
-    st.markdown("""
-    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
-        <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
-            Energy efficiency improvements are vital for a more resilient and affordable energy use as demand increases. Heat pumps provide efficient heating and cooling, reducing energy use by up to 50%. Building envelope improvements—better insulation, air sealing, and high-performance windows—minimize waste and improve comfort.
-        </p>
-        <div style="text-align: center; margin-top: 15px;">
-            <a href="https://www.energy.gov/energysaver/energy-saver" style="color: #1E5C8E; font-weight: bold;">CLICK for more info</a>
+        # Display the local generation image
+        render_image("defining_local_gen_storage.png", 1/3, alt="Local Generation and Storage", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
+
+        # Local generation text
+        st.markdown("""
+        <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+            <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+                Distributed energy resources are changing Atlanta's electricity landscape. Rooftop solar enables on-site clean energy production, while battery storage systems preserve excess generation for evening use or outages. Electric vehicles double as grid resources through bidirectional charging capabilities.
+            </p>
+            <div style="text-align: center; margin-top: 15px;">
+                <a href="https://www.energy.gov/eere/solar/articles/solar-plus-storage-101" style="color: #1E5C8E; font-weight: bold;">CLICK for more info</a>
+            </div>
         </div>
-    </div>
-    """, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
 
-# Second column - Local Generation and Storage
-with col2:
-    st.markdown("""
-    <h3 style="text-align: center; color: #1E5C8E; margin-bottom: 1rem;">Local Generation <br> and Storage</h3>
-    """, unsafe_allow_html=True)
-    
-    # Display the local generation image
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{local_gen_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Local Generation and Storage">
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Local generation text
-    st.markdown("""
-    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
-        <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
-            Distributed energy resources are changing Atlanta's electricity landscape. Rooftop solar enables on-site clean energy production, while battery storage systems preserve excess generation for evening use or outages. Electric vehicles double as grid resources through bidirectional charging capabilities.
-        </p>
-        <div style="text-align: center; margin-top: 15px;">
-            <a href="https://www.energy.gov/eere/solar/articles/solar-plus-storage-101" style="color: #1E5C8E; font-weight: bold;">CLICK for more info</a>
+    # Third column - Impacts to Electric Grid
+    with col3:
+        st.markdown("""
+        <h3 style="text-align: center; color: #1E5C8E; margin-bottom: 1rem;">Impacts to our <br> Electric Grid</h3>
+        """, unsafe_allow_html=True)
+
+        # Display the grid image
+        render_image("defining_grid.png", 1/3, alt="Electric Grid Impacts", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
+
+        # Grid impacts text
+        st.markdown("""
+        <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+            <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+                Atlanta's grid faces new demands from growing data centers and changing energy flows. Rather than one-way delivery from large power plants, our grid must now manage two-way power flows from distributed solar, batteries, and electric vehicles.
+            </p>
+            <div style="text-align: center; margin-top: 15px;">
+                <a href="https://www.energy.gov/smart-grid" style="color: #1E5C8E; font-weight: bold;">CLICK for more info</a>
+            </div>
         </div>
-    </div>
-    """, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
+
+render_topic_overview()
 
-# Third column - Impacts to Electric Grid
-with col3:
+# Add a divider before the hosting capacity section
+st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
+
+PLACEMENT_SCENARIOS = 2000
+LIMIT_COLORS = {"voltage": "#1E5C8E", "thermal": "#FFB300"}
+LIMIT_LABELS = {"voltage": "Voltage too high", "thermal": "Line overloaded"}
+
+@st.cache_resource
+def neighborhood_feeder():
+    return RadialFeeder()
+
+# Each call solves the power flow for every placement at once; caching keeps
+# slider positions the user returns to instant.
+@st.cache_data(max_entries=256)
+def placement_hosting_capacity(sites, toward_end, load_share):
+    feeder = neighborhood_feeder()
+    start = time.perf_counter()
+    result = feeder.hosting_capacity(feeder.placements(PLACEMENT_SCENARIOS, sites, toward_end), load_share)
+    return result, time.perf_counter() - start
+
+@st.cache_data
+def bus_hosting_capacity(load_share):
+    return neighborhood_feeder().bus_hosting_capacity(load_share)
+
+def hosting_capacity_histogram(result):
+    fig = go.Figure([
+        go.Histogram(x=result["capacity_mw"][result["limit"] == i], name=LIMIT_LABELS[limit], marker_color=LIMIT_COLORS[limit],
+                     xbins=dict(size=0.1), hovertemplate="%{x} MW: %{y} placements<extra>%{fullData.name}</extra>")
+        for i, limit in enumerate(LIMITS)
+    ])
+    fig.update_layout(barmode="stack", height=340, margin=dict(t=30, b=10, l=10, r=10), xaxis_title="Solar the circuit can take (MW)",
+                      yaxis_title="Placements", legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+def bus_capacity_figure(feeder, result):
+    fig = go.Figure([
+        go.Scatter(x=feeder.distance_km[feeder.kind == kind], y=result["capacity_mw"][feeder.kind == kind], mode="markers", name=label,
+                   marker=dict(color=color, size=7), hovertemplate="%{x:.2f} km: %{y:.2f} MW<extra>%{fullData.name}</extra>")
+        for kind, label, color in (("trunk", "Main line", "#1E5C8E"), ("lateral", "Neighborhood branch", "#FFB300"))
+    ])
+    fig.update_layout(height=340, margin=dict(t=30, b=10, l=10, r=10), xaxis_title="Distance from the substation (km)",
+                      yaxis_title="Solar at one spot (MW)", legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+# Isolated so that moving a slider reruns only the estimator.
+@st.fragment
+def render_hosting_capacity():
+    feeder = neighborhood_feeder()
+    c1, c2, c3 = st.columns(3)
+    sites = c1.slider("Spots with solar", 5, 60, 20, step=5)
+    toward_end = c2.slider("Where solar is installed", 0.0, 4.0, 0.0, step=0.5,
+                           help="0 spreads solar along the circuit in proportion to homes; higher values put more of it far from the substation.")
+    load_share = c3.slider("Midday load (% of peak)", 15, 60, round(100 * MIDDAY_LOAD_SHARE), step=5) / 100
+    result, seconds = placement_hosting_capacity(sites, toward_end, load_share)
+    capacity = result["capacity_mw"]
+
+    safe = np.percentile(capacity, 5)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Solar the circuit takes in 95% of placements", f"{safe:,.1f} MW",
+              help=f"Equal to {safe / ROOFTOP_MW:,.0f} rooftop systems of {ROOFTOP_MW * 1000:.0f} kW.")
+    c2.metric("Homes that could have rooftop solar", f"{min(safe / ROOFTOP_MW / feeder.homes.sum(), 1):.0%}",
+              help=f"Out of {feeder.homes.sum():,} homes on the circuit.")
+    c3.metric("Placements limited by high voltage", f"{(result['limit'] == LIMITS.index('voltage')).mean():.0%}")
+
+    left, right = st.columns(2)
+    with left:
+        st.markdown("##### Solar the circuit can take, by placement")
+        st.plotly_chart(hosting_capacity_histogram(result), use_container_width=True)
+    with right:
+        st.markdown("##### Solar at a single spot along the circuit")
+        st.plotly_chart(bus_capacity_figure(feeder, bus_hosting_capacity(load_share)), use_container_width=True)
+    st.caption(f"{PLACEMENT_SCENARIOS:,} random placements on a synthetic {feeder.n}-bus, {feeder.homes.sum():,}-home circuit "
+               f"checked in {seconds * 1000:,.0f} ms with a linearized power flow.")
+
+def render_hosting_capacity_section():
     st.markdown("""
-    <h3 style="text-align: center; color: #1E5C8E; margin-bottom: 1rem;">Impacts to our <br> Electric Grid</h3>
-    """, unsafe_allow_html=True)
-    
-    # Display the grid image
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{grid_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Electric Grid Impacts">
-    </div>
+    <h2 style="color: #1E5C8E; margin-bottom: 0.75rem;">How Much Solar Can a Neighborhood Circuit Take?</h2>
     """, unsafe_allow_html=True)
-    
-    # Grid impacts text
+
     st.markdown("""
-    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
-        <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
-            Atlanta's grid faces new demands from growing data centers and changing energy flows. Rather than one-way delivery from large power plants, our grid must now manage two-way power flows from distributed solar, batteries, and electric vehicles.
+    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 20px; border-radius: 5px; margin-bottom: 20px;">
+        <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.6;">
+            Distribution circuits were built to carry power one way, from the substation out to homes. When rooftop solar produces more than the neighborhood uses, power flows back toward the substation and pushes voltages up along the way. The amount of solar a circuit can take before voltages get too high or a line overloads is its hosting capacity. It depends on where the panels go: solar far from the substation raises voltages more than the same solar close to it.
         </p>
-        <div style="text-align: center; margin-top: 15px;">
-            <a href="https://www.energy.gov/smart-grid" style="color: #1E5C8E; font-weight: bold;">CLICK for more info</a>
-        </div>
     </div>
     """, unsafe_allow_html=True)
 
+    render_hosting_capacity()
+
+deferred_section("hosting_capacity", "How Much Solar Can a Neighborhood Circuit Take?", render_hosting_capacity_section,
+                 description="Estimate the rooftop solar a typical circuit can host before two-way power flows break its limits.")
+
 # Add a divider before the Looking Forward section
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
 
@@ -300,13 +380,7 @@ st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsaf
 col1, col2 = st.columns([1, 3])
 
 with col1:
-    st.markdown(f"""
-    <div style="text-align: center; margin-top: 2rem;">
-        <img src="data:image/png;base64,{looking_forward_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);" 
-             alt="Looking Forward">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("defining_atlanta_looking_forward.png", 1/4, alt="Looking Forward", style="border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);", container_style="text-align: center; margin-top: 2rem;")
 
 with col2:
     st.markdown("""
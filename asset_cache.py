@@ -0,0 +1,357 @@
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# All asset keys are paths relative to this directory, e.g. "ee_house.png"
+# or "temp_images/agem.png".
+ASSETS_DIR = os.path.join(APP_DIR, "assets")
+
+# Streamlit serves ./static next to the main script at app/static/ when
+# server.enableStaticServing is on. Fingerprinted copies of assets go here.
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_URL = "app/static"
+
+# Written by build_assets.py; lists the resized PNG/WebP/AVIF variants.
+MANIFEST_PATH = os.path.join(STATIC_DIR, "build", "manifest.json")
+
+# Remote media mirrored into a content-addressed store by sync_media.py:
+# static/media/<sha256><ext>, keyed by the names in remote_media.json.
+REMOTE_MEDIA_PATH = os.path.join(APP_DIR, "remote_media.json")
+MEDIA_DIR = os.path.join(STATIC_DIR, "media")
+
+# Preferred order of <source> elements; browsers take the first they support.
+MODERN_FORMATS = (("avif", "image/avif"), ("webp", "image/webp"))
+
+# Upper bound on the base64 text held in memory across all sessions.
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class _AssetEntry:
+    """
+    One encoded asset together with the file state it was read from.
+    """
+    __slots__ = ("mtime_ns", "size", "sha256", "mime", "base64")
+
+    def __init__(self, mtime_ns, size, sha256, mime, base64_text):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.mime = mime
+        self.base64 = base64_text
+
+
+class AssetCache:
+    """
+    Thread-safe LRU cache of base64-encoded asset files.
+
+    Streamlit runs every session in its own thread of the same process, so a
+    single module-level instance lets all sessions share one encoded copy of
+    each image. Entries are revalidated against the file's mtime and size on
+    every lookup and the least recently used ones are evicted once the total
+    encoded size exceeds ``max_bytes``.
+
+    Args:
+        assets_dir (str): Directory that asset keys are resolved against.
+        max_bytes (int): Memory budget for the cached base64 text.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.assets_dir = assets_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        """
+        Resolve an asset key to an absolute file path.
+        """
+        return os.path.join(self.assets_dir, *key.split("/"))
+
+    def get(self, key):
+        """
+        Return the cache entry for an asset, reading and encoding it on a miss.
+
+        Args:
+            key (str): Asset path relative to the assets directory.
+
+        Returns:
+            _AssetEntry: The encoded asset.
+        """
+        path = self.path(key)
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(key)
+                return entry
+
+        # Read outside the lock so a slow disk doesn't block other sessions.
+        with open(path, "rb") as f:
+            data = f.read()
+        entry = _AssetEntry(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            sha256=hashlib.sha256(data).hexdigest(),
+            mime=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            base64_text=base64.b64encode(data).decode(),
+        )
+
+        with self._lock:
+            self._discard(key)
+            if len(entry.base64) <= self.max_bytes:
+                self._entries[key] = entry
+                self._total_bytes += len(entry.base64)
+                while self._total_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._total_bytes -= len(evicted.base64)
+        return entry
+
+    def clear(self):
+        """
+        Drop every cached entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _discard(self, key):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= len(old.base64)
+
+
+class StaticPublisher:
+    """
+    Publishes assets into Streamlit's static folder under content-hashed names.
+
+    ``ee_house.png`` is copied to ``static/assets/ee_house.<hash>.png`` so the
+    browser can keep it across page navigations, and a changed file gets a
+    new URL instead of a stale cached copy. Each file is hashed once per
+    process and re-hashed only when its mtime or size changes.
+
+    Args:
+        assets_dir (str): Directory that asset keys are resolved against.
+        static_dir (str): Streamlit static folder to publish into.
+        static_url (str): URL prefix the static folder is served at.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR, static_dir=STATIC_DIR, static_url=STATIC_URL):
+        self.assets_dir = assets_dir
+        self.static_dir = static_dir
+        self.static_url = static_url
+        self._urls = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, key):
+        """
+        Return the SHA-256 hex digest of an asset, hashing it only when it changed.
+        """
+        return self._lookup(key)[1]
+
+    def url(self, key):
+        """
+        Return the fingerprinted static URL for an asset, publishing it if needed.
+
+        Args:
+            key (str): Asset path relative to the assets directory.
+
+        Returns:
+            str: A relative URL such as "app/static/assets/ee_house.1a2b3c4d5e6f.png".
+        """
+        _, sha256, url = self._lookup(key)
+        if url is None:
+            stem, ext = os.path.splitext(key)
+            published_key = f"{stem}.{sha256[:12]}{ext}"
+            target = os.path.join(self.static_dir, "assets", *published_key.split("/"))
+            if not os.path.exists(target):
+                _copy_atomic(os.path.join(self.assets_dir, *key.split("/")), target)
+            url = f"{self.static_url}/assets/{published_key}"
+            with self._lock:
+                self._urls[key] = self._urls[key][:2] + (url,)
+        return url
+
+    def _lookup(self, key):
+        """
+        Return (file state, sha256, published url or None) for an asset.
+        """
+        path = os.path.join(self.assets_dir, *key.split("/"))
+        stat = os.stat(path)
+        state = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._urls.get(key)
+        if cached is not None and cached[0] == state:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        cached = (state, digest.hexdigest(), None)
+        with self._lock:
+            self._urls[key] = cached
+        return cached
+
+
+def _copy_atomic(src, dst):
+    """
+    Copy a file so that readers never observe a partially written target.
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _load_json(path, _cache={}):
+    """
+    Return the parsed contents of a JSON file, re-reading it only when it changes.
+
+    Returns None if the file is missing or unreadable.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime_ns:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        cached = _cache[path] = (mtime_ns, data)
+    return cached[1]
+
+
+def _load_manifest():
+    """
+    Return the asset entries of the build manifest.
+    """
+    manifest = _load_json(MANIFEST_PATH)
+    return manifest.get("assets", {}) if manifest else {}
+
+
+def media_store_path(sha256, url):
+    """
+    Return where the content-addressed copy of a remote file is stored.
+    """
+    ext = os.path.splitext(url.split("?")[0])[1].lower()
+    return os.path.join(MEDIA_DIR, f"{sha256}{ext}")
+
+
+_cache = AssetCache()
+_publisher = StaticPublisher()
+
+
+def image_src(key):
+    """
+    Return a value for an ``<img src=...>`` attribute that displays an asset.
+
+    With Streamlit static serving enabled this is a cacheable, content-hashed
+    URL, so repeat page views only revalidate the image instead of
+    re-downloading it inside the page payload. Otherwise it falls back to an
+    inline data URI from the process-wide cache.
+
+    Args:
+        key (str): Asset path relative to ``assets/`` (e.g. "ee_house.png").
+
+    Returns:
+        str: A static URL or a data URI.
+    """
+    if st.get_option("server.enableStaticServing"):
+        try:
+            return _publisher.url(key)
+        except OSError:
+            # Read-only deployments can't publish; inline the image instead.
+            pass
+    entry = _cache.get(key)
+    return f"data:{entry.mime};base64,{entry.base64}"
+
+
+def picture_html(key, alt="", style="", sizes="100vw", attrs=""):
+    """
+    Return ``<picture>`` markup that serves the smallest adequate variant of an asset.
+
+    Uses the variants listed in the build manifest (see build_assets.py): one
+    ``<source>`` per modern format with a width-descriptor ``srcset``, and a
+    PNG ``<img>`` fallback. Assets that are missing from the manifest, or whose
+    source changed since the last build, fall back to a plain ``<img>`` using
+    ``image_src``.
+
+    Args:
+        key (str): Asset path relative to ``assets/``.
+        alt (str): Alternative text for the image.
+        style (str): Inline CSS for the ``<img>`` element.
+        sizes (str): The ``sizes`` attribute telling the browser how wide the
+            image is rendered, e.g. "(max-width: 640px) 100vw, 45vw".
+        attrs (str): Extra raw attributes for the ``<img>`` element.
+
+    Returns:
+        str: HTML for the image.
+    """
+    entry = None
+    if st.get_option("server.enableStaticServing"):
+        entry = _load_manifest().get(key)
+        try:
+            if entry is not None and entry["sha256"] != _publisher.fingerprint(key):
+                entry = None
+        except OSError:
+            entry = None
+
+    img_attrs = f'alt="{alt}" style="{style}" {attrs}'.rstrip()
+    if entry is None:
+        return f'<img src="{image_src(key)}" {img_attrs}>'
+
+    def srcset(fmt):
+        return ", ".join(f"{STATIC_URL}/{v['path']} {v['width']}w" for v in entry["variants"][fmt])
+
+    sources = "".join(
+        f'<source type="{mime}" srcset="{srcset(fmt)}" sizes="{sizes}">'
+        for fmt, mime in MODERN_FORMATS
+        if entry["variants"].get(fmt)
+    )
+    fallback = entry["variants"]["png"][-1]
+    return (
+        f"<picture>{sources}"
+        f'<img src="{STATIC_URL}/{fallback["path"]}" srcset="{srcset("png")}" sizes="{sizes}" '
+        f'width="{entry["width"]}" height="{entry["height"]}" {img_attrs}>'
+        f"</picture>"
+    )
+
+
+def media_src(key):
+    """
+    Return the URL for a remote image listed in ``remote_media.json``.
+
+    Serves the locally synced, content-addressed copy when one exists, so
+    page loads don't depend on the third-party host. Media that hasn't been
+    synced (see sync_media.py) falls back to its original remote URL.
+
+    Args:
+        key (str): Media name from ``remote_media.json``
+            (e.g. "dasymetric_aoi.png").
+
+    Returns:
+        str: A static URL or the remote URL.
+    """
+    entry = (_load_json(REMOTE_MEDIA_PATH) or {})[key]
+    if entry.get("sha256") and st.get_option("server.enableStaticServing"):
+        path = media_store_path(entry["sha256"], entry["url"])
+        if os.path.exists(path):
+            return f"{STATIC_URL}/media/{os.path.basename(path)}"
+    return entry["url"]
@@ -0,0 +1,196 @@
+"""
+Offline image build for the Atlanta Energyshed Dashboard.
+
+Resizes every image in ``assets/`` to a ladder of widths and writes a
+losslessly recompressed PNG plus WebP (and AVIF, when this Pillow build
+supports it) for each width into ``static/build/``. A manifest describing the
+variants is written next to them; ``asset_cache.picture_html`` reads it to
+emit ``<picture>``/``srcset`` markup so browsers download the smallest
+adequate file.
+
+Usage:
+    python build_assets.py            # build new or changed assets
+    python build_assets.py --force    # rebuild everything
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+
+from PIL import Image, features
+
+from asset_cache import ASSETS_DIR, MANIFEST_PATH, STATIC_DIR
+
+BUILD_DIR = os.path.join(STATIC_DIR, "build")
+
+# Candidate widths in pixels; images are never upscaled, and the source width
+# is always kept as the largest variant.
+WIDTHS = (320, 640, 960, 1280, 1600)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+WEBP_QUALITY = 82
+AVIF_QUALITY = 60
+
+
+def variant_widths(source_width):
+    """
+    Return the widths to build for an image of the given width.
+    """
+    return [w for w in WIDTHS if w < source_width] + [source_width]
+
+
+def iter_asset_keys(assets_dir=ASSETS_DIR):
+    """
+    Yield the keys (paths relative to assets_dir) of every buildable image.
+    """
+    for root, _, files in os.walk(assets_dir):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                rel = os.path.relpath(os.path.join(root, name), assets_dir)
+                yield rel.replace(os.sep, "/")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_asset(key, sha256, formats):
+    """
+    Build every width/format variant of one asset.
+
+    Args:
+        key (str): Asset path relative to ``assets/``.
+        sha256 (str): Hash of the source file, used to fingerprint outputs.
+        formats (list): Output formats, e.g. ["png", "webp", "avif"].
+
+    Returns:
+        dict: The manifest entry for the asset.
+    """
+    source = Image.open(os.path.join(ASSETS_DIR, *key.split("/")))
+    source.load()
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA")
+    stem = os.path.splitext(key)[0]
+    entry = {
+        "sha256": sha256,
+        "width": source.width,
+        "height": source.height,
+        "variants": {fmt: [] for fmt in formats},
+    }
+
+    for width in variant_widths(source.width):
+        height = max(1, round(source.height * width / source.width))
+        image = source if width == source.width else source.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            rel = f"build/{stem}.{width}w.{sha256[:12]}.{fmt}"
+            out = os.path.join(STATIC_DIR, *rel.split("/"))
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            if fmt == "png":
+                image.save(out, "PNG", optimize=True)
+            elif fmt == "webp":
+                image.save(out, "WEBP", quality=WEBP_QUALITY, method=6)
+            else:
+                image.save(out, "AVIF", quality=AVIF_QUALITY)
+            entry["variants"][fmt].append(
+                {"width": width, "height": height, "path": rel, "bytes": os.path.getsize(out)}
+            )
+    return entry
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": 1, "assets": {}}
+
+
+def prune_unreferenced(manifest):
+    """
+    Delete build outputs that no manifest entry points at any more.
+    """
+    keep = {
+        os.path.normpath(os.path.join(STATIC_DIR, *v["path"].split("/")))
+        for entry in manifest["assets"].values()
+        for variants in entry["variants"].values()
+        for v in variants
+    }
+    keep.add(os.path.normpath(MANIFEST_PATH))
+    for root, _, files in os.walk(BUILD_DIR):
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            if path not in keep:
+                os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build responsive image variants for assets/.")
+    parser.add_argument("--force", action="store_true", help="rebuild assets even if unchanged")
+    parser.add_argument("--no-avif", action="store_true", help="skip AVIF output")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    formats = ["png", "webp"]
+    if not args.no_avif:
+        if features.check("avif"):
+            formats.append("avif")
+        else:
+            print("AVIF is not supported by this Pillow build; skipping AVIF variants.")
+
+    old = load_manifest()["assets"]
+    manifest = {"version": 1, "formats": formats, "assets": {}}
+    source_total = built_total = 0
+
+    pending = {}
+    for key in iter_asset_keys():
+        sha256 = file_sha256(os.path.join(ASSETS_DIR, *key.split("/")))
+        previous = old.get(key)
+        up_to_date = (
+            not args.force
+            and previous is not None
+            and previous["sha256"] == sha256
+            and set(previous["variants"]) == set(formats)
+            and all(
+                os.path.exists(os.path.join(STATIC_DIR, *v["path"].split("/")))
+                for variants in previous["variants"].values()
+                for v in variants
+            )
+        )
+        manifest["assets"][key] = previous if up_to_date else None
+        if not up_to_date:
+            pending[key] = sha256
+
+    # Encoding (PNG optimisation, AVIF) is CPU bound, so spread assets over processes.
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {pool.submit(build_asset, key, sha256, formats): key for key, sha256 in pending.items()}
+        for future in concurrent.futures.as_completed(futures):
+            manifest["assets"][futures[future]] = future.result()
+
+    for key, entry in manifest["assets"].items():
+        source_size = os.path.getsize(os.path.join(ASSETS_DIR, *key.split("/")))
+        best = min(variants[-1]["bytes"] for variants in entry["variants"].values())
+        source_total += source_size
+        built_total += best
+        status = "built" if key in pending else "cached"
+        print(f"{status:>6}  {key}: {source_size // 1024} KB -> {best // 1024} KB at full width")
+
+    prune_unreferenced(manifest)
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+    print(f"{len(manifest['assets'])} assets: {source_total // 1024} KB of sources, "
+          f"{built_total // 1024} KB for the smallest full-width variants.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Clipping a user area of interest (AOI) against the H3 parent grid.
+
+``ParentIndex`` turns the parent cells into polygons once and holds them in a
+shapely ``STRtree``. Clipping an AOI is then a bounding-box query on the tree
+followed by exact intersections with only the candidate cells, so a
+neighborhood-sized AOI is clipped in a few milliseconds regardless of how
+large the grid is.
+
+Geometry is projected to a local equirectangular plane in kilometres around
+metro Atlanta, which is accurate to well under 1% for area ratios at this
+scale. AOIs are given in lng/lat (GeoJSON order).
+"""
+import time
+
+import h3
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from models.dasymetric import uint64_to_cells
+
+# Origin of the local projection.
+ORIGIN_LAT = 33.75
+ORIGIN_LNG = -84.39
+KM_PER_DEG_LAT = 110.57
+KM_PER_DEG_LNG = 111.32 * np.cos(np.radians(ORIGIN_LAT))
+
+# Illustrative neighborhood outlines as (lng, lat) rings.
+SAMPLE_AOIS = {
+    "Downtown": [(-84.4010, 33.7480), (-84.3800, 33.7450), (-84.3750, 33.7620), (-84.3950, 33.7650)],
+    "Midtown": [(-84.3960, 33.7710), (-84.3720, 33.7700), (-84.3710, 33.7900), (-84.3880, 33.7920), (-84.3970, 33.7840)],
+    "West End": [(-84.4280, 33.7280), (-84.4050, 33.7290), (-84.4060, 33.7440), (-84.4270, 33.7430)],
+    "Buckhead": [(-84.3980, 33.8280), (-84.3550, 33.8300), (-84.3560, 33.8560), (-84.3950, 33.8540)],
+    "City of Atlanta (approx.)": [(-84.551, 33.648), (-84.289, 33.648), (-84.289, 33.887), (-84.440, 33.887), (-84.551, 33.800)],
+}
+
+
+def _project(coords):
+    """
+    Project an ``(n, 2)`` array of (lng, lat) to local (x, y) kilometres.
+    """
+    return np.column_stack([
+        (coords[:, 0] - ORIGIN_LNG) * KM_PER_DEG_LNG,
+        (coords[:, 1] - ORIGIN_LAT) * KM_PER_DEG_LAT,
+    ])
+
+
+def project(geometry):
+    """
+    Project a lng/lat shapely geometry into the local kilometre plane.
+    """
+    return shapely.transform(geometry, _project)
+
+
+class ParentIndex:
+    """
+    Spatial index over H3 parent cells for AOI clipping.
+
+    Args:
+        parents (np.ndarray): ``uint64`` parent indexes.
+    """
+
+    def __init__(self, parents):
+        self.parents = np.asarray(parents, dtype=np.uint64)
+        rings = [h3.cell_to_boundary(cell) for cell in uint64_to_cells(self.parents)]
+        # Hexagons and pentagons are built in one vectorized call per vertex
+        # count; h3 returns (lat, lng), so coordinates are flipped to (lng, lat).
+        self.polygons = np.empty(len(rings), dtype=object)
+        sizes = np.array([len(ring) for ring in rings])
+        for size in np.unique(sizes):
+            members = np.flatnonzero(sizes == size)
+            coords = np.array([rings[i] for i in members])[:, :, ::-1].reshape(-1, 2)
+            self.polygons[members] = shapely.polygons(_project(coords).reshape(len(members), size, 2))
+        self.areas = shapely.area(self.polygons)
+        self.tree = STRtree(self.polygons)
+
+    def clip(self, aoi):
+        """
+        Find the parents that intersect an AOI and the share of each inside it.
+
+        Args:
+            aoi (shapely.Geometry): Polygon or MultiPolygon in lng/lat.
+
+        Returns:
+            tuple: ``(positions, fractions)``; ``positions`` index into
+            ``self.parents`` (sorted) and ``fractions`` is the share of each
+            parent's area inside the AOI, in (0, 1].
+        """
+        aoi = project(aoi)
+        shapely.prepare(aoi)
+        positions = np.sort(self.tree.query(aoi, predicate="intersects"))
+        fractions = shapely.area(shapely.intersection(self.polygons[positions], aoi)) / self.areas[positions]
+        keep = fractions > 0
+        return positions[keep], np.minimum(fractions[keep], 1.0)
+
+
+def sample_aoi(name):
+    """
+    Return one of ``SAMPLE_AOIS`` as a shapely polygon.
+    """
+    return shapely.Polygon(SAMPLE_AOIS[name])
+
+
+def clip_summary(index, aoi, parent_values):
+    """
+    Clip an AOI and total the parent values that fall inside it.
+
+    Each parent contributes its value times the share of its area inside the
+    AOI.
+
+    Args:
+        index (ParentIndex): Index over the parent grid.
+        aoi (shapely.Geometry): AOI in lng/lat.
+        parent_values (np.ndarray): Value of each parent in ``index``.
+
+    Returns:
+        dict: ``positions``, ``fractions``, ``total`` (area-weighted sum of
+        ``parent_values``), ``area_km2`` and ``seconds`` taken by the clip.
+    """
+    start = time.perf_counter()
+    positions, fractions = index.clip(aoi)
+    seconds = time.perf_counter() - start
+    return {
+        "positions": positions,
+        "fractions": fractions,
+        "total": float(np.dot(np.asarray(parent_values)[positions], fractions)),
+        "area_km2": float(shapely.area(project(aoi))),
+        "seconds": seconds,
+    }
@@ -0,0 +1,265 @@
+"""
+Reading user-uploaded AOI polygons with bounded memory.
+
+Uploads are never parsed in one piece. GeoJSON FeatureCollections are read
+in fixed-size chunks and decoded one feature at a time with
+``json.JSONDecoder.raw_decode``, so the parser holds at most one feature plus
+one chunk of text. Zipped shapefiles are read record by record with pyshp.
+Each polygon is simplified as soon as it is read, with a tolerance tied to the
+H3 resolution the AOI will be used at: detail finer than half a cell edge
+can't change which cells the AOI covers.
+
+Inputs are limited in bytes, features, the size of any single feature and
+the total vertex count kept after simplification. When the vertex budget is
+exceeded the polygons read so far are re-simplified at a coarser tolerance
+(up to one parent-cell edge) rather than rejected; only inputs that still
+don't fit are rejected with ``AOIUploadError``.
+"""
+import codecs
+import io
+import json
+import os
+import re
+import zipfile
+
+import h3
+import numpy as np
+import shapefile
+import shapely
+
+from models.aoi import KM_PER_DEG_LAT
+from models.dasymetric import CHILD_RES, PARENT_RES
+
+# Upper bounds for one upload. Streamlit's server.maxUploadSize should match.
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+MAX_FEATURES = 5000
+MAX_FEATURE_BYTES = 16 * 1024 * 1024
+MAX_VERTICES = 100_000
+
+CHUNK_BYTES = 1 << 20
+
+_FEATURES_ARRAY = re.compile(r'"features"\s*:\s*\[')
+
+POLYGON_TYPES = ("Polygon", "MultiPolygon")
+
+
+class AOIUploadError(ValueError):
+    """
+    Raised when an uploaded AOI can't be read or exceeds the limits.
+    """
+
+
+def simplify_tolerance(res=CHILD_RES):
+    """
+    Return the simplification tolerance in degrees for AOIs used at ``res``.
+
+    Half the average H3 edge length at that resolution.
+    """
+    return h3.average_hexagon_edge_length(res, unit="km") / 2 / KM_PER_DEG_LAT
+
+
+def _to_polygon(geometry):
+    """
+    Build a 2D shapely polygon from a GeoJSON Polygon or MultiPolygon.
+
+    Rings go through NumPy arrays, which is much faster than
+    ``shapely.geometry.shape`` for rings with thousands of vertices.
+    """
+    def polygon(rings):
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings]
+        return shapely.Polygon(rings[0], rings[1:])
+
+    if geometry["type"] == "Polygon":
+        return polygon(geometry["coordinates"])
+    return shapely.MultiPolygon([polygon(rings) for rings in geometry["coordinates"]])
+
+
+class _PolygonCollector:
+    """
+    Accumulates simplified polygons within the vertex budget.
+    """
+
+    def __init__(self, res, max_vertices):
+        self.tolerance = simplify_tolerance(res)
+        self.max_tolerance = simplify_tolerance(PARENT_RES) * 2
+        self.max_vertices = max_vertices
+        self.polygons = []
+        self.vertices = 0
+        self.features = 0
+        self.skipped = 0
+        self.downsampled = False
+
+    def add(self, geometry):
+        self.features += 1
+        if self.features > MAX_FEATURES:
+            raise AOIUploadError(f"The file has more than {MAX_FEATURES:,} features.")
+        if geometry is None or geometry.get("type") not in POLYGON_TYPES:
+            self.skipped += 1
+            return
+        try:
+            polygon = _to_polygon(geometry)
+        except (ValueError, TypeError, IndexError, shapely.errors.GEOSException) as e:
+            raise AOIUploadError(f"Feature {self.features} has invalid geometry: {e}") from e
+        polygon = shapely.make_valid(shapely.simplify(polygon, self.tolerance, preserve_topology=True))
+        if polygon.is_empty:
+            return
+        self.polygons.append(polygon)
+        self.vertices += int(shapely.get_num_coordinates(polygon))
+        while self.vertices > self.max_vertices:
+            self._coarsen()
+
+    def _coarsen(self):
+        if self.tolerance * 2 > self.max_tolerance:
+            raise AOIUploadError(
+                f"The AOI has more than {self.max_vertices:,} vertices even when simplified to the H3 parent cell size."
+            )
+        self.tolerance *= 2
+        self.downsampled = True
+        self.polygons = [p for p in (shapely.simplify(p, self.tolerance, preserve_topology=True) for p in self.polygons)
+                         if not p.is_empty]
+        self.vertices = int(sum(shapely.get_num_coordinates(p) for p in self.polygons))
+
+    def result(self):
+        if not self.polygons:
+            raise AOIUploadError("The file contains no polygon features.")
+        return {
+            "aoi": shapely.union_all(self.polygons),
+            "features": self.features,
+            "skipped": self.skipped,
+            "vertices": self.vertices,
+            "tolerance_km": self.tolerance * KM_PER_DEG_LAT,
+            "downsampled": self.downsampled,
+        }
+
+
+def _iter_geojson_features(stream):
+    """
+    Yield the geometries of a GeoJSON document one feature at a time.
+
+    FeatureCollections are streamed; a bare Feature or geometry is small by
+    nature and is decoded whole (subject to ``MAX_FEATURE_BYTES``).
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = stream.read(CHUNK_BYTES)
+        eof = not chunk
+        buffer += text.decode(chunk, final=eof)
+        if len(buffer) > MAX_FEATURE_BYTES:
+            raise AOIUploadError(f"A single feature is larger than {MAX_FEATURE_BYTES // (1024 * 1024)} MB.")
+
+    # Read up to the opening bracket of the "features" array.
+    while True:
+        fill()
+        match = _FEATURES_ARRAY.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if eof:
+            try:
+                document = json.loads(buffer)
+            except json.JSONDecodeError as e:
+                raise AOIUploadError(f"Not valid GeoJSON: {e}") from e
+            if not isinstance(document, dict):
+                raise AOIUploadError("Not valid GeoJSON: expected an object.")
+            yield document.get("geometry") if document.get("type") == "Feature" else document
+            return
+
+    # Decode one feature at a time, dropping each from the buffer once read.
+    while True:
+        position = 0
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise AOIUploadError("The GeoJSON ends inside the \"features\" array.")
+            buffer = ""
+            fill()
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise AOIUploadError(f"Not valid GeoJSON: {e}") from e
+            buffer = buffer[position:]
+            fill()
+            continue
+        buffer = buffer[end:]
+        yield feature.get("geometry") if isinstance(feature, dict) else None
+
+
+def _iter_shapefile_features(stream):
+    """
+    Yield the geometries of a zipped shapefile one record at a time.
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise AOIUploadError("Shapefiles must be uploaded as a .zip with the .shp and .shx files.") from e
+    with archive:
+        names = {os.path.splitext(name)[1].lower(): name for name in archive.namelist()
+                 if not name.startswith("__MACOSX/")}
+        if ".shp" not in names:
+            raise AOIUploadError("The zip file contains no .shp file.")
+        if ".prj" in names:
+            projection = archive.read(names[".prj"]).decode("ascii", errors="replace")
+            if projection.lstrip().upper().startswith("PROJCS"):
+                raise AOIUploadError("The shapefile uses a projected CRS; please export it in WGS 84 (EPSG:4326).")
+        # Zip members are seekable streams, so pyshp reads records straight
+        # out of the archive without extracting it.
+        shp = archive.open(names[".shp"])
+        shx = archive.open(names[".shx"]) if ".shx" in names else None
+        try:
+            reader = shapefile.Reader(shp=shp, shx=shx)
+        except shapefile.ShapefileException as e:
+            raise AOIUploadError(f"Not a valid shapefile: {e}") from e
+        with reader:
+            for shape in reader.iterShapes():
+                yield shape.__geo_interface__ if shape.shapeType != shapefile.NULL else None
+
+
+def read_aoi(uploaded, res=CHILD_RES, max_vertices=MAX_VERTICES):
+    """
+    Read an uploaded AOI file into a single simplified polygon.
+
+    Args:
+        uploaded: Binary file-like object with a ``name`` (e.g. a Streamlit
+            ``UploadedFile``): ``.geojson``/``.json`` or a zipped shapefile.
+        res (int, optional): H3 resolution the AOI will be used at; sets the
+            simplification tolerance.
+        max_vertices (int, optional): Vertex budget after simplification.
+
+    Returns:
+        dict: ``aoi`` (shapely geometry in lng/lat), ``features``,
+        ``skipped`` (non-polygon features), ``vertices``, ``tolerance_km`` and
+        ``downsampled`` (whether the budget forced a coarser tolerance).
+
+    Raises:
+        AOIUploadError: If the file is too large, malformed, or has no
+            usable polygons.
+    """
+    size = getattr(uploaded, "size", None)
+    if size is None:
+        size = uploaded.seek(0, io.SEEK_END)
+    uploaded.seek(0)
+    if size > MAX_UPLOAD_BYTES:
+        raise AOIUploadError(f"The file is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+
+    extension = os.path.splitext(uploaded.name)[1].lower()
+    if extension in (".geojson", ".json"):
+        features = _iter_geojson_features(uploaded)
+    elif extension == ".zip":
+        features = _iter_shapefile_features(uploaded)
+    else:
+        raise AOIUploadError("Upload a GeoJSON file or a zipped shapefile.")
+
+    collector = _PolygonCollector(res, max_vertices)
+    for geometry in features:
+        collector.add(geometry)
+    return collector.result()
@@ -0,0 +1,197 @@
+"""
+Projected growth of hourly electricity demand in Georgia.
+
+Demand in a year is the sum of a few components, each an hourly shape per
+unit of some driver (MW of data centers, electric vehicles, homes converted
+to heat pumps) times how much of that driver there is that year:
+
+    load[scenario, year, hour] = drivers[scenario, year, :] @ shapes[:, hour]
+
+The baseline is today's system load, which already includes the data
+centers and EVs on the grid today, so the other components count only
+growth beyond today's level. Their drivers follow S-curves from zero in
+``BASE_YEAR`` to each scenario's increase by ``END_YEAR``, computed for
+every scenario and year at once by broadcasting.
+The whole projection is then one matrix product, and peaks, energy and each
+component's share of the peak are reductions over the hour axis. Nothing
+loops over years or scenarios in Python.
+
+Shapes come from the synthetic system load and home profiles in
+``models.profiles`` and ``models.retrofit``; driver levels are rounded
+illustrations from recent utility planning filings, not forecasts.
+"""
+import threading
+
+import numpy as np
+
+from models.profiles import EV_WINDOWS, hour_of_day, hourly_temperature, system_load
+from models.retrofit import ARCHETYPES, HOUSEHOLDS, PACKAGES, STOCK_SHARES, RetrofitSurrogate
+
+BASE_YEAR = 2024
+END_YEAR = 2040
+YEARS = np.arange(BASE_YEAR, END_YEAR + 1)
+
+# Registered light-duty vehicles in Georgia, and the share that are electric today.
+VEHICLES = 8_000_000
+EV_SHARE_TODAY = 0.02
+
+# Daily charging energy of one EV (kWh), about 35 miles of driving.
+EV_KWH_PER_DAY = 10.0
+
+# Data centers already on the grid (MW of average load).
+DATA_CENTER_MW_TODAY = 1500.0
+
+# Components of demand, in the order of the shapes and drivers.
+COMPONENTS = {
+    "baseline": "Today's load and its steady growth",
+    "data_centers": "New data centers",
+    "ev_evening": "New EVs charged in the evening",
+    "ev_overnight": "New EVs charged overnight",
+    "electrification": "Heat pumps replacing gas furnaces",
+}
+
+# Scenario drivers in END_YEAR; ``midpoint`` is the year growth is fastest.
+SCENARIOS = {
+    "slow": {
+        "label": "Slow growth",
+        "baseline_growth": 0.003,
+        "data_center_mw": 3000.0,
+        "ev_share": 0.15,
+        "managed_charging": 0.3,
+        "heat_pump_share": 0.10,
+        "midpoint": 2034,
+    },
+    "reference": {
+        "label": "Reference",
+        "baseline_growth": 0.006,
+        "data_center_mw": 6000.0,
+        "ev_share": 0.30,
+        "managed_charging": 0.4,
+        "heat_pump_share": 0.25,
+        "midpoint": 2032,
+    },
+    "data_center_boom": {
+        "label": "Data-center boom",
+        "baseline_growth": 0.008,
+        "data_center_mw": 12000.0,
+        "ev_share": 0.40,
+        "managed_charging": 0.4,
+        "heat_pump_share": 0.30,
+        "midpoint": 2030,
+    },
+}
+
+# Steepness of the S-curves (1/years).
+ADOPTION_RATE = 0.45
+
+_shapes = None
+_lock = threading.Lock()
+
+
+def s_curve(years, midpoint, rate=ADOPTION_RATE):
+    """
+    Logistic adoption rescaled to 0 in ``BASE_YEAR`` and 1 in ``END_YEAR``.
+
+    ``years`` and ``midpoint`` broadcast against each other.
+    """
+    def logistic(year):
+        return 1.0 / (1.0 + np.exp(-rate * (year - midpoint)))
+    return (logistic(years) - logistic(BASE_YEAR)) / (logistic(END_YEAR) - logistic(BASE_YEAR))
+
+
+def component_shapes():
+    """
+    Return the hourly shape of each component per unit of its driver, in MW,
+    building them on first use.
+
+    Returns:
+        np.ndarray: ``(len(COMPONENTS), 8760)``; the baseline is today's
+        system load, data centers are per MW of average load, EVs per
+        vehicle and electrification per converted home.
+    """
+    global _shapes
+    if _shapes is None:
+        with _lock:
+            if _shapes is None:
+                hod = hour_of_day()
+                # Data centers run flat out, with cooling adding a little on hot hours.
+                cooling = np.maximum(hourly_temperature() - 18.0, 0.0)
+                data_center = 1.0 + 0.01 * (cooling - cooling.mean())
+                ev = [((hod >= start) & (hod < end)) * EV_KWH_PER_DAY / (end - start) / 1000
+                      for start, end in EV_WINDOWS.values()]
+                # Extra electricity of a gas-heated home switching to a heat pump,
+                # averaged over the gas-heated stock.
+                hourly = RetrofitSurrogate().hourly[:, :, 0].astype(np.float64)
+                gas = np.array([fuel == "gas" for _, fuel in ARCHETYPES])
+                weights = STOCK_SHARES * gas / (STOCK_SHARES * gas).sum()
+                delta = hourly[:, PACKAGES.index("heat_pump")] - hourly[:, PACKAGES.index("none")]
+                electrification = weights @ delta / 1000
+                _shapes = np.vstack([system_load(), data_center, *ev, electrification])
+    return _shapes
+
+
+def scenario_parameters(scenarios):
+    """
+    Stack scenario definitions into arrays.
+
+    Args:
+        scenarios (list): Entries like those of ``SCENARIOS``.
+
+    Returns:
+        dict: One ``(n_scenarios,)`` array per parameter.
+    """
+    keys = [key for key in SCENARIOS["reference"] if key != "label"]
+    return {key: np.array([s[key] for s in scenarios], dtype=np.float64) for key in keys}
+
+
+def drivers(params, years=YEARS):
+    """
+    Amount of each component's driver in every scenario and year.
+
+    Data centers and EVs count only what is added after ``BASE_YEAR``;
+    today's are part of the baseline.
+
+    Returns:
+        np.ndarray: ``(n_scenarios, n_years, len(COMPONENTS))``.
+    """
+    years = np.asarray(years, dtype=np.float64)[None, :]
+    p = {key: value[:, None] for key, value in params.items()}
+    progress = s_curve(years, p["midpoint"])
+    new_evs = VEHICLES * (p["ev_share"] - EV_SHARE_TODAY) * progress
+    gas_homes = HOUSEHOLDS * (STOCK_SHARES * np.array([fuel == "gas" for _, fuel in ARCHETYPES])).sum()
+    return np.stack(np.broadcast_arrays(
+        (1 + p["baseline_growth"]) ** (years - BASE_YEAR),
+        (p["data_center_mw"] - DATA_CENTER_MW_TODAY) * progress,
+        new_evs * (1 - p["managed_charging"]),
+        new_evs * p["managed_charging"],
+        gas_homes * p["heat_pump_share"] * progress,
+    ), axis=-1)
+
+
+def project(scenarios, years=YEARS):
+    """
+    Project hourly demand for every scenario and year.
+
+    Args:
+        scenarios (list): Entries like those of ``SCENARIOS``.
+        years (np.ndarray, optional): Years to project.
+
+    Returns:
+        dict: ``years``; ``(n_scenarios, n_years)`` arrays ``peak_mw``,
+        ``energy_twh`` and ``peak_hour`` (hour of year); per component
+        ``(n_scenarios, n_years, len(COMPONENTS))`` arrays ``energy_by_component``
+        (TWh) and ``peak_by_component`` (MW at the system peak hour).
+    """
+    shapes = component_shapes()
+    d = drivers(scenario_parameters(scenarios), years)
+    load = d @ shapes
+    peak_hour = load.argmax(axis=-1)
+    at_peak = shapes[:, peak_hour].transpose(1, 2, 0)
+    return {
+        "years": np.asarray(years),
+        "peak_mw": load.max(axis=-1),
+        "energy_twh": load.sum(axis=-1) / 1e6,
+        "peak_hour": peak_hour,
+        "energy_by_component": d * shapes.sum(axis=-1) / 1e6,
+        "peak_by_component": d * at_peak,
+    }
@@ -0,0 +1,203 @@
+"""
+Delivery losses and costs from the bulk grid to each customer class.
+
+The grid is a tree from one bulk supply point down four tiers:
+transmission substations, distribution substations, primary feeder
+segments and secondary transformers. Every element loses a fraction of the
+power flowing through it: transformer core losses that don't depend on load,
+plus line and winding losses that grow with the square of loading.
+
+The share of energy that survives the trip from the source to a node is the
+product of ``1 - loss`` over the elements on its path. ``GridNetwork``
+computes it for every node at once, one tree depth at a time (a node's path
+product is its parent's times its own factor), so the pass loops over the
+dozen or so depths rather than the nodes. Losses are also accumulated per
+tier, which splits each customer's losses by where they occur. After that,
+a customer's delivered share is a single array lookup at the node it is
+connected to, and any number of customers are priced in one vectorized
+indexing step.
+
+The network and loss rates are a synthetic illustration sized like a
+large Southeastern utility, not a model of Georgia Power's system.
+"""
+import threading
+
+import numpy as np
+
+# Grid tiers from the bulk supply point down, with per-element losses:
+# ``core`` (share of throughput lost regardless of loading, i.e. transformer
+# core losses, expressed at peak), ``load`` (transformer winding losses at
+# peak) and ``per_km`` (line losses per km at peak). ``wires`` is the cost of
+# owning and maintaining the tier ($/kWh delivered through it).
+TIERS = {
+    "transmission": {"label": "Transmission", "core": 0.001, "load": 0.002, "per_km": 0.0001, "km": (40, 150), "wires": 0.012},
+    "substation": {"label": "Distribution substation", "core": 0.0015, "load": 0.003, "per_km": 0.0003, "km": (5, 25), "wires": 0.008},
+    "primary": {"label": "Primary lines", "core": 0.0, "load": 0.0, "per_km": 0.002, "km": (0.5, 2.5), "wires": 0.024},
+    "secondary": {"label": "Transformers and service lines", "core": 0.006, "load": 0.012, "per_km": 0.01, "km": (0.02, 0.1),
+                  "wires": 0.030},
+}
+
+# Customer classes and the tier whose nodes they connect to.
+CUSTOMER_CLASSES = {
+    "transmission": "Transmission customers",
+    "substation": "Substation customers (e.g. EMCs)",
+    "primary": "Primary customers (e.g. large factories)",
+    "secondary": "Secondary customers (homes and small buildings)",
+}
+
+# Children per parent for each tier below the source (low, high), and the
+# number of primary segments in series on each feeder.
+FANOUT = {"transmission": (10, 14), "substation": (4, 8), "primary": (3, 6), "secondary": (3, 7)}
+FEEDER_SEGMENTS = (3, 8)
+
+# Wholesale energy price at the bulk supply point ($/kWh).
+ENERGY_PRICE = 0.05
+
+
+class GridNetwork:
+    """
+    A synthetic supply tree with precomputed path-to-source losses.
+
+    Node 0 is the bulk supply point; every other node is fed by one element
+    of its tier from ``parent`` and parents always come before children.
+
+    Args:
+        seed (int, optional): Seed for the tree shape and line lengths.
+    """
+
+    def __init__(self, seed=2023):
+        rng = np.random.default_rng(seed)
+        tiers = list(TIERS)
+        parent, tier, depth = [np.array([-1])], [np.array([-1])], [np.array([0])]
+        level = np.array([0])
+        for t, name in enumerate(tiers):
+            low, high = FANOUT[name]
+            children = np.repeat(level, rng.integers(low, high + 1, level.size))
+            # Nodes hang directly off ``children`` except on primary feeders,
+            # which are chains of segments: the first fed from the substation,
+            # each later one from the segment before it.
+            upstream, position = children, np.zeros(children.size, dtype=int)
+            start = sum(p.size for p in parent)
+            if name == "primary":
+                segments = rng.integers(FEEDER_SEGMENTS[0], FEEDER_SEGMENTS[1] + 1, children.size)
+                upstream = np.repeat(children, segments)
+                position = np.arange(segments.sum()) - np.repeat(np.cumsum(segments) - segments, segments)
+                children = np.where(position == 0, upstream, start + np.arange(segments.sum()) - 1)
+            depth.append(np.concatenate(depth)[upstream] + 1 + position)
+            parent.append(children)
+            tier.append(np.full(children.size, t))
+            level = start + np.arange(children.size)
+
+        self.parent = np.concatenate(parent)
+        self.tier = np.concatenate(tier)
+        self.n = self.parent.size
+        low_km = np.array([TIERS[name]["km"][0] for name in tiers])
+        high_km = np.array([TIERS[name]["km"][1] for name in tiers])
+        element = self.tier.clip(0)
+        self.length_km = np.where(self.tier >= 0, rng.uniform(low_km[element], high_km[element]), 0.0)
+
+        self.depth = np.concatenate(depth)
+        self._levels = [np.flatnonzero(self.depth == d) for d in range(1, self.depth.max() + 1)]
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def element_losses(self, load_level=1.0):
+        """
+        Share of throughput lost in each node's feeding element.
+
+        Args:
+            load_level (float, optional): Loading as a share of peak; load
+                losses scale with its square.
+
+        Returns:
+            np.ndarray: ``(n,)``; 0 for the source.
+        """
+        spec = {key: np.array([TIERS[name][key] for name in TIERS]) for key in ("core", "load", "per_km")}
+        element = self.tier.clip(0)
+        # Core losses are fixed in MW, so as a share of throughput they shrink as load grows.
+        loss = (spec["core"][element] / max(load_level, 1e-3)
+                + load_level * (spec["load"][element] + spec["per_km"][element] * self.length_km))
+        return np.where(self.tier >= 0, np.minimum(loss, 0.5), 0.0)
+
+    def path_losses(self, load_level=1.0):
+        """
+        Precompute every node's path to the source, once per loading.
+
+        Returns:
+            dict: ``delivered`` ``(n,)``, the share of energy leaving the
+            source that reaches the node, and ``by_tier`` ``(n, len(TIERS))``,
+            the energy lost in each tier per unit delivered to the node.
+        """
+        key = round(float(load_level), 4)
+        paths = self._paths.get(key)
+        if paths is not None:
+            return paths
+        with self._lock:
+            if key not in self._paths:
+                # Work in log space so the per-tier split of the path product is additive.
+                log_kept = np.log1p(-self.element_losses(key))
+                by_tier = np.zeros((self.n, len(TIERS)))
+                for nodes in self._levels:
+                    by_tier[nodes] = by_tier[self.parent[nodes]]
+                    by_tier[nodes, self.tier[nodes]] -= log_kept[nodes]
+                delivered = np.exp(-by_tier.sum(axis=1))
+                # Split the total extra energy 1/delivered - 1 in proportion to each tier's log loss.
+                total = by_tier.sum(axis=1, keepdims=True)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    share = np.where(total > 0, by_tier / total, 0.0)
+                self._paths[key] = {"delivered": delivered, "by_tier": share * (1 / delivered - 1)[:, None]}
+            return self._paths[key]
+
+    def customers(self, count, seed=0):
+        """
+        Attach a synthetic set of customers to the network.
+
+        Each class connects to random nodes of its tier; ``count`` maps class
+        keys to how many customers to draw.
+
+        Returns:
+            tuple: ``(nodes, classes)``, the node and class index (into
+            ``CUSTOMER_CLASSES``) of each customer.
+        """
+        rng = np.random.default_rng(seed)
+        classes = list(CUSTOMER_CLASSES)
+        nodes, class_index = [], []
+        for name, n in count.items():
+            candidates = np.flatnonzero(self.tier == list(TIERS).index(name))
+            nodes.append(rng.choice(candidates, n))
+            class_index.append(np.full(n, classes.index(name)))
+        return np.concatenate(nodes), np.concatenate(class_index)
+
+    def delivery_cost(self, nodes, load_level=1.0, energy_price=ENERGY_PRICE):
+        """
+        Cost of delivering 1 kWh to customers connected at ``nodes``.
+
+        Looks up each node's precomputed path losses, so the cost of any
+        number of customers is a few indexing operations.
+
+        Args:
+            nodes (np.ndarray): Node index of each customer.
+            load_level (float, optional): Loading as a share of peak.
+            energy_price (float, optional): Price at the bulk supply point ($/kWh).
+
+        Returns:
+            dict: Per customer ($/kWh): ``energy``, ``losses`` (``(n, len(TIERS))``,
+            the cost of energy lost in each tier), ``wires`` (``(n, len(TIERS))``,
+            the tiers the customer's power passes through) and ``total``;
+            and ``loss_share``, the share of energy bought that is lost.
+        """
+        paths = self.path_losses(load_level)
+        nodes = np.asarray(nodes)
+        wires_rate = np.array([spec["wires"] for spec in TIERS.values()])
+        # A customer uses every tier above the one it connects at, and that tier's element.
+        used = np.arange(len(TIERS)) <= self.tier[nodes][:, None]
+        losses = energy_price * paths["by_tier"][nodes]
+        wires = used * wires_rate
+        energy = np.full(nodes.size, energy_price)
+        return {
+            "energy": energy,
+            "losses": losses,
+            "wires": wires,
+            "total": energy + losses.sum(axis=1) + wires.sum(axis=1),
+            "loss_share": 1 - paths["delivered"][nodes],
+        }
@@ -0,0 +1,134 @@
+"""
+Multi-resolution H3 pyramid of downscaled values for map rendering.
+
+Drawing every res-10 child of a city-sized AOI would send tens of thousands
+of hexagons to the browser. ``H3Pyramid`` aggregates the children once into
+every coarser level down to res 6, each level a sorted ``uint64`` index array
+with the summed values. ``select_view`` then picks, for a map zoom and AOI,
+the finest level whose hexagons are still visible at that zoom and whose cell
+count fits ``MAX_MAP_CELLS``, so the number of polygons sent to the client is
+bounded at any zoom.
+"""
+import h3
+import numpy as np
+
+from models.dasymetric import CHILD_RES, PARENT_RES, cell_to_parent, child_range
+
+MIN_RES = 6
+
+# Most hexagons a map view may contain.
+MAX_MAP_CELLS = 5000
+
+# Hexagons whose edges would be drawn shorter than this are too small to see.
+MIN_EDGE_PX = 3.0
+
+# Web Mercator ground resolution at zoom 0 on the equator, in m per pixel.
+_METERS_PER_PX_Z0 = 156543.03
+
+
+class H3Pyramid:
+    """
+    Values aggregated from res-``max_res`` cells to every coarser level.
+
+    Args:
+        cells (np.ndarray): ``uint64`` indexes, all at ``max_res``.
+        values (np.ndarray): Value of each cell.
+        min_res (int, optional): Coarsest level to build.
+        max_res (int, optional): Resolution of ``cells``.
+    """
+
+    def __init__(self, cells, values, min_res=MIN_RES, max_res=CHILD_RES):
+        order = np.argsort(cells)
+        self.min_res = min_res
+        self.max_res = max_res
+        self.levels = {max_res: (np.asarray(cells, dtype=np.uint64)[order], np.asarray(values, dtype=np.float64)[order])}
+        # Each level is aggregated from the one below it, so the work shrinks
+        # roughly 7x per step.
+        for res in range(max_res - 1, min_res - 1, -1):
+            finer_cells, finer_values = self.levels[res + 1]
+            parents = cell_to_parent(finer_cells, res)
+            cells_at_res, inverse = np.unique(parents, return_inverse=True)
+            self.levels[res] = (cells_at_res, np.bincount(inverse, weights=finer_values, minlength=len(cells_at_res)))
+
+    def subset(self, res, parents=None, parent_res=PARENT_RES):
+        """
+        Return the cells and values at ``res`` that cover some parent cells.
+
+        Args:
+            res (int): Level to read.
+            parents (np.ndarray, optional): ``uint64`` cells at ``parent_res``,
+                e.g. the parents clipped by an AOI. All cells when omitted.
+            parent_res (int, optional): Resolution of ``parents``.
+
+        Returns:
+            tuple: ``(cells, values)``, sorted by cell.
+        """
+        cells, values = self.levels[res]
+        if parents is None:
+            return cells, values
+        parents = np.asarray(parents, dtype=np.uint64)
+        if res <= parent_res:
+            wanted = np.unique(cell_to_parent(parents, res))
+            positions = np.searchsorted(cells, wanted)
+            positions = positions[(positions < len(cells)) & (cells[np.minimum(positions, len(cells) - 1)] == wanted)]
+            return cells[positions], values[positions]
+        # The children of each parent are one contiguous run of the sorted level.
+        low, high = child_range(parents, parent_res, res)
+        starts = np.searchsorted(cells, low, side="left")
+        stops = np.searchsorted(cells, high, side="right")
+        lengths = stops - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        positions = np.sort(positions)
+        return cells[positions], values[positions]
+
+
+def edge_px(res, zoom, lat=33.75):
+    """
+    Return the on-screen edge length of a res-``res`` hexagon at a map zoom.
+    """
+    meters_per_px = _METERS_PER_PX_Z0 * np.cos(np.radians(lat)) / 2 ** zoom
+    return h3.average_hexagon_edge_length(res, unit="m") / meters_per_px
+
+
+def fit_zoom(bounds, width_px=900, height_px=500):
+    """
+    Return the Web Mercator zoom that fits a lng/lat bounding box in a viewport.
+
+    Args:
+        bounds (tuple): ``(min_lng, min_lat, max_lng, max_lat)``.
+    """
+    min_lng, min_lat, max_lng, max_lat = bounds
+    lat = (min_lat + max_lat) / 2
+    width_m = max((max_lng - min_lng) * 111_320 * np.cos(np.radians(lat)), 1.0)
+    height_m = max((max_lat - min_lat) * 110_570, 1.0)
+    meters_per_px = max(width_m / width_px, height_m / height_px)
+    return float(np.log2(_METERS_PER_PX_Z0 * np.cos(np.radians(lat)) / meters_per_px))
+
+
+def select_view(pyramid, zoom, parents=None, max_cells=MAX_MAP_CELLS, lat=33.75):
+    """
+    Pick the pyramid level to draw for a map zoom and AOI.
+
+    The finest level whose hexagons are at least ``MIN_EDGE_PX`` across at
+    ``zoom`` and whose cells covering ``parents`` number at most
+    ``max_cells`` is used. If even the coarsest level is over budget, its
+    ``max_cells`` highest-valued cells are kept so the bound always holds.
+
+    Args:
+        pyramid (H3Pyramid): Aggregated values.
+        zoom (float): Map zoom level.
+        parents (np.ndarray, optional): Res-8 cells in the AOI.
+        max_cells (int, optional): Polygon budget for the view.
+        lat (float, optional): Latitude of the view, for pixel sizes.
+
+    Returns:
+        tuple: ``(res, cells, values)``.
+    """
+    for res in range(pyramid.max_res, pyramid.min_res - 1, -1):
+        if res > pyramid.min_res and edge_px(res, zoom, lat) < MIN_EDGE_PX:
+            continue
+        cells, values = pyramid.subset(res, parents)
+        if len(cells) <= max_cells:
+            return res, cells, values
+    keep = np.sort(np.argsort(values)[-max_cells:])
+    return pyramid.min_res, cells[keep], values[keep]
@@ -0,0 +1,210 @@
+"""
+Solar hosting capacity of a radial distribution feeder.
+
+Power flows on a radial feeder are approximated with the linearized
+DistFlow equations (LinDistFlow): each line's flow is the net load
+downstream of it, and the squared voltage drops along each line by twice
+its resistance times real flow plus reactance times reactive flow. With one
+line feeding each bus, the bus-line incidence matrix ``A`` is square and
+triangular, so
+
+    flows      = A^-T @ net_load
+    voltages^2 = V0^2 - A^-1 @ (2 * (r * flows + x * reactive_flows))
+
+``A`` is a ``scipy.sparse`` matrix factorized once per feeder; each power
+flow is then two sparse triangular solves, and a batch of scenarios is the
+same solves with one right-hand side column per scenario.
+
+Because the model is linear, voltages and flows with solar added in a fixed
+pattern change in proportion to the total solar. The hosting capacity of a
+placement pattern, the most solar it can add before a voltage or line limit
+is broken, is a ratio taken over buses and lines, so thousands of random
+placements are evaluated in one batch.
+
+The feeder is synthetic: a 12.47 kV trunk with single-phase laterals of
+typical suburban length and loading, not a model of a real Georgia Power
+circuit.
+"""
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+# Base power and line-to-line voltage for per-unit values.
+BASE_MVA = 10.0
+BASE_KV = 12.47
+BASE_OHMS = BASE_KV ** 2 / BASE_MVA
+
+# Substation voltage and the service voltage limits (ANSI C84.1 range A), pu.
+SUBSTATION_VOLTAGE = 1.03
+VOLTAGE_LIMITS = (0.95, 1.05)
+
+# Line impedances (ohm/km) and thermal limits (MVA) by line type.
+LINE_TYPES = {
+    "trunk": {"r": 0.19, "x": 0.38, "rating_mva": 8.0},
+    "lateral": {"r": 0.55, "x": 0.45, "rating_mva": 1.2},
+}
+
+# Diversified peak load per home (MW) and load power factor.
+HOME_PEAK_MW = 0.003
+LOAD_POWER_FACTOR = 0.95
+
+# Midday load on a mild sunny day, as a share of peak: the usual worst case
+# for solar hosting capacity.
+MIDDAY_LOAD_SHARE = 0.3
+
+# Size of one rooftop system (MW), for "homes with solar" figures.
+ROOFTOP_MW = 0.007
+
+LIMITS = ("voltage", "thermal")
+
+
+class RadialFeeder:
+    """
+    A synthetic radial feeder and its factorized LinDistFlow model.
+
+    Buses are numbered so every bus's parent comes before it; the substation
+    is bus ``-1`` (not stored) and line ``i`` feeds bus ``i``.
+
+    Args:
+        trunk_sections (int, optional): Sections of the main trunk.
+        trunk_km (float, optional): Length of each trunk section.
+        lateral_km (float, optional): Length of each lateral section.
+        seed (int, optional): Seed for lateral lengths and homes per bus.
+    """
+
+    def __init__(self, trunk_sections=40, trunk_km=0.2, lateral_km=0.25, seed=2023):
+        rng = np.random.default_rng(seed)
+        laterals = rng.integers(0, 7, trunk_sections)
+        parent, kind, length = [], [], []
+        trunk_bus = -1
+        for sections in laterals:
+            parent.append(trunk_bus)
+            trunk_bus = len(parent) - 1
+            kind.append("trunk")
+            length.append(trunk_km)
+            for k in range(sections):
+                parent.append(trunk_bus if k == 0 else len(parent) - 1)
+                kind.append("lateral")
+                length.append(lateral_km)
+
+        self.parent = np.array(parent)
+        self.kind = np.array(kind)
+        self.length_km = np.array(length)
+        self.n = len(parent)
+        self.distance_km = np.zeros(self.n)
+        for i, p in enumerate(self.parent):
+            self.distance_km[i] = self.length_km[i] + (self.distance_km[p] if p >= 0 else 0.0)
+
+        # Homes are served from lateral buses.
+        self.homes = np.where(self.kind == "lateral", rng.integers(12, 31, self.n), 0)
+        self.peak_mw = self.homes * HOME_PEAK_MW
+        self.peak_mvar = self.peak_mw * np.tan(np.arccos(LOAD_POWER_FACTOR))
+
+        line = {key: np.array([LINE_TYPES[k][key] for k in self.kind]) for key in ("r", "x", "rating_mva")}
+        self.r = line["r"] * self.length_km / BASE_OHMS
+        self.x = line["x"] * self.length_km / BASE_OHMS
+        self.rating_mw = line["rating_mva"]
+
+        # Row i is line i: +1 at the bus it feeds, -1 at its parent.
+        rows = np.arange(self.n)
+        upstream = self.parent >= 0
+        A = sp.coo_matrix((np.concatenate([np.ones(self.n), -np.ones(upstream.sum())]),
+                           (np.concatenate([rows, rows[upstream]]), np.concatenate([rows, self.parent[upstream]]))),
+                          shape=(self.n, self.n))
+        self.incidence = A.tocsc()
+        self._lu = splu(self.incidence)
+
+    def power_flow(self, net_mw, net_mvar):
+        """
+        Solve LinDistFlow for one or more net load cases.
+
+        Args:
+            net_mw (np.ndarray): ``(n,)`` or ``(n, cases)`` net real load per
+                bus (MW); negative where solar exceeds load.
+            net_mvar (np.ndarray): Reactive load, same shape (MVAr).
+
+        Returns:
+            dict: ``flow_mw`` and ``flow_mvar`` per line (positive away from
+            the substation) and ``voltage`` per bus (pu), shaped like the inputs.
+        """
+        p = np.asarray(net_mw, dtype=np.float64) / BASE_MVA
+        q = np.asarray(net_mvar, dtype=np.float64) / BASE_MVA
+        flow_p = self._lu.solve(p, trans="T")
+        flow_q = self._lu.solve(q, trans="T")
+        r, x = (self.r, self.x) if p.ndim == 1 else (self.r[:, None], self.x[:, None])
+        v_squared = SUBSTATION_VOLTAGE ** 2 - self._lu.solve(2 * (r * flow_p + x * flow_q))
+        return {"flow_mw": flow_p * BASE_MVA, "flow_mvar": flow_q * BASE_MVA, "voltage": np.sqrt(v_squared)}
+
+    def placements(self, scenarios, sites, toward_end=0.0, seed=0):
+        """
+        Draw random solar placement patterns.
+
+        Each scenario puts solar at ``sites`` distinct home buses, drawn in
+        proportion to their homes and weighted toward the far end of the
+        feeder by ``toward_end``, with random shares of the total.
+
+        Args:
+            scenarios (int): Number of patterns.
+            sites (int): Buses with solar in each pattern.
+            toward_end (float, optional): 0 spreads solar evenly; higher
+                values favor buses far from the substation.
+            seed (int, optional): Random seed.
+
+        Returns:
+            scipy.sparse.csc_matrix: ``(n, scenarios)``; each column sums to 1.
+        """
+        rng = np.random.default_rng(seed)
+        candidates = np.flatnonzero(self.homes)
+        sites = min(sites, candidates.size)
+        weight = self.homes[candidates] * np.exp(toward_end * self.distance_km[candidates] / self.distance_km.max())
+        # Gumbel top-k: the k largest perturbed log-weights are a weighted draw without replacement.
+        keys = np.log(weight) + rng.gumbel(size=(scenarios, candidates.size))
+        chosen = candidates[np.argpartition(-keys, sites - 1, axis=1)[:, :sites]]
+        shares = rng.dirichlet(np.full(sites, 2.0), size=scenarios)
+        columns = np.repeat(np.arange(scenarios), sites)
+        return sp.csc_matrix((shares.ravel(), (chosen.ravel(), columns)), shape=(self.n, scenarios))
+
+    def hosting_capacity(self, placements, load_share=MIDDAY_LOAD_SHARE):
+        """
+        Most solar each placement pattern can add before a limit is broken.
+
+        Args:
+            placements (scipy.sparse matrix or np.ndarray): ``(n, scenarios)``
+                solar shares per bus, e.g. from ``placements``.
+            load_share (float, optional): Load as a share of peak.
+
+        Returns:
+            dict: Per scenario: ``capacity_mw``, ``limit`` (index into
+            ``LIMITS``) and ``bus`` (the bus or line that binds first).
+        """
+        base = self.power_flow(load_share * self.peak_mw, load_share * self.peak_mvar)
+        shares = placements.toarray() if sp.issparse(placements) else np.asarray(placements, dtype=np.float64)
+        # Flow and voltage change per MW of solar (solar is negative load at unity power factor).
+        d_flow = -self._lu.solve(shares / BASE_MVA, trans="T") * BASE_MVA
+        d_v_squared = self._lu.solve(2 * self.r[:, None] * -d_flow / BASE_MVA)
+
+        v_max_squared = VOLTAGE_LIMITS[1] ** 2
+        headroom = np.maximum(v_max_squared - base["voltage"] ** 2, 0.0)[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            voltage_mw = np.where(d_v_squared > 1e-12, headroom / d_v_squared, np.inf)
+            # Reverse flow is limited by the rating: flow + mw * d_flow >= -rating.
+            thermal_mw = np.where(d_flow < -1e-12, (base["flow_mw"] + self.rating_mw)[:, None] / -d_flow, np.inf)
+        voltage_bus = voltage_mw.argmin(axis=0)
+        thermal_line = thermal_mw.argmin(axis=0)
+        columns = np.arange(shares.shape[1])
+        by_limit = np.vstack([voltage_mw[voltage_bus, columns], thermal_mw[thermal_line, columns]])
+        limit = by_limit.argmin(axis=0)
+        return {
+            "capacity_mw": by_limit[limit, columns],
+            "limit": limit,
+            "bus": np.where(limit == 0, voltage_bus, thermal_line),
+        }
+
+    def bus_hosting_capacity(self, load_share=MIDDAY_LOAD_SHARE):
+        """
+        Hosting capacity of solar placed entirely at each bus.
+
+        Returns:
+            dict: ``hosting_capacity`` output with one entry per bus.
+        """
+        return self.hosting_capacity(sp.identity(self.n, format="csc"), load_share)
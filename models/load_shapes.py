@@ -0,0 +1,128 @@
+"""
+Seasonal, monthly and peak-day aggregates of 8,760-hour load profiles.
+
+``aggregate`` resamples any stack of hourly profiles in one vectorized pass:
+the year is reshaped to (day, hour), months are summed with
+``np.add.reduceat`` over the day axis and seasons are a matrix product over
+months. Nothing loops over profiles or hours.
+
+``retrofit_aggregates`` applies it to every archetype and package of
+``models.retrofit`` at once and stores the result in
+``data/build/load_shapes/retrofit.<fingerprint>.npz``. The fingerprint
+covers ``AGGREGATES_VERSION`` and the retrofit model's
+``dataset_version()``, so the aggregation runs once per dataset version;
+page views and other processes only load the stored arrays.
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from models import retrofit
+from models.profiles import DAYS_IN_MONTH, HOURS_PER_YEAR, MONTH_START_DAY
+
+BUILD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "build", "load_shapes")
+
+# Bump when the aggregates change, to invalidate stored results.
+AGGREGATES_VERSION = 1
+
+DAYS_PER_YEAR = HOURS_PER_YEAR // 24
+
+# Meteorological seasons as months (1-12).
+SEASONS = {
+    "Winter": (12, 1, 2),
+    "Spring": (3, 4, 5),
+    "Summer": (6, 7, 8),
+    "Fall": (9, 10, 11),
+}
+
+# (month, season) membership matrix.
+SEASON_MATRIX = np.array([[month in months for months in SEASONS.values()] for month in range(1, 13)], dtype=np.float64)
+
+_aggregates = {}
+_lock = threading.Lock()
+
+
+def aggregate(hourly):
+    """
+    Aggregate hourly profiles by month, season and day.
+
+    Args:
+        hourly (np.ndarray): Profiles of shape ``(..., 8760)``, one value per
+            hour (e.g. kWh).
+
+    Returns:
+        dict: Arrays whose leading dimensions match ``hourly``:
+        ``annual`` ``(...)``, ``monthly`` ``(..., 12)``, ``seasonal``
+        ``(..., 4)`` (in ``SEASONS`` order), ``month_day`` and ``season_day``
+        ``(..., 12 | 4, 24)`` (average day), ``peak_day`` ``(...)`` (day of
+        year with the highest hour) and ``peak_day_profile`` ``(..., 24)``.
+    """
+    hourly = np.asarray(hourly, dtype=np.float64)
+    days = hourly.reshape(*hourly.shape[:-1], DAYS_PER_YEAR, 24)
+    month_hours = np.add.reduceat(days, MONTH_START_DAY, axis=-2)
+    monthly = month_hours.sum(axis=-1)
+    season_hours = np.einsum("...mh,ms->...sh", month_hours, SEASON_MATRIX)
+    peak_day = days.max(axis=-1).argmax(axis=-1)
+    return {
+        "annual": monthly.sum(axis=-1),
+        "monthly": monthly,
+        "seasonal": monthly @ SEASON_MATRIX,
+        "month_day": month_hours / DAYS_IN_MONTH[:, None],
+        "season_day": season_hours / (DAYS_IN_MONTH @ SEASON_MATRIX)[:, None],
+        "peak_day": peak_day,
+        "peak_day_profile": np.take_along_axis(days, peak_day[..., None, None], axis=-2)[..., 0, :],
+    }
+
+
+def _aggregates_path():
+    digest = hashlib.sha256(f"{AGGREGATES_VERSION}:{retrofit.dataset_version()}".encode())
+    return os.path.join(BUILD_DIR, f"retrofit.{digest.hexdigest()[:12]}.npz")
+
+
+def retrofit_aggregates():
+    """
+    Return the aggregates of every retrofit archetype and package, computing
+    and storing them on first use for the current dataset version.
+
+    Returns:
+        dict: ``aggregate`` output with leading dimensions
+        ``(archetype, package, carrier)`` (see ``RetrofitSurrogate.hourly``).
+    """
+    path = _aggregates_path()
+    result = _aggregates.get(path)
+    if result is not None:
+        return result
+    with _lock:
+        if path not in _aggregates:
+            if not os.path.exists(path):
+                os.makedirs(BUILD_DIR, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.savez(f, **aggregate(retrofit.RetrofitSurrogate().hourly))
+                os.replace(tmp, path)
+                for name in os.listdir(BUILD_DIR):
+                    if name.startswith("retrofit.") and name.endswith(".npz") and name != os.path.basename(path):
+                        os.remove(os.path.join(BUILD_DIR, name))
+            with np.load(path) as stored:
+                _aggregates[path] = {name: stored[name] for name in stored.files}
+        return _aggregates[path]
+
+
+def load_shape_summary(era, fuel, package):
+    """
+    Return the aggregates of one archetype under one package.
+
+    Args:
+        era (str): Key in ``retrofit.ERAS``.
+        fuel (str): Key in ``retrofit.HEATING_FUELS``.
+        package (str): Key in ``retrofit.PACKAGES``.
+
+    Returns:
+        dict: ``aggregate`` output with a leading carrier dimension
+        (electricity, gas).
+    """
+    a = retrofit.ARCHETYPES.index((era, fuel))
+    k = retrofit.PACKAGES.index(package)
+    return {name: values[a, k] for name, values in retrofit_aggregates().items()}
@@ -0,0 +1,417 @@
+"""
+Retrofit evaluation across a whole building inventory.
+
+The inventory is processed in chunks of ``CHUNK_SIZE`` parcels. Each chunk
+is one vectorized pass over ``RetrofitSurrogate``'s per-archetype results,
+scaled by floor area. Totals for the portfolio only need the floor area
+per archetype, before and after adoption, so chunks reduce to a few small
+arrays and the portfolio's hourly demand is rebuilt from those at the end.
+Memory use therefore depends on the chunk size, not on the inventory size.
+
+Chunks can be spread over a process pool. Per-parcel results can be
+streamed to Parquet, one row group per chunk, in inventory order.
+
+A Parquet inventory is chunked within its row groups, so a file written as
+a single row group is still read ``CHUNK_SIZE`` parcels at a time.
+
+The inventory is either a Parquet file with ``INVENTORY_COLUMNS`` or a
+synthetic metro Atlanta stock generated chunk by chunk. Parcel IDs may be
+integers or strings (e.g. tax parcel numbers like "14 0078 0001 045").
+
+Usage:
+    python -m models.portfolio --package full_retrofit --adoption 0.45 --output data/build/portfolio.parquet
+    python -m models.portfolio --inventory parcels.parquet --jobs 4 --output results.parquet
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from models.dasymetric import hash_uniform
+from models.profiles import system_load
+from models.retrofit import ARCHETYPES, ERAS, HEATING_FUELS, MEASURES, PACKAGES, RetrofitSurrogate
+
+# Single-family parcels in the 11-county metro area (approx.).
+METRO_PARCELS = 1_100_000
+CHUNK_SIZE = 100_000
+
+# Floor area of the archetype homes in models.retrofit; use scales linearly with it.
+REFERENCE_SQFT = 2200.0
+
+# The grid is most stressed in the hours of highest system load.
+STRESS_HOURS = 100
+
+INVENTORY_COLUMNS = ["parcel_id", "era", "heating_fuel", "floor_area_sqft"]
+
+# Metro stock split across ERAS, the electric share of heating per era, and
+# the median floor area per era.
+ERA_SHARES = np.array([0.30, 0.63, 0.07])
+ELECTRIC_SHARES = np.array([0.45, 0.55, 0.60])
+MEDIAN_SQFT = np.array([1700.0, 2300.0, 2600.0])
+
+_ERA_KEYS = pa.array(list(ERAS))
+_FUEL_KEYS = pa.array(list(HEATING_FUELS))
+
+_model = None
+_lock = threading.Lock()
+
+
+def _get_model():
+    """
+    Return the per-process surrogate and its demand in the stress hours.
+    """
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                surrogate = RetrofitSurrogate()
+                stress_hours = np.argsort(system_load())[-STRESS_HOURS:]
+                # Average electric demand (kW) of each (archetype, package) in the stress hours.
+                stress_kw = surrogate.hourly[:, :, 0, stress_hours].mean(axis=-1, dtype=np.float64)
+                _model = {"surrogate": surrogate, "stress_kw": stress_kw}
+    return _model
+
+
+def measure_contributions(stress_kw, package):
+    """
+    Split each archetype's stress-hour demand reduction between measures.
+
+    Envelope and heat pump savings interact (a tighter house leaves less for
+    the heat pump to save), so a package with both measures is split by
+    averaging each measure's saving over the two orders of installing them.
+
+    Args:
+        stress_kw (np.ndarray): ``(n_archetypes, n_packages)`` stress-hour demand.
+        package (str): Key in ``PACKAGES``.
+
+    Returns:
+        np.ndarray: ``(n_archetypes, len(MEASURES))`` reduction in kW per home.
+    """
+    none, envelope, heat_pump, full = (stress_kw[:, PACKAGES.index(p)] for p in PACKAGES)
+    zero = np.zeros(len(stress_kw))
+    if package == "envelope":
+        return np.column_stack([none - envelope, zero])
+    if package == "heat_pump":
+        return np.column_stack([zero, none - heat_pump])
+    if package == "full_retrofit":
+        return np.column_stack([
+            ((none - envelope) + (heat_pump - full)) / 2,
+            ((none - heat_pump) + (envelope - full)) / 2,
+        ])
+    return np.column_stack([zero, zero])
+
+
+def synthetic_chunk(start, size, seed=2023):
+    """
+    Generate parcels ``start`` to ``start + size`` of a synthetic metro inventory.
+
+    Each chunk is seeded by its start, so any chunk can be generated on its
+    own, in any process, and always comes out the same.
+
+    Returns:
+        pa.RecordBatch: ``INVENTORY_COLUMNS``.
+    """
+    rng = np.random.default_rng([seed, start])
+    era = rng.choice(len(ERAS), size, p=ERA_SHARES)
+    electric = rng.random(size) < ELECTRIC_SHARES[era]
+    sqft = MEDIAN_SQFT[era] * rng.lognormal(0.0, 0.3, size)
+    return pa.record_batch({
+        "parcel_id": pa.array(np.arange(start, start + size, dtype=np.int64)),
+        "era": pa.DictionaryArray.from_arrays(pa.array(era.astype(np.int8)), _ERA_KEYS),
+        "heating_fuel": pa.DictionaryArray.from_arrays(pa.array(np.where(electric, 0, 1).astype(np.int8)), _FUEL_KEYS),
+        "floor_area_sqft": pa.array(np.clip(sqft, 600, 8000).astype(np.float32)),
+    })
+
+
+def write_synthetic_inventory(path, parcels=METRO_PARCELS, chunk_size=CHUNK_SIZE, seed=2023):
+    """
+    Write a synthetic inventory to Parquet, one row group per chunk.
+    """
+    schema = synthetic_chunk(0, 1, seed).schema
+    with pq.ParquetWriter(path, schema) as writer:
+        for start in range(0, parcels, chunk_size):
+            writer.write_batch(synthetic_chunk(start, min(chunk_size, parcels - start), seed), row_group_size=chunk_size)
+
+
+def _load_chunk(task):
+    if task[0] == "synthetic":
+        return synthetic_chunk(*task[1:])
+    _, path, row_group, offset, size = task
+    # Stream the row group in chunk-sized batches and keep only this task's
+    # rows, so a large row group is never read into memory whole.
+    batches, seen = [], 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=size, row_groups=[row_group], columns=INVENTORY_COLUMNS):
+        if seen + batch.num_rows > offset:
+            first = max(offset - seen, 0)
+            batches.append(batch.slice(first, offset + size - seen - first))
+        seen += batch.num_rows
+        if seen >= offset + size:
+            break
+    return pa.Table.from_batches(batches)
+
+
+def _archetype_index(column, keys, name):
+    positions = pc.index_in(column.cast(pa.string()) if pa.types.is_dictionary(column.type) else column, value_set=keys)
+    if positions.null_count:
+        raise ValueError(f"Unknown {name} in inventory; expected one of {keys.to_pylist()}.")
+    return positions.to_numpy()
+
+
+def parcel_keys(column):
+    """
+    Map parcel IDs to ``uint64`` keys for the adoption draw.
+
+    Integer IDs are used as they are. Any other ID is keyed by a BLAKE2b
+    digest of its string form, which is the same in every process and run.
+
+    Raises:
+        ValueError: If any parcel ID is missing.
+    """
+    if column.null_count:
+        raise ValueError("Inventory has parcels without a parcel_id.")
+    if pa.types.is_integer(column.type):
+        return column.to_numpy().astype(np.uint64)
+    ids = column.cast(pa.string()).to_pylist()
+    digests = b"".join(hashlib.blake2b(parcel_id.encode(), digest_size=8).digest() for parcel_id in ids)
+    return np.frombuffer(digests, dtype="<u8").astype(np.uint64)
+
+
+def _details_schema(inventory_schema):
+    """
+    Schema of the per-parcel results for an inventory with ``inventory_schema``.
+    """
+    savings = [pa.field(name, pa.float32()) for name in ("kwh_saved", "cost_saved", "co2_saved_t", "stress_kw_saved")]
+    return pa.schema([inventory_schema.field(name) for name in ("parcel_id", "era", "heating_fuel")]
+                     + [pa.field("adopted", pa.bool_())] + savings)
+
+
+def evaluate_chunk(task, package, adoption, seed=2023, details=False):
+    """
+    Evaluate a retrofit package on one chunk of the inventory.
+
+    Parcels adopt the package with probability ``adoption``, decided by a hash
+    of their ``parcel_id`` (see ``parcel_keys``) so that a parcel's choice
+    doesn't depend on how the inventory is chunked.
+
+    Args:
+        task (tuple): ``("synthetic", start, size, seed)`` or
+            ``("parquet", path, row_group, offset, size)``, from
+            ``inventory_tasks``.
+        package (str): Key in ``PACKAGES``.
+        adoption (float): Share of parcels (0-1) that adopt the package.
+        seed (int, optional): Salt of the adoption draw.
+        details (bool, optional): Also return per-parcel results.
+
+    Returns:
+        tuple: ``(totals, table)``. ``totals`` holds ``parcels``,
+        ``adopters`` and the reference-home equivalents (floor area /
+        ``REFERENCE_SQFT``) per archetype of all parcels (``homes``) and of
+        adopters (``adopted``); ``table`` is a ``pa.Table`` of per-parcel
+        savings, or None.
+    """
+    model = _get_model()
+    surrogate = model["surrogate"]
+    inventory = _load_chunk(task)
+    era = _archetype_index(inventory.column("era"), _ERA_KEYS, "era")
+    fuel = _archetype_index(inventory.column("heating_fuel"), _FUEL_KEYS, "heating_fuel")
+    archetype = era * len(HEATING_FUELS) + fuel
+    scale = inventory.column("floor_area_sqft").to_numpy().astype(np.float64) / REFERENCE_SQFT
+    adopted = hash_uniform(parcel_keys(inventory.column("parcel_id")), salt=seed) < (adoption if package != "none" else 0.0)
+
+    totals = {
+        "parcels": inventory.num_rows,
+        "adopters": int(adopted.sum()),
+        "homes": np.bincount(archetype, weights=scale, minlength=len(ARCHETYPES)),
+        "adopted": np.bincount(archetype[adopted], weights=scale[adopted], minlength=len(ARCHETYPES)),
+    }
+    if not details:
+        return totals, None
+
+    k = PACKAGES.index(package)
+    home = surrogate.per_home(package)
+    factor = np.where(adopted, scale, 0.0)
+    stress_saved = model["stress_kw"][:, 0] - model["stress_kw"][:, k]
+    return totals, pa.table({
+        "parcel_id": inventory.column("parcel_id"),
+        "era": inventory.column("era"),
+        "heating_fuel": inventory.column("heating_fuel"),
+        "adopted": pa.array(adopted),
+        "kwh_saved": pa.array((factor * (home["kwh"] - home["upgraded_kwh"])[archetype]).astype(np.float32)),
+        "cost_saved": pa.array((factor * (home["cost"] - home["upgraded_cost"])[archetype]).astype(np.float32)),
+        "co2_saved_t": pa.array((factor * (home["co2_t"] - home["upgraded_co2_t"])[archetype]).astype(np.float32)),
+        "stress_kw_saved": pa.array((factor * stress_saved[archetype]).astype(np.float32)),
+    }, schema=_details_schema(inventory.schema))
+
+
+def inventory_schema(inventory=None, seed=2023):
+    """
+    Arrow schema of an inventory (see ``inventory_tasks``).
+    """
+    if inventory is None:
+        return synthetic_chunk(0, 0, seed).schema
+    return pq.read_schema(inventory)
+
+
+def inventory_tasks(inventory=None, parcels=METRO_PARCELS, chunk_size=CHUNK_SIZE, seed=2023):
+    """
+    Split an inventory into chunk tasks for ``evaluate_chunk``.
+
+    Every task covers at most ``chunk_size`` parcels. A Parquet inventory is
+    split within its row groups, so a file written as one large row group
+    is still evaluated chunk by chunk.
+
+    Args:
+        inventory (str, optional): Parquet file with ``INVENTORY_COLUMNS``.
+            Defaults to a synthetic inventory of ``parcels`` parcels.
+        chunk_size (int, optional): Most parcels per task.
+    """
+    if inventory is None:
+        return [("synthetic", start, min(chunk_size, parcels - start), seed) for start in range(0, parcels, chunk_size)]
+    metadata = pq.ParquetFile(inventory).metadata
+    return [("parquet", inventory, i, offset, min(chunk_size, metadata.row_group(i).num_rows - offset))
+            for i in range(metadata.num_row_groups)
+            for offset in range(0, metadata.row_group(i).num_rows, chunk_size)]
+
+
+def summarize(totals, package):
+    """
+    Combine chunk totals into portfolio-wide savings.
+
+    Returns:
+        dict: ``parcels``, ``adopters``, ``gwh_saved``, ``cost_saved``
+        ($/yr), ``co2_saved_t``, ``peak_mw`` and ``peak_reduction_mw`` of the
+        portfolio's own demand, ``stress_reduction_mw`` (average reduction
+        in the grid's ``STRESS_HOURS``) and its split ``stress_by_measure``
+        and ``stress_by_era`` (MW).
+    """
+    model = _get_model()
+    surrogate = model["surrogate"]
+    k = PACKAGES.index(package)
+    homes = sum((t["homes"] for t in totals), np.zeros(len(ARCHETYPES)))
+    adopted = sum((t["adopted"] for t in totals), np.zeros(len(ARCHETYPES)))
+    home = surrogate.per_home(package)
+    electric = surrogate.hourly[:, :, 0]
+    hourly_mw = homes @ electric[:, 0] / 1000
+    upgraded_mw = hourly_mw + adopted @ (electric[:, k] - electric[:, 0]) / 1000
+    by_measure = adopted @ measure_contributions(model["stress_kw"], package) / 1000
+    by_archetype = adopted * (model["stress_kw"][:, 0] - model["stress_kw"][:, k]) / 1000
+    return {
+        "parcels": sum(t["parcels"] for t in totals),
+        "adopters": sum(t["adopters"] for t in totals),
+        "gwh_saved": float(adopted @ (home["kwh"] - home["upgraded_kwh"])) / 1e6,
+        "cost_saved": float(adopted @ (home["cost"] - home["upgraded_cost"])),
+        "co2_saved_t": float(adopted @ (home["co2_t"] - home["upgraded_co2_t"])),
+        "peak_mw": float(hourly_mw.max()),
+        "peak_reduction_mw": float(hourly_mw.max() - upgraded_mw.max()),
+        "stress_reduction_mw": float(by_archetype.sum()),
+        "stress_by_measure": dict(zip(MEASURES, by_measure.tolist())),
+        "stress_by_era": dict(zip(ERAS, by_archetype.reshape(len(ERAS), len(HEATING_FUELS)).sum(axis=1).tolist())),
+    }
+
+
+def evaluate_portfolio(package, adoption, inventory=None, parcels=METRO_PARCELS, chunk_size=CHUNK_SIZE,
+                       output=None, jobs=1, seed=2023):
+    """
+    Evaluate a retrofit package across a building inventory.
+
+    Args:
+        package (str): Key in ``PACKAGES``.
+        adoption (float): Share of parcels (0-1) that adopt the package.
+        inventory (str, optional): Parquet inventory; synthetic if omitted.
+        parcels (int, optional): Size of the synthetic inventory.
+        chunk_size (int, optional): Most parcels evaluated at once.
+        output (str, optional): Parquet path for per-parcel results.
+        jobs (int, optional): Worker processes; 1 evaluates in-process.
+        seed (int, optional): Seed of the synthetic inventory and adoption draw.
+
+    Returns:
+        dict: ``summarize`` output plus ``chunks`` and ``seconds``.
+    """
+    start = time.perf_counter()
+    tasks = inventory_tasks(inventory, parcels, chunk_size, seed)
+    details = output is not None
+    totals = []
+    writer = None
+    tmp = f"{output}.{os.getpid()}.tmp" if details else None
+
+    def collect(result):
+        nonlocal writer
+        chunk_totals, table = result
+        totals.append(chunk_totals)
+        if table is not None:
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+
+    try:
+        if jobs > 1:
+            # Keep a bounded number of chunks in flight and write them in
+            # inventory order, so memory stays flat however large the inventory.
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+                pending = []
+                for task in tasks:
+                    pending.append(pool.submit(evaluate_chunk, task, package, adoption, seed, details))
+                    if len(pending) >= 2 * jobs:
+                        collect(pending.pop(0).result())
+                for future in pending:
+                    collect(future.result())
+        else:
+            for task in tasks:
+                collect(evaluate_chunk(task, package, adoption, seed, details))
+        if details and writer is None:
+            # An empty inventory still gets a valid, empty results file.
+            writer = pq.ParquetWriter(tmp, _details_schema(inventory_schema(inventory, seed)))
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if details and os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if writer is not None:
+        writer.close()
+        os.replace(tmp, output)
+
+    summary = summarize(totals, package)
+    summary["chunks"] = len(tasks)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a retrofit package across a building inventory.")
+    parser.add_argument("--package", choices=PACKAGES, default="full_retrofit")
+    parser.add_argument("--adoption", type=float, default=0.45, help="share of parcels that adopt (0-1)")
+    parser.add_argument("--inventory", help="Parquet inventory with parcel_id, era, heating_fuel, floor_area_sqft "
+                                            "(default: synthetic metro inventory)")
+    parser.add_argument("--parcels", type=int, default=METRO_PARCELS, help="size of the synthetic inventory")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--output", help="write per-parcel results to this Parquet file")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (default: 1)")
+    args = parser.parse_args(argv)
+
+    summary = evaluate_portfolio(args.package, args.adoption, args.inventory, args.parcels, args.chunk_size,
+                                 args.output, args.jobs)
+    print(f"{summary['parcels']:,} parcels in {summary['chunks']} chunks, {summary['adopters']:,} adopting "
+          f"({summary['seconds']:.2f} s)")
+    print(f"  energy saved      {summary['gwh_saved']:,.0f} GWh/yr")
+    print(f"  bill savings      ${summary['cost_saved'] / 1e6:,.0f}M/yr")
+    print(f"  CO2 avoided       {summary['co2_saved_t'] / 1e3:,.0f} kt/yr")
+    print(f"  peak reduction    {summary['peak_reduction_mw']:,.0f} MW of {summary['peak_mw']:,.0f} MW")
+    print(f"  stress reduction  {summary['stress_reduction_mw']:,.0f} MW over the top {STRESS_HOURS} load hours")
+    for measure, mw in summary["stress_by_measure"].items():
+        print(f"    {MEASURES[measure]:<16}  {mw:,.0f} MW")
+    if args.output:
+        print(f"  wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Synthetic hourly weather and load profiles for metro Atlanta.
+
+These stand in for measured data until real utility and weather feeds are
+wired up. Every generator is deterministic for a given seed so that cached
+results and charts are reproducible between runs.
+"""
+import numpy as np
+
+HOURS_PER_YEAR = 8760
+
+# Days in each month of a non-leap year, and the day of year each month starts on.
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+MONTH_START_DAY = np.concatenate([[0], np.cumsum(DAYS_IN_MONTH)[:-1]])
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# EV charging windows (start and end hour of day): unmanaged charging on
+# arrival home, and managed charging shifted overnight.
+EV_WINDOWS = {"ev_evening": (17, 22), "ev_overnight": (0, 6)}
+
+
+def hour_of_day():
+    """
+    Return the hour of day (0-23) of every hour in the year.
+    """
+    return np.tile(np.arange(24), HOURS_PER_YEAR // 24)
+
+
+def day_of_year():
+    """
+    Return the day of year (0-364) of every hour in the year.
+    """
+    return np.repeat(np.arange(HOURS_PER_YEAR // 24), 24)
+
+
+def month_of_hour():
+    """
+    Return the month (1-12) of every hour in the year.
+    """
+    return np.repeat(np.repeat(np.arange(1, 13), DAYS_IN_MONTH), 24)
+
+
+def is_weekday(first_weekday=0):
+    """
+    Return a boolean mask of weekday hours, with day 0 falling on ``first_weekday``
+    (0 = Monday).
+    """
+    return ((day_of_year() + first_weekday) % 7) < 5
+
+
+def hourly_temperature(seed=2023):
+    """
+    Return a synthetic hourly dry-bulb temperature series for Atlanta in °C.
+
+    Combines a seasonal cycle (about 6 °C in January to 27 °C in July), a
+    diurnal swing peaking mid-afternoon and day-to-day weather noise.
+    """
+    rng = np.random.default_rng(seed)
+    doy = day_of_year()
+    hod = hour_of_day()
+    seasonal = 16.5 - 10.5 * np.cos(2 * np.pi * (doy - 20) / 365)
+    diurnal = 5.0 * np.sin(2 * np.pi * (hod - 9) / 24)
+
+    # AR(1) daily weather anomalies, interpolated to hours so fronts move smoothly.
+    daily = np.zeros(HOURS_PER_YEAR // 24 + 1)
+    shocks = rng.normal(0, 2.2, daily.size)
+    for i in range(1, daily.size):
+        daily[i] = 0.7 * daily[i - 1] + shocks[i]
+    anomaly = np.interp(np.arange(HOURS_PER_YEAR) / 24, np.arange(daily.size), daily)
+    return seasonal + diurnal + anomaly
+
+
+def system_load(peak_mw=33000.0, seed=2023):
+    """
+    Return a synthetic hourly balancing-authority load in MW.
+
+    Load is a weekday/weekend base shape plus cooling and heating components
+    driven by ``hourly_temperature``, scaled so the annual peak is ``peak_mw``.
+    """
+    temperature = hourly_temperature(seed)
+    hod = hour_of_day()
+    base = 0.75 + 0.12 * np.exp(-0.5 * ((hod - 8) / 2.5) ** 2) + 0.22 * np.exp(-0.5 * ((hod - 17) / 4.0) ** 2)
+    base = base * np.where(is_weekday(), 1.0, 0.92)
+    cooling = np.maximum(temperature - 18.0, 0.0) ** 1.25
+    heating = np.maximum(12.0 - temperature, 0.0)
+    load = base + 0.018 * cooling + 0.016 * heating
+    return load * (peak_mw / load.max())
+
+
+def solar_capacity_factor(seed=2023):
+    """
+    Return a synthetic hourly capacity factor (0-1) for fixed-tilt solar in Atlanta.
+
+    Uses a sine-shaped daylight curve whose length and height follow the
+    season, thinned by random daily cloud cover.
+    """
+    rng = np.random.default_rng(seed + 1)
+    doy = day_of_year()
+    hod = hour_of_day() + 0.5
+    season = -np.cos(2 * np.pi * (doy + 10) / 365)
+    half_day = 6.0 + 1.2 * season
+    sunrise = 13.0 - half_day
+    daylight = np.clip((hod - sunrise) / (2 * half_day), 0.0, 1.0)
+    shape = np.sin(np.pi * daylight) ** 1.5
+    clearness = np.repeat(rng.beta(5.0, 1.8, HOURS_PER_YEAR // 24), 24)
+    return 0.82 * shape * (0.9 + 0.1 * season) * clearness
@@ -0,0 +1,221 @@
+"""
+Surrogate model of residential retrofit impacts for Atlanta homes.
+
+A full building simulation is too slow to run on every slider move, so each
+archetype (construction era x heating fuel) is reduced to three hourly
+end-use shapes driven by ``profiles.hourly_temperature``: base load
+(lighting, appliances, hot water), heating demand and cooling demand.
+``RetrofitSurrogate`` turns them into hourly electricity and gas use for
+every measure package once, when it is built. Evaluating a package at an
+adoption rate is then a weighted sum of those precomputed arrays.
+
+Energy is reported in kWh, with gas converted at its heat content, so gas
+and electric homes are comparable. Archetype sizes, efficiencies and prices
+are rounded estimates for a typical 2,200 sq ft home, not measured data.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+from models.profiles import HOURS_PER_YEAR, hour_of_day, hourly_temperature, is_weekday
+
+ERAS = {
+    "pre_1980": {
+        "label": "Pre-1980",
+        "base_kwh": 8000.0,
+        "heating_kwh": 12500.0,
+        "cooling_kwh": 11000.0,
+        # Share of heating and cooling demand removed by the envelope upgrade.
+        "envelope_savings": 0.35,
+        "furnace_efficiency": 0.78,
+        # Efficiency of the existing electric heating and cooling equipment
+        # relative to a new heat pump.
+        "legacy_heating": 0.55,
+        "legacy_cooling": 0.6,
+    },
+    "1980_2020": {
+        "label": "1980–2020",
+        "base_kwh": 7500.0,
+        "heating_kwh": 8000.0,
+        "cooling_kwh": 8500.0,
+        "envelope_savings": 0.22,
+        "furnace_efficiency": 0.82,
+        "legacy_heating": 0.75,
+        "legacy_cooling": 0.8,
+    },
+    "2020_now": {
+        "label": "2020-now",
+        "base_kwh": 7000.0,
+        "heating_kwh": 5000.0,
+        "cooling_kwh": 6500.0,
+        "envelope_savings": 0.05,
+        "furnace_efficiency": 0.95,
+        "legacy_heating": 0.95,
+        "legacy_cooling": 0.95,
+    },
+}
+
+HEATING_FUELS = {"electric": "All-electric", "gas": "Gas-heated"}
+
+# Every (era, heating fuel) pair, in the order used by the model arrays.
+ARCHETYPES = [(era, fuel) for era in ERAS for fuel in HEATING_FUELS]
+
+MEASURES = {"envelope": "Envelope upgrade", "heat_pump": "Heat pump"}
+
+# Measure packages, indexed by a bitmask of MEASURES (envelope = 1, heat pump = 2).
+PACKAGES = ["none", "envelope", "heat_pump", "full_retrofit"]
+PACKAGE_LABELS = {
+    "none": "Current",
+    "envelope": "Envelope upgrade",
+    "heat_pump": "Heat pump",
+    "full_retrofit": "Full retrofit (envelope + heat pump)",
+}
+
+# Occupied housing units in Georgia and their split across ARCHETYPES.
+HOUSEHOLDS = 4_000_000
+STOCK_SHARES = np.array([0.16, 0.16, 0.32, 0.29, 0.04, 0.03])
+
+ELECTRIC_PRICE = 0.14       # $/kWh
+GAS_PRICE = 1.60 / 29.307   # $/kWh ($1.60/therm)
+ELECTRIC_CO2 = 0.39         # kg/kWh, Southern Company average
+GAS_CO2 = 0.181             # kg/kWh of gas burned
+
+# Balance points (°C) below which homes heat and above which they cool.
+HEATING_BALANCE = 16.0
+COOLING_BALANCE = 21.0
+
+# Bump when the way hourly use is computed changes, to invalidate results
+# derived from it (see dataset_version).
+MODEL_VERSION = 1
+
+# Annual output of one nuclear reactor in Georgia, for "equivalent to" figures.
+REACTOR_GWH = 8700.0
+
+
+def package_of(measures):
+    """
+    Return the package key for a collection of measure keys.
+    """
+    return PACKAGES[("envelope" in measures) + 2 * ("heat_pump" in measures)]
+
+
+def dataset_version():
+    """
+    Return a short fingerprint of everything that determines the model's
+    hourly energy use with the default temperature series.
+    """
+    inputs = [MODEL_VERSION, ERAS, HEATING_BALANCE, COOLING_BALANCE]
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def heat_pump_cop(temperature):
+    """
+    Return hourly heating and cooling COPs of a modern air-source heat pump.
+
+    Heating efficiency falls as it gets colder outside and cooling efficiency
+    falls as it gets hotter.
+    """
+    heating = np.clip(2.2 + 0.07 * temperature, 1.6, 4.2)
+    cooling = np.clip(6.0 - 0.1 * temperature, 2.5, 5.0)
+    return heating, cooling
+
+
+def _normalized(shape):
+    return shape / shape.sum()
+
+
+class RetrofitSurrogate:
+    """
+    Precomputed hourly energy use of every archetype under every package.
+
+    Args:
+        temperature (np.ndarray, optional): Hourly outdoor temperature in °C.
+            Defaults to ``hourly_temperature()``.
+    """
+
+    def __init__(self, temperature=None):
+        temperature = hourly_temperature() if temperature is None else np.asarray(temperature)
+        hod = hour_of_day()
+        base_shape = 0.7 + 0.35 * np.exp(-0.5 * ((hod - 7) / 1.5) ** 2) + 0.6 * np.exp(-0.5 * ((hod - 19) / 2.5) ** 2)
+        base_shape = _normalized(base_shape * np.where(is_weekday(), 1.0, 1.1))
+        heating_shape = _normalized(np.maximum(HEATING_BALANCE - temperature, 0.0))
+        cooling_shape = _normalized(np.maximum(temperature - COOLING_BALANCE, 0.0) ** 1.2)
+        hp_heating_cop, hp_cooling_cop = heat_pump_cop(temperature)
+
+        # (archetype, package, carrier, hour); carrier 0 is electricity, 1 is gas.
+        self.hourly = np.zeros((len(ARCHETYPES), len(PACKAGES), 2, HOURS_PER_YEAR), dtype=np.float32)
+        for a, (era, fuel) in enumerate(ARCHETYPES):
+            p = ERAS[era]
+            base = p["base_kwh"] * base_shape
+            for k, package in enumerate(PACKAGES):
+                envelope = 1 - p["envelope_savings"] if k & 1 else 1.0
+                heat_pump = bool(k & 2)
+                heating = envelope * p["heating_kwh"] * heating_shape
+                cooling = envelope * p["cooling_kwh"] * cooling_shape
+                cooling_cop = hp_cooling_cop if heat_pump else hp_cooling_cop * p["legacy_cooling"]
+                electric = base + cooling / cooling_cop
+                if heat_pump:
+                    electric = electric + heating / hp_heating_cop
+                elif fuel == "electric":
+                    electric = electric + heating / (hp_heating_cop * p["legacy_heating"])
+                else:
+                    self.hourly[a, k, 1] = heating / p["furnace_efficiency"]
+                self.hourly[a, k, 0] = electric
+
+        # Per-home annual kWh by (archetype, package, carrier).
+        self.annual = self.hourly.sum(axis=-1, dtype=np.float64)
+        self.annual_cost = self.annual @ np.array([ELECTRIC_PRICE, GAS_PRICE])
+        self.annual_co2 = self.annual @ np.array([ELECTRIC_CO2, GAS_CO2]) / 1000
+
+    def per_home(self, package):
+        """
+        Annual use, cost and emissions of one home of each archetype.
+
+        Args:
+            package (str): Key in ``PACKAGES``.
+
+        Returns:
+            dict: Arrays aligned to ``ARCHETYPES``: ``kwh`` and
+            ``upgraded_kwh`` (electricity plus gas), ``cost`` and
+            ``upgraded_cost`` ($/yr), ``co2_t`` and ``upgraded_co2_t``.
+        """
+        k = PACKAGES.index(package)
+        return {
+            "kwh": self.annual[:, 0].sum(axis=1),
+            "upgraded_kwh": self.annual[:, k].sum(axis=1),
+            "cost": self.annual_cost[:, 0],
+            "upgraded_cost": self.annual_cost[:, k],
+            "co2_t": self.annual_co2[:, 0],
+            "upgraded_co2_t": self.annual_co2[:, k],
+        }
+
+    def evaluate(self, package, adoption, households=HOUSEHOLDS, shares=STOCK_SHARES):
+        """
+        Evaluate a package adopted by a share of the housing stock.
+
+        Args:
+            package (str): Key in ``PACKAGES``.
+            adoption (float or np.ndarray): Share of homes (0-1) that adopt the
+                package, overall or per archetype.
+            households (int, optional): Number of homes in the stock.
+            shares (np.ndarray, optional): Share of the stock in each archetype.
+
+        Returns:
+            dict: Per-archetype stock totals ``kwh``, ``upgraded_kwh``,
+            ``cost``, ``upgraded_cost``, ``co2_t`` and ``upgraded_co2_t``;
+            the stock's hourly electricity demand in MW before and after
+            (``hourly_mw``, ``upgraded_hourly_mw``) and its ``peak_reduction_mw``.
+        """
+        k = PACKAGES.index(package)
+        homes = households * np.asarray(shares, dtype=np.float64)
+        adopters = homes * np.broadcast_to(adoption, homes.shape)
+        home = self.per_home(package)
+        result = {name: homes * home[name] for name in ("kwh", "cost", "co2_t")}
+        for name in ("kwh", "cost", "co2_t"):
+            result[f"upgraded_{name}"] = result[name] + adopters * (home[f"upgraded_{name}"] - home[name])
+        electric = self.hourly[:, :, 0]
+        result["hourly_mw"] = homes @ electric[:, 0] / 1000
+        result["upgraded_hourly_mw"] = result["hourly_mw"] + adopters @ (electric[:, k] - electric[:, 0]) / 1000
+        result["peak_reduction_mw"] = float(result["hourly_mw"].max() - result["upgraded_hourly_mw"].max())
+        return result
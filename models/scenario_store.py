@@ -0,0 +1,179 @@
+"""
+Precomputed results for the energy supply and demand scenarios.
+
+Each scenario is run once through the SOCO supply stack for all 8,760 hours
+and written to ``data/build/scenarios/<id>.<fingerprint>.arrow`` as an
+uncompressed Arrow IPC (Feather v2) file. Uncompressed Arrow can be memory
+mapped, so opening a scenario reads no column data until a chart touches it
+and all sessions share the same pages through the OS cache.
+
+The fingerprint covers the scenario definition, the generator fleet and
+``STORE_VERSION``, so editing any of them builds a fresh file instead of
+serving stale results. Opened tables are kept in an in-process dict, so
+switching scenarios on the page is a dictionary lookup.
+
+Usage:
+    python -m models.scenario_store    # prebuild every scenario
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from models.profiles import HOURS_PER_YEAR, month_of_hour, solar_capacity_factor, system_load
+from models.supply_stack import DATA_PATH as UNITS_PATH
+from models.supply_stack import SupplyStack
+
+BUILD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "build", "scenarios")
+
+# Bump when the way results are computed changes, to invalidate built files.
+STORE_VERSION = 1
+
+SCENARIOS = {
+    "baseline": {
+        "label": "Baseline Energy Mix",
+        "utility_solar_mw": 3000,
+        "btm_solar_mw": 500,
+        "efficiency_savings": 0.0,
+    },
+    "utility_renewables": {
+        "label": "Utility Investment in Renewables",
+        "utility_solar_mw": 9000,
+        "btm_solar_mw": 500,
+        "efficiency_savings": 0.0,
+    },
+    "der_grid_edge": {
+        "label": "DER investment at Grid Edge",
+        "utility_solar_mw": 3000,
+        "btm_solar_mw": 4500,
+        "efficiency_savings": 0.05,
+    },
+}
+
+# Every other column of a results table is generation by source, in MW.
+NON_SOURCE_COLUMNS = ("hour", "month", "load_mw", "price", "cost", "co2_t")
+
+_tables = {}
+_lock = threading.Lock()
+
+
+def run_scenario(scenario_id):
+    """
+    Dispatch one scenario for every hour of the year.
+
+    Rooftop solar and efficiency lower the load the grid sees, utility solar
+    is taken first, and the supply stack covers the remaining net load.
+
+    Args:
+        scenario_id (str): Key in ``SCENARIOS``.
+
+    Returns:
+        pa.Table: One row per hour with load, generation by source (MW),
+        price ($/MWh), cost ($/h) and CO2 (t/h).
+    """
+    scenario = SCENARIOS[scenario_id]
+    solar_cf = solar_capacity_factor()
+    load = system_load() * (1 - scenario["efficiency_savings"])
+    rooftop = np.minimum(scenario["btm_solar_mw"] * solar_cf, load)
+    grid_load = load - rooftop
+    utility_solar = np.minimum(scenario["utility_solar_mw"] * solar_cf, grid_load)
+    result = SupplyStack.from_csv().dispatch(grid_load - utility_solar)
+
+    columns = {
+        "hour": np.arange(HOURS_PER_YEAR, dtype=np.int16),
+        "month": month_of_hour().astype(np.int8),
+        "load_mw": load,
+        "Utility Solar": utility_solar,
+        "Rooftop Solar": rooftop,
+        **result["generation_by_fuel"],
+        "price": result["price"],
+        "cost": result["cost"],
+        "co2_t": result["co2_t"],
+    }
+    table = pa.table({
+        name: (values if name in ("hour", "month") else values.astype(np.float32))
+        for name, values in columns.items()
+    })
+    metadata = {"scenario_id": scenario_id, "scenario": json.dumps(scenario)}
+    return table.replace_schema_metadata(metadata)
+
+
+def scenario_path(scenario_id):
+    """
+    Return the store path of a scenario's results for the current inputs.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([STORE_VERSION, SCENARIOS[scenario_id]], sort_keys=True).encode())
+    with open(UNITS_PATH, "rb") as f:
+        digest.update(f.read())
+    return os.path.join(BUILD_DIR, f"{scenario_id}.{digest.hexdigest()[:12]}.arrow")
+
+
+def build_scenario(scenario_id):
+    """
+    Run a scenario and write it to the store, replacing older builds of it.
+
+    Returns:
+        str: Path of the written file.
+    """
+    path = scenario_path(scenario_id)
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    feather.write_feather(run_scenario(scenario_id), tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    for name in os.listdir(BUILD_DIR):
+        if name.startswith(f"{scenario_id}.") and name.endswith(".arrow") and name != os.path.basename(path):
+            os.remove(os.path.join(BUILD_DIR, name))
+    return path
+
+
+def load_scenario(scenario_id):
+    """
+    Return a scenario's results, building them on first use.
+
+    Args:
+        scenario_id (str): Key in ``SCENARIOS``.
+
+    Returns:
+        pa.Table: Memory-mapped results table (see ``run_scenario``).
+    """
+    table = _tables.get(scenario_id)
+    if table is not None:
+        return table
+    with _lock:
+        if scenario_id not in _tables:
+            path = scenario_path(scenario_id)
+            if not os.path.exists(path):
+                build_scenario(scenario_id)
+            _tables[scenario_id] = feather.read_table(path, memory_map=True)
+        return _tables[scenario_id]
+
+
+def annual_summary(scenario_id):
+    """
+    Summarize a scenario over the year.
+
+    Returns:
+        dict: ``energy_mix`` (source -> GWh), ``total_gwh``,
+        ``cost_per_mwh`` (average production cost of grid energy, $/MWh) and
+        ``co2_mt`` (million tonnes).
+    """
+    table = load_scenario(scenario_id)
+    sources = [name for name in table.column_names if name not in NON_SOURCE_COLUMNS]
+    energy_mix = {name: float(np.sum(table[name].to_numpy(), dtype=np.float64)) / 1000 for name in sources}
+    grid_mwh = sum(energy_mix.values()) * 1000 - energy_mix["Rooftop Solar"] * 1000
+    return {
+        "energy_mix": energy_mix,
+        "total_gwh": sum(energy_mix.values()),
+        "cost_per_mwh": float(np.sum(table["cost"].to_numpy(), dtype=np.float64)) / grid_mwh,
+        "co2_mt": float(np.sum(table["co2_t"].to_numpy(), dtype=np.float64)) / 1e6,
+    }
+
+
+if __name__ == "__main__":
+    for scenario_id in SCENARIOS:
+        print(f"  built  {build_scenario(scenario_id)}")
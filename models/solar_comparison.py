@@ -0,0 +1,120 @@
+"""
+Animated comparison of metro Atlanta load before and after residential
+solar+battery incentives.
+
+The figure is generated from ``data/solar_load_profiles.csv``: a typical-day
+(24 hour) load profile per month and sector, with the current load and the
+load after incentives. Each month becomes one animation frame carrying only
+the y values, so the whole figure is roughly 25 KB of JSON and the browser can
+play, pause and scrub through the year.
+"""
+import os
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from models.profiles import MONTH_NAMES
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "solar_load_profiles.csv")
+
+# Stacking order (bottom to top) and colors of the sectors.
+SECTOR_COLORS = {
+    "Industrial": "#8E9AAF",
+    "Commercial": "#1E88E5",
+    "Residential": "#F4A261",
+}
+
+PANELS = (
+    ("current_mw", "Current Energy Usage"),
+    ("post_incentive_mw", "Post Solar+Battery Incentives"),
+)
+
+
+def load_profiles(path=DATA_PATH):
+    """
+    Load the typical-day load profiles.
+
+    Returns:
+        pd.DataFrame: Columns month, hour, sector, current_mw, post_incentive_mw.
+    """
+    return pd.read_csv(path, dtype={"month": "int8", "hour": "int8", "sector": "category"})
+
+
+def _month_series(profiles, month):
+    """
+    Yield (column, sector, hours, loads) for one month, left panel first.
+    """
+    month_df = profiles[profiles["month"] == month]
+    for column, _ in PANELS:
+        for sector in SECTOR_COLORS:
+            sector_df = month_df[month_df["sector"] == sector].sort_values("hour")
+            yield column, sector, sector_df["hour"].tolist(), sector_df[column].round(1).tolist()
+
+
+def build_animation(profiles):
+    """
+    Build the side-by-side animated load comparison.
+
+    Args:
+        profiles (pd.DataFrame): Output of ``load_profiles``.
+
+    Returns:
+        go.Figure: A two-panel figure with one frame per month and
+        play/pause/slider controls.
+    """
+    months = sorted(profiles["month"].unique())
+    n_sectors = len(SECTOR_COLORS)
+
+    fig = make_subplots(rows=1, cols=2, shared_yaxes=True, horizontal_spacing=0.04,
+                        subplot_titles=[title for _, title in PANELS])
+    for i, (column, sector, hours, loads) in enumerate(_month_series(profiles, months[0])):
+        fig.add_trace(go.Scatter(
+            x=hours,
+            y=loads,
+            name=sector,
+            legendgroup=sector,
+            showlegend=i < n_sectors,
+            stackgroup=column,
+            line=dict(width=0.5, color=SECTOR_COLORS[sector]),
+            hovertemplate=f"{sector}: %{{y:,.0f}} MW<extra></extra>",
+        ), row=1, col=1 + i // n_sectors)
+
+    # Frames carry only the y values; Plotly merges them into the traces above.
+    fig.frames = [
+        go.Frame(data=[go.Scatter(y=loads) for _, _, _, loads in _month_series(profiles, month)],
+                 name=MONTH_NAMES[month - 1])
+        for month in months
+    ]
+
+    # Fix the y range to the busiest month so the curves don't jump between frames.
+    totals = profiles.groupby(["month", "hour"], observed=True)[[c for c, _ in PANELS]].sum()
+    y_max = float(totals.to_numpy().max()) * 1.05
+
+    frame_args = dict(frame=dict(duration=700, redraw=False), transition=dict(duration=300), mode="immediate")
+    fig.update_layout(
+        height=480,
+        margin=dict(t=60, b=40, l=60, r=20),
+        legend=dict(orientation="h", yanchor="bottom", y=1.08, xanchor="center", x=0.5),
+        updatemenus=[dict(
+            type="buttons",
+            direction="left",
+            x=0.0, y=-0.22, xanchor="left", yanchor="top",
+            buttons=[
+                dict(label="▶ Play", method="animate", args=[None, dict(frame_args, fromcurrent=True)]),
+                dict(label="❚❚ Pause", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ],
+        )],
+        sliders=[dict(
+            active=0,
+            x=0.15, y=-0.12, len=0.85,
+            currentvalue=dict(prefix="Month: "),
+            steps=[dict(label=frame.name, method="animate", args=[[frame.name], frame_args])
+                   for frame in fig.frames],
+        )],
+    )
+    fig.update_xaxes(title_text="Hour of day", range=[0, 23], dtick=3)
+    fig.update_yaxes(title_text="Load (MW)", range=[0, y_max], row=1, col=1)
+    fig.update_yaxes(range=[0, y_max], row=1, col=2)
+    return fig
@@ -0,0 +1,190 @@
+"""
+Rooftop solar plus battery dispatch for a year of hourly or 15-minute steps.
+
+The battery follows a simple rule: it charges from solar that the home
+doesn't use and discharges when the home's net load is above a threshold
+(0 kW for pure self-consumption, higher to only shave peaks). With the
+rule fixed, each step's desired change in stored energy is known up front,
+and the state of charge is that series summed and kept within
+``[0, capacity]``.
+
+``bounded_cumsum`` computes that bounded running sum without a Python
+loop over steps. While only one bound is active the bounded sum is a
+reflected cumulative sum (``np.cumsum`` plus a running max of the
+overshoot). The sequential part is limited to the moments the battery
+switches between hitting empty and hitting full, and each stretch in
+between is searched in fixed-size chunks. A year at 15-minute resolution
+dispatches in a few milliseconds.
+"""
+import numpy as np
+
+from models.profiles import HOURS_PER_YEAR, solar_capacity_factor
+from models.retrofit import ARCHETYPES, RetrofitSurrogate
+
+# Time resolutions offered, as steps per hour.
+RESOLUTIONS = {"Hourly": 1, "15-minute": 4}
+
+# Steps searched at a time for the next switch between bounds.
+CHUNK_STEPS = 2048
+
+# The home whose load is used by default: a 1980-2020 all-electric house.
+DEFAULT_ARCHETYPE = ("1980_2020", "electric")
+
+
+def to_resolution(hourly, steps_per_hour):
+    """
+    Resample an hourly power series to ``steps_per_hour`` steps per hour.
+
+    Values are interpolated linearly between hour midpoints and rescaled so
+    the year's energy is unchanged.
+    """
+    hourly = np.asarray(hourly, dtype=np.float64)
+    if steps_per_hour == 1:
+        return hourly
+    t = (np.arange(HOURS_PER_YEAR * steps_per_hour) + 0.5) / steps_per_hour
+    values = np.interp(t, np.arange(HOURS_PER_YEAR) + 0.5, hourly)
+    return values * (hourly.sum() / values.sum() * steps_per_hour if values.sum() > 0 else 1.0)
+
+
+def _reflect(level, deltas, bound, lower):
+    """
+    Running sum of ``deltas`` from ``level``, held on one side of ``bound``.
+    """
+    s = level + np.cumsum(deltas)
+    if lower:
+        return s + np.maximum.accumulate(np.maximum(bound - s, 0.0))
+    return s - np.maximum.accumulate(np.maximum(s - bound, 0.0))
+
+
+def bounded_cumsum(deltas, lower, upper, initial=0.0, chunk=CHUNK_STEPS):
+    """
+    Running sum of ``deltas`` clipped to ``[lower, upper]`` after every step.
+
+    Equivalent to ``x = clip(x + d, lower, upper)`` for each ``d`` in
+    ``deltas``, but vectorized between switches from one bound to the other.
+
+    Args:
+        deltas (np.ndarray): Change at each step.
+        lower (float): Lower bound.
+        upper (float): Upper bound (>= ``lower``).
+        initial (float, optional): Value before the first step.
+        chunk (int, optional): Steps searched at a time for the next switch.
+
+    Returns:
+        np.ndarray: Value after each step.
+    """
+    deltas = np.asarray(deltas, dtype=np.float64)
+    out = np.empty_like(deltas)
+    level = min(max(initial, lower), upper)
+    # The bound that can bind next: the lower one unless the value last hit the upper one.
+    at_lower = True
+    i = 0
+    while i < len(deltas):
+        window = deltas[i:i + chunk]
+        if at_lower:
+            x = _reflect(level, window, lower, lower=True)
+            crossed = np.flatnonzero(x > upper)
+        else:
+            x = _reflect(level, window, upper, lower=False)
+            crossed = np.flatnonzero(x < lower)
+        if crossed.size == 0:
+            out[i:i + len(window)] = x
+            level = x[-1]
+            i += len(window)
+            continue
+        j = crossed[0]
+        out[i:i + j] = x[:j]
+        level = upper if at_lower else lower
+        out[i + j] = level
+        at_lower = not at_lower
+        i += j + 1
+    return out
+
+
+def dispatch(load_kw, pv_kw, capacity_kwh, power_kw, charge_efficiency=0.95, discharge_efficiency=0.95,
+             threshold_kw=0.0, steps_per_hour=1, initial_soc=0.5):
+    """
+    Dispatch a battery alongside solar against a load.
+
+    Args:
+        load_kw (np.ndarray): Load at each step (kW).
+        pv_kw (np.ndarray): Solar output at each step (kW).
+        capacity_kwh (float): Usable battery energy.
+        power_kw (float): Battery charge and discharge power limit.
+        charge_efficiency (float, optional): Share of charging energy stored.
+        discharge_efficiency (float, optional): Share of stored energy delivered.
+        threshold_kw (float, optional): Net load the battery discharges down to.
+        steps_per_hour (int, optional): Time resolution of the series.
+        initial_soc (float, optional): State of charge at the start (0-1).
+
+    Returns:
+        dict: Series per step: ``grid_kw`` (import > 0, export < 0),
+        ``charge_kw`` and ``discharge_kw`` (at the battery terminals) and
+        ``soc_kwh`` (after the step).
+    """
+    dt = 1.0 / steps_per_hour
+    net = np.asarray(load_kw, dtype=np.float64) - np.asarray(pv_kw, dtype=np.float64)
+    if capacity_kwh <= 0 or power_kw <= 0:
+        zero = np.zeros_like(net)
+        return {"grid_kw": net, "charge_kw": zero, "discharge_kw": zero, "soc_kwh": zero}
+
+    wanted_charge = np.minimum(np.maximum(-net, 0.0), power_kw)
+    wanted_discharge = np.minimum(np.maximum(net - threshold_kw, 0.0), power_kw)
+    stored = wanted_charge * charge_efficiency * dt - wanted_discharge / discharge_efficiency * dt
+    soc = bounded_cumsum(stored, 0.0, capacity_kwh, initial_soc * capacity_kwh)
+
+    change = np.diff(soc, prepend=initial_soc * capacity_kwh)
+    charge = np.maximum(change, 0.0) / charge_efficiency / dt
+    discharge = np.maximum(-change, 0.0) * discharge_efficiency / dt
+    return {"grid_kw": net + charge - discharge, "charge_kw": charge, "discharge_kw": discharge, "soc_kwh": soc}
+
+
+def summarize(load_kw, pv_kw, result, capacity_kwh, steps_per_hour=1):
+    """
+    Annual energy and peak figures for a dispatch result.
+
+    Returns:
+        dict: ``load_kwh``, ``pv_kwh``, ``import_kwh``, ``export_kwh``,
+        ``self_consumption`` (share of solar used on site, directly or via
+        the battery), ``self_sufficiency`` (share of load not imported),
+        ``peak_load_kw``, ``peak_import_kw``, ``peak_shaving_kw`` and
+        ``cycles`` (full equivalent discharge cycles per year).
+    """
+    dt = 1.0 / steps_per_hour
+    grid = result["grid_kw"]
+    load_kwh = float(np.sum(load_kw)) * dt
+    pv_kwh = float(np.sum(pv_kw)) * dt
+    import_kwh = float(np.maximum(grid, 0.0).sum()) * dt
+    export_kwh = float(np.maximum(-grid, 0.0).sum()) * dt
+    peak_load = float(np.max(load_kw))
+    peak_import = float(grid.max())
+    return {
+        "load_kwh": load_kwh,
+        "pv_kwh": pv_kwh,
+        "import_kwh": import_kwh,
+        "export_kwh": export_kwh,
+        "self_consumption": (pv_kwh - export_kwh) / pv_kwh if pv_kwh > 0 else 0.0,
+        "self_sufficiency": 1 - import_kwh / load_kwh,
+        "peak_load_kw": peak_load,
+        "peak_import_kw": peak_import,
+        "peak_shaving_kw": peak_load - peak_import,
+        "cycles": float(result["discharge_kw"].sum()) * dt / capacity_kwh if capacity_kwh > 0 else 0.0,
+    }
+
+
+def home_profiles(steps_per_hour=1, archetype=DEFAULT_ARCHETYPE, surrogate=None):
+    """
+    Return a home's load and the output of 1 kW of rooftop solar.
+
+    Args:
+        steps_per_hour (int, optional): Time resolution.
+        archetype (tuple, optional): ``(era, heating fuel)`` from
+            ``retrofit.ARCHETYPES``.
+        surrogate (RetrofitSurrogate, optional): Model to take the load from.
+
+    Returns:
+        tuple: ``(load_kw, pv_kw_per_kw)`` at the requested resolution.
+    """
+    surrogate = RetrofitSurrogate() if surrogate is None else surrogate
+    load = surrogate.hourly[ARCHETYPES.index(archetype), 0, 0]
+    return to_resolution(load, steps_per_hour), to_resolution(solar_capacity_factor(), steps_per_hour)
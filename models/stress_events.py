@@ -0,0 +1,185 @@
+"""
+Replaying grid stress events with a fleet of home batteries.
+
+An event is an hourly series of system load, available generating
+capacity and wholesale price. When load exceeds available capacity, the
+difference is shed as rolling outages. A battery fleet is dispatched with
+the same rule as a single home in ``models.solar_storage``: capacity left
+after a reserve margin plays the part of solar. Batteries charge when there
+is spare capacity and discharge when the system is tight, within their
+power and energy limits.
+
+Events are synthetic reconstructions with the rough shape of the real ones;
+``read_event_csv`` loads a measured series with the same columns instead.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from models.solar_storage import dispatch
+
+# Per-home battery (a typical wall-mounted unit).
+HOME_BATTERY_KWH = 13.5
+HOME_BATTERY_KW = 5.0
+ROUND_TRIP_EFFICIENCY = 0.9
+
+# Batteries discharge once spare capacity falls below this share of load.
+RESERVE_MARGIN = 0.03
+
+# Wholesale price while load is being shed ($/MWh, ERCOT's 2021 cap).
+SHED_PRICE = 9000.0
+
+EVENT_COLUMNS = ["load_mw", "available_mw", "price"]
+
+_events = {}
+_lock = threading.Lock()
+
+
+def _diurnal(hours):
+    hod = hours % 24
+    return 0.9 + 0.08 * np.exp(-0.5 * ((hod - 8) / 2.0) ** 2) + 0.1 * np.exp(-0.5 * ((hod - 19) / 2.5) ** 2)
+
+
+def _ramp(hours, start, end, before, after):
+    """
+    Linear change from ``before`` to ``after`` between hours ``start`` and ``end``.
+    """
+    return before + (after - before) * np.clip((hours - start) / max(end - start, 1), 0.0, 1.0)
+
+
+def _price(load, available):
+    # Scarcity pricing: cheap with plenty of spare capacity, rising steeply as
+    # it runs out and pinned to the cap while load is shed.
+    spare = (available - load) / load
+    return np.where(spare < 0, SHED_PRICE, np.minimum(30.0 + 2400.0 * np.exp(-spare / 0.04), SHED_PRICE))
+
+
+def winter_storm_uri():
+    """
+    A week shaped like ERCOT during Winter Storm Uri (February 13-19, 2021).
+
+    Demand climbs toward 75 GW in the cold while frozen plants take about a
+    third of capacity offline for three days.
+    """
+    hours = np.arange(7 * 24)
+    cold = _ramp(hours, 24, 48, 0.0, 1.0) - _ramp(hours, 96, 132, 0.0, 1.0)
+    load = (58000.0 + 14000.0 * cold) * _diurnal(hours)
+    available = 74000.0 - _ramp(hours, 48, 54, 0.0, 26000.0) + _ramp(hours, 100, 140, 0.0, 22000.0)
+    return load, available
+
+
+def winter_storm_elliott():
+    """
+    Four days shaped like the Southeast during Winter Storm Elliott
+    (December 23-26, 2022).
+
+    A sudden freeze pushes morning demand past the available fleet for a few
+    hours on two mornings.
+    """
+    hours = np.arange(4 * 24)
+    cold = _ramp(hours, 0, 18, 0.0, 1.0) - _ramp(hours, 60, 90, 0.0, 1.0)
+    load = (27000.0 + 7000.0 * cold) * _diurnal(hours)
+    available = 36500.0 - _ramp(hours, 20, 26, 0.0, 3800.0) + _ramp(hours, 56, 70, 0.0, 3800.0)
+    return load, available
+
+
+def summer_heat_wave():
+    """
+    Five days of an Atlanta heat wave with a large unit tripping offline on
+    the hottest afternoon.
+    """
+    hours = np.arange(5 * 24)
+    hod = hours % 24
+    heat = np.sin(np.pi * np.clip(hours / (5 * 24), 0, 1)) * np.exp(-0.5 * ((hod - 17) / 3.5) ** 2)
+    load = 26000.0 * _diurnal(hours) + 9000.0 * heat
+    available = 36000.0 - 2400.0 * ((hours >= 60) & (hours < 72))
+    return load, available
+
+
+EVENTS = {
+    "uri_2021": {"label": "Winter Storm Uri (Texas, Feb 2021)", "series": winter_storm_uri},
+    "elliott_2022": {"label": "Winter Storm Elliott (Southeast, Dec 2022)", "series": winter_storm_elliott},
+    "heat_wave": {"label": "Atlanta summer heat wave", "series": summer_heat_wave},
+}
+
+
+def read_event_csv(path):
+    """
+    Read a measured event from a CSV with hourly ``load_mw`` and
+    ``available_mw`` columns and an optional ``price`` column ($/MWh).
+
+    Returns:
+        pd.DataFrame: ``EVENT_COLUMNS``, one row per hour.
+    """
+    frame = pd.read_csv(path)
+    if "price" not in frame:
+        frame["price"] = _price(frame["load_mw"].to_numpy(), frame["available_mw"].to_numpy())
+    return frame[EVENT_COLUMNS].astype(np.float64)
+
+
+def load_event(event_id):
+    """
+    Return one of ``EVENTS`` as an hourly frame, generating it on first use.
+
+    Returns:
+        pd.DataFrame: ``EVENT_COLUMNS``, one row per hour.
+    """
+    event = _events.get(event_id)
+    if event is not None:
+        return event
+    with _lock:
+        if event_id not in _events:
+            load, available = EVENTS[event_id]["series"]()
+            _events[event_id] = pd.DataFrame({"load_mw": load, "available_mw": available, "price": _price(load, available)})
+        return _events[event_id]
+
+
+def replay(event, homes, reserve_margin=RESERVE_MARGIN):
+    """
+    Replay an event with a fleet of home batteries.
+
+    The fleet starts full and is dispatched as one large battery.
+
+    Args:
+        event (str or pd.DataFrame): Key in ``EVENTS`` or a frame from
+            ``read_event_csv``.
+        homes (int): Homes with a battery.
+        reserve_margin (float, optional): Spare capacity, as a share of
+            load, below which the fleet discharges.
+
+    Returns:
+        dict: Hourly ``load_mw``, ``available_mw``, ``price``,
+        ``fleet_mw`` (discharge > 0, charge < 0), ``fleet_mwh`` (stored),
+        ``shed_mw`` (without batteries) and ``shed_with_fleet_mw``; totals
+        ``shed_mwh``, ``shed_with_fleet_mwh``, ``outage_hours``,
+        ``outage_hours_with_fleet`` and ``value`` (the fleet's energy
+        sales less its charging cost at the event's prices, $).
+    """
+    frame = load_event(event) if isinstance(event, str) else event
+    load = frame["load_mw"].to_numpy()
+    available = frame["available_mw"].to_numpy()
+    price = frame["price"].to_numpy()
+    capacity_mwh = homes * HOME_BATTERY_KWH / 1000
+    power_mw = homes * HOME_BATTERY_KW / 1000
+    efficiency = ROUND_TRIP_EFFICIENCY ** 0.5
+
+    result = dispatch(load, available - reserve_margin * load, capacity_mwh, power_mw, efficiency, efficiency,
+                      initial_soc=1.0)
+    fleet = result["discharge_kw"] - result["charge_kw"]
+    shed = np.maximum(load - available, 0.0)
+    shed_with_fleet = np.maximum(load - fleet - available, 0.0)
+    return {
+        "load_mw": load,
+        "available_mw": available,
+        "price": price,
+        "fleet_mw": fleet,
+        "fleet_mwh": result["soc_kwh"],
+        "shed_mw": shed,
+        "shed_with_fleet_mw": shed_with_fleet,
+        "shed_mwh": float(shed.sum()),
+        "shed_with_fleet_mwh": float(shed_with_fleet.sum()),
+        "outage_hours": int((shed > 0).sum()),
+        "outage_hours_with_fleet": int((shed_with_fleet > 0).sum()),
+        "value": float(np.dot(np.maximum(fleet, 0.0), price) - np.dot(np.maximum(-fleet, 0.0), price)),
+    }
@@ -0,0 +1,274 @@
+"""
+Residential electricity tariffs compiled to hourly rate vectors.
+
+Each tariff in ``TARIFFS`` is compiled once into an 8,760-hour vector of
+energy rates ($/kWh), a mask of the hours its demand charge applies to and
+its fixed monthly charge. A year's energy charge is then a dot product of a
+load profile with the rate vector, and a batch of profiles against every
+tariff is a single matrix product. Demand charges take the monthly maximum
+of the masked load with ``np.maximum.reduceat`` over month boundaries.
+
+Rates are rounded illustrations in the style of Georgia Power's residential
+plans, not the filed tariffs. They are set so the average synthetic customer
+pays about the same under each, which makes the "who pays more" comparison
+about load shape rather than price level.
+"""
+import threading
+
+import numpy as np
+
+from models.profiles import (EV_WINDOWS, HOURS_PER_YEAR, MONTH_START_DAY, day_of_year, hour_of_day, is_weekday,
+                             month_of_hour, solar_capacity_factor, system_load)
+from models.retrofit import ARCHETYPES, PACKAGES, RetrofitSurrogate
+
+# First hour of each month, for per-month reductions.
+MONTH_START_HOUR = MONTH_START_DAY * 24
+
+# Credit for solar exported to the grid ($/kWh), at roughly avoided cost.
+EXPORT_CREDIT = 0.04
+
+SUMMER_MONTHS = (6, 7, 8, 9)
+
+TARIFFS = {
+    "flat": {
+        "label": "Flat rate",
+        "fixed": 14.0,
+        "energy": 0.145,
+    },
+    "tou": {
+        "label": "Time of use",
+        "fixed": 14.0,
+        "energy": 0.13,
+        # Weekdays 2-7 pm, June to September.
+        "on_peak": 0.30,
+        "on_peak_hours": (14, 19),
+    },
+    "demand": {
+        "label": "Time of use + demand charge",
+        "fixed": 14.0,
+        "energy": 0.125,
+        "on_peak": 0.18,
+        "on_peak_hours": (14, 19),
+        # $/kW of the highest on-peak hour each month.
+        "demand_rate": 9.0,
+    },
+    "critical_peak": {
+        "label": "Critical peak pricing",
+        "fixed": 14.0,
+        "energy": 0.13,
+        # 2-7 pm on the days of highest system load.
+        "critical": 0.75,
+        "critical_days": 15,
+        "on_peak_hours": (14, 19),
+    },
+}
+
+# Customer groups compared in "who pays more" views.
+CUSTOMER_GROUPS = {
+    "gas_heated": "Gas-heated homes",
+    "all_electric": "All-electric homes",
+    "ev_evening": "EV, charged in the evening",
+    "ev_overnight": "EV, charged overnight",
+    "solar": "Rooftop solar",
+}
+
+_compiled = None
+_basis = None
+_lock = threading.Lock()
+
+
+def _on_peak_hours(spec):
+    start, end = spec["on_peak_hours"]
+    hod = hour_of_day()
+    return (hod >= start) & (hod < end)
+
+
+def critical_days(count, load=None):
+    """
+    Return the ``count`` days of the year with the highest system load peak.
+    """
+    load = system_load() if load is None else load
+    return np.sort(np.argsort(load.reshape(-1, 24).max(axis=1))[-count:])
+
+
+def compile_tariff(spec):
+    """
+    Compile a tariff definition into hourly vectors.
+
+    Args:
+        spec (dict): Entry of ``TARIFFS``.
+
+    Returns:
+        dict: ``rates`` (8,760 $/kWh), ``demand_mask`` (8,760 bool),
+        ``demand_rate`` ($/kW-month) and ``fixed`` ($/month).
+    """
+    rates = np.full(HOURS_PER_YEAR, spec["energy"])
+    peak_hours = np.zeros(HOURS_PER_YEAR, dtype=bool)
+    if "on_peak" in spec:
+        peak_hours = _on_peak_hours(spec) & is_weekday() & np.isin(month_of_hour(), SUMMER_MONTHS)
+        rates[peak_hours] = spec["on_peak"]
+    if "critical" in spec:
+        peak_hours = _on_peak_hours(spec) & np.isin(day_of_year(), critical_days(spec["critical_days"]))
+        rates[peak_hours] = spec["critical"]
+    return {
+        "rates": rates,
+        "demand_mask": peak_hours if spec.get("demand_rate") else np.zeros(HOURS_PER_YEAR, dtype=bool),
+        "demand_rate": spec.get("demand_rate", 0.0),
+        "fixed": spec["fixed"],
+    }
+
+
+def compiled_tariffs():
+    """
+    Return every tariff in ``TARIFFS`` compiled and stacked, building them on
+    first use.
+
+    Returns:
+        dict: ``ids`` (list), ``rates`` ``(n_tariffs, 8760)``,
+        ``demand_mask`` ``(n_tariffs, 8760)``, ``demand_rate`` and ``fixed``
+        ``(n_tariffs,)``.
+    """
+    global _compiled
+    if _compiled is None:
+        with _lock:
+            if _compiled is None:
+                compiled = [compile_tariff(spec) for spec in TARIFFS.values()]
+                _compiled = {
+                    "ids": list(TARIFFS),
+                    **{key: np.array([c[key] for c in compiled]) for key in ("rates", "demand_mask", "demand_rate", "fixed")},
+                }
+    return _compiled
+
+
+def bills(profiles, tariffs=None):
+    """
+    Annual bills of a batch of hourly load profiles under every tariff.
+
+    Args:
+        profiles (np.ndarray): ``(n, 8760)`` net load in kWh per hour;
+            negative hours are exports credited at ``EXPORT_CREDIT``.
+        tariffs (dict, optional): Output of ``compiled_tariffs``.
+
+    Returns:
+        dict: ``(n, n_tariffs)`` arrays ``energy``, ``demand``, ``fixed``
+        and ``total`` ($/yr).
+    """
+    tariffs = compiled_tariffs() if tariffs is None else tariffs
+    profiles = np.atleast_2d(profiles)
+    imports = np.maximum(profiles, 0.0)
+    energy = imports @ tariffs["rates"].T - EXPORT_CREDIT * (imports - profiles).sum(axis=1, keepdims=True)
+    demand = np.zeros_like(energy)
+    for t in np.flatnonzero(tariffs["demand_rate"]):
+        masked = np.where(tariffs["demand_mask"][t], imports, 0.0)
+        demand[:, t] = tariffs["demand_rate"][t] * np.maximum.reduceat(masked, MONTH_START_HOUR, axis=1).sum(axis=1)
+    fixed = np.broadcast_to(12 * tariffs["fixed"], energy.shape)
+    return {"energy": energy, "demand": demand, "fixed": fixed, "total": energy + demand + fixed}
+
+
+def monthly_bills(profile, tariffs=None):
+    """
+    Monthly bills of one profile under every tariff.
+
+    Returns:
+        np.ndarray: ``(n_tariffs, 12)`` $/month.
+    """
+    tariffs = compiled_tariffs() if tariffs is None else tariffs
+    imports = np.maximum(profile, 0.0)
+    energy = np.add.reduceat(imports * tariffs["rates"] - EXPORT_CREDIT * (imports - profile), MONTH_START_HOUR, axis=1)
+    demand = tariffs["demand_rate"][:, None] * np.maximum.reduceat(
+        np.where(tariffs["demand_mask"], imports, 0.0), MONTH_START_HOUR, axis=1)
+    return energy + demand + tariffs["fixed"][:, None]
+
+
+def _profile_basis():
+    """
+    Return the hourly shapes customer profiles are built from: every
+    archetype and package's electricity use, 1 kWh/day of EV charging in
+    each window and the output of 1 kW of solar (as negative load).
+    """
+    global _basis
+    if _basis is None:
+        with _lock:
+            if _basis is None:
+                homes = RetrofitSurrogate().hourly[:, :, 0].reshape(-1, HOURS_PER_YEAR)
+                hod = hour_of_day()
+                ev = [((hod >= start) & (hod < end)) / (end - start) for start, end in EV_WINDOWS.values()]
+                _basis = np.vstack([homes, *ev, -solar_capacity_factor()]).astype(np.float32)
+    return _basis
+
+
+def customer_population(n, seed=2023):
+    """
+    Draw a synthetic population of residential customers.
+
+    Each customer is an archetype home (mostly without upgrades) scaled for
+    size, with a 30% chance of an EV and a 15% chance of rooftop solar.
+
+    Returns:
+        tuple: ``(weights, groups)``; ``weights`` ``(n, n_basis)`` builds the
+        profiles as ``weights @ basis`` and ``groups`` maps each key of
+        ``CUSTOMER_GROUPS`` to a boolean membership mask.
+    """
+    rng = np.random.default_rng(seed)
+    n_homes = len(ARCHETYPES) * len(PACKAGES)
+    archetype = rng.integers(len(ARCHETYPES), size=n)
+    package = rng.choice(len(PACKAGES), size=n, p=[0.7, 0.1, 0.15, 0.05])
+    ev = rng.random(n) < 0.3
+    overnight = ev & (rng.random(n) < 0.4)
+    solar = rng.random(n) < 0.15
+
+    weights = np.zeros((n, n_homes + len(EV_WINDOWS) + 1), dtype=np.float32)
+    rows = np.arange(n)
+    weights[rows, archetype * len(PACKAGES) + package] = rng.lognormal(0.0, 0.25, n)
+    weights[rows, n_homes + overnight] = np.where(ev, rng.uniform(6.0, 14.0, n), 0.0)
+    weights[:, -1] = np.where(solar, rng.uniform(4.0, 10.0, n), 0.0)
+    fuel = np.array([f for _, f in ARCHETYPES])[archetype]
+    groups = {
+        "gas_heated": fuel == "gas",
+        "all_electric": fuel == "electric",
+        "ev_evening": ev & ~overnight,
+        "ev_overnight": overnight,
+        "solar": solar,
+    }
+    return weights, groups
+
+
+def population_bills(n, seed=2023, chunk=1000):
+    """
+    Annual bills of a synthetic customer population under every tariff.
+
+    Profiles are built and billed ``chunk`` customers at a time, so memory
+    stays bounded for large populations.
+
+    Returns:
+        tuple: ``(totals, groups)``; ``totals`` is ``(n, n_tariffs)`` $/yr and
+        ``groups`` is from ``customer_population``.
+    """
+    weights, groups = customer_population(n, seed)
+    basis = _profile_basis()
+    tariffs = compiled_tariffs()
+    totals = np.empty((n, len(tariffs["ids"])))
+    for start in range(0, n, chunk):
+        totals[start:start + chunk] = bills(weights[start:start + chunk] @ basis, tariffs)["total"]
+    return totals, groups
+
+
+def customer_profile(archetype, package="none", ev_kwh_per_day=0.0, ev_window="ev_evening", solar_kw=0.0):
+    """
+    Build one customer's hourly net load from the profile basis.
+
+    Args:
+        archetype (tuple): ``(era, heating fuel)`` from ``retrofit.ARCHETYPES``.
+        package (str, optional): Key in ``retrofit.PACKAGES``.
+        ev_kwh_per_day (float, optional): EV charging energy per day.
+        ev_window (str, optional): Key in ``EV_WINDOWS``.
+        solar_kw (float, optional): Rooftop solar size.
+
+    Returns:
+        np.ndarray: 8,760 kWh per hour (negative when exporting).
+    """
+    basis = _profile_basis()
+    n_homes = len(ARCHETYPES) * len(PACKAGES)
+    home = ARCHETYPES.index(archetype) * len(PACKAGES) + PACKAGES.index(package)
+    ev = n_homes + list(EV_WINDOWS).index(ev_window)
+    return basis[home].astype(np.float64) + ev_kwh_per_day * basis[ev] + solar_kw * basis[-1]
@@ -0,0 +1,176 @@
+"""
+Registry of weighting layers for dasymetric redistribution.
+
+Each layer scores every res-10 child; what the downscaling actually needs
+is each child's share of its parent, which only changes when the layer or
+the grid does. Shares are therefore computed once per layer, stored as a
+float32 array aligned to the sorted child index of the grid in
+``data/build/weights/<layer>.<fingerprint>.npy`` and memory-mapped on load.
+Switching layers is then a single vectorized multiply of the per-child
+parent values by the stored shares.
+
+float32 shares sum to 1 within about 1e-7 per parent, so totals redistributed
+with them are conserved to ``FLOAT32_RTOL`` rather than to float64 precision.
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from models import dasymetric
+
+BUILD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "build", "weights")
+
+# Bump when a layer's definition changes, to invalidate stored shares.
+WEIGHTS_VERSION = 1
+
+# Relative conservation tolerance for values redistributed with float32 shares.
+FLOAT32_RTOL = 1e-5
+
+_DOWNTOWN = (33.749, -84.388)
+
+
+def _distance_km(parents, center):
+    lat, lng = dasymetric.cell_centers(parents).T
+    return np.hypot((lat - center[0]) * 111.0, (lng - center[1]) * 92.5)
+
+
+def population_weights(parents, children):
+    """
+    Synthetic residential population per child.
+
+    Peaks in the inner-ring neighborhoods rather than downtown, with empty
+    cells for commercial districts, parks and water.
+    """
+    km = _distance_km(parents, _DOWNTOWN)
+    parent_density = 30.0 * np.exp(-0.5 * ((km - 9.0) / 7.0) ** 2) + 4.0 * np.exp(-km / 30.0)
+    noise = dasymetric.hash_uniform(children, salt=11)
+    occupied = dasymetric.hash_uniform(children, salt=12) > 0.25
+    return parent_density[:, None] * (0.2 + 1.6 * noise) * occupied
+
+
+def land_use_weights(parents, children):
+    """
+    Synthetic developed-land share per child (0-1).
+
+    Developed land is near-total in the core and thins out toward the
+    suburbs, where many children are undeveloped.
+    """
+    km = _distance_km(parents, _DOWNTOWN)
+    developed = np.clip(1.1 - km / 35.0, 0.15, 1.0)
+    return (dasymetric.hash_uniform(children, salt=21) < developed[:, None]).astype(np.float64)
+
+
+def uniform_weights(parents, children):
+    """
+    Equal weight for every child (plain areal interpolation).
+    """
+    return np.ones(children.shape)
+
+
+LAYERS = {
+    "buildings": {
+        "label": "Building counts",
+        "description": "Building footprints per cell; follows where energy is used.",
+        "weights": dasymetric.synthetic_building_counts,
+    },
+    "population": {
+        "label": "Population",
+        "description": "Residents per cell; emphasises residential neighborhoods.",
+        "weights": population_weights,
+    },
+    "land_use": {
+        "label": "Developed land",
+        "description": "Whether a cell is developed; spreads values evenly over built-up land.",
+        "weights": land_use_weights,
+    },
+    "uniform": {
+        "label": "Uniform (area only)",
+        "description": "No ancillary data; every child gets the same share.",
+        "weights": uniform_weights,
+    },
+}
+
+_shares = {}
+_lock = threading.Lock()
+
+
+def child_index(parents):
+    """
+    Return the sorted ``uint64`` children of ``parents`` and, for each child,
+    the position of its parent in ``parents``.
+
+    Args:
+        parents (np.ndarray): Sorted ``uint64`` res-8 parents.
+
+    Returns:
+        tuple: ``(children, parent_positions)``.
+    """
+    children, valid = dasymetric.cell_to_children(parents)
+    # Parents are sorted and each parent's children are a contiguous,
+    # increasing run, so the flattened children are already sorted.
+    parent_positions = np.repeat(np.arange(len(parents)), valid.sum(axis=1))
+    return children[valid], parent_positions
+
+
+def _shares_path(layer, parents):
+    digest = hashlib.sha256()
+    digest.update(f"{layer}:{WEIGHTS_VERSION}".encode())
+    digest.update(np.ascontiguousarray(parents, dtype=np.uint64).tobytes())
+    return os.path.join(BUILD_DIR, f"{layer}.{digest.hexdigest()[:12]}.npy")
+
+
+def compute_shares(layer, parents):
+    """
+    Compute each child's float32 share of its parent for a weighting layer.
+
+    Returns:
+        np.ndarray: Shares aligned to ``child_index(parents)[0]``.
+    """
+    children, valid = dasymetric.cell_to_children(parents)
+    raw = LAYERS[layer]["weights"](parents, children)
+    return dasymetric.normalize_weights(raw, valid)[valid].astype(np.float32)
+
+
+def load_shares(layer, parents):
+    """
+    Return a layer's shares for a grid, computing and storing them on first use.
+
+    Args:
+        layer (str): Key in ``LAYERS``.
+        parents (np.ndarray): Sorted ``uint64`` res-8 parents.
+
+    Returns:
+        np.ndarray: Read-only, memory-mapped float32 shares aligned to
+        ``child_index(parents)[0]``.
+    """
+    path = _shares_path(layer, parents)
+    shares = _shares.get(path)
+    if shares is not None:
+        return shares
+    with _lock:
+        if path not in _shares:
+            if not os.path.exists(path):
+                os.makedirs(BUILD_DIR, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.save(f, compute_shares(layer, parents))
+                os.replace(tmp, path)
+            _shares[path] = np.load(path, mmap_mode="r")
+        return _shares[path]
+
+
+def redistribute(child_parent_values, shares):
+    """
+    Redistribute parent values with precomputed shares.
+
+    Args:
+        child_parent_values (np.ndarray): For each child, its parent's value
+            (``parent_values[parent_positions]``).
+        shares (np.ndarray): Output of ``load_shares``.
+
+    Returns:
+        np.ndarray: float64 child values.
+    """
+    return np.multiply(child_parent_values, shares, dtype=np.float64)
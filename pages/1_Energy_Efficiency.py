@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+import numpy as np
 import os
 import sys
-import base64
 
 # Add parent directory to path to import styles
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -22,7 +23,12 @@ load_css()
 
 # Import shared components
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from shared_components import create_sidebar, show_wip_warning
+from shared_components import create_sidebar, show_wip_warning, render_image
+from models.retrofit import (ARCHETYPES, ERAS, HEATING_FUELS, MEASURES, PACKAGE_LABELS, REACTOR_GWH,
+                             RetrofitSurrogate, package_of)
+from models.portfolio import STRESS_HOURS, evaluate_portfolio
+from models.load_shapes import SEASONS, load_shape_summary
+from models.profiles import MONTH_NAMES
 
 # Store current page in session state for sidebar to access
 st.session_state['current_page'] = __file__
@@ -36,38 +42,93 @@ create_sidebar(os.path.basename(__file__))
 # Load the required images
 from PIL import Image
 
-# Image Paths
-ee_house_path = r"assets/ee_house.png"
-ee_what_if_path = r"assets/ee_what_if.png"
-ee_annual_cost_savings_path = r"assets/ee_annual_cost_savings.png"
-ee_energy_savings_path = r"assets/ee_energy_savings.png"
-ee_impact_full_retrofit_path = r"assets/ee_impact_full_retrofit.png"
-ee_impact_heat_pump_path = r"assets/ee_impact_heat_pump.png"
-
-# Load the images as bytes and convert to base64
-with open(ee_house_path, "rb") as f:
-    ee_house_bytes = f.read()
-    ee_house_base64 = base64.b64encode(ee_house_bytes).decode()
-
-with open(ee_what_if_path, "rb") as f:
-    ee_what_if_bytes = f.read()
-    ee_what_if_base64 = base64.b64encode(ee_what_if_bytes).decode()   
-
-with open(ee_annual_cost_savings_path, "rb") as f:
-    ee_annual_cost_savings_bytes = f.read()
-    ee_annual_cost_savings_base64 = base64.b64encode(ee_annual_cost_savings_bytes).decode()
-
-with open(ee_energy_savings_path, "rb") as f:
-    ee_energy_savings_bytes = f.read()
-    ee_energy_savings_base64 = base64.b64encode(ee_energy_savings_bytes).decode()
-
-with open(ee_impact_full_retrofit_path, "rb") as f:
-    ee_impact_full_retrofit_bytes = f.read()
-    ee_impact_full_retrofit_base64 = base64.b64encode(ee_impact_full_retrofit_bytes).decode()
-
-with open(ee_impact_heat_pump_path, "rb") as f:
-    ee_impact_heat_pump_bytes = f.read()
-    ee_impact_heat_pump_base64 = base64.b64encode(ee_impact_heat_pump_bytes).decode()
+CURRENT_COLOR = "#808080"
+UPGRADED_COLOR = "#48D1CC"
+FUEL_BAR_COLORS = {"electric": "#008000", "gas": "#90EE90"}
+MEASURE_COLORS = {"envelope": "#A6D854", "heat_pump": "#FC8D62"}
+ERA_COLORS = {"pre_1980": "#8DA0CB", "1980_2020": "#66C2A5", "2020_now": "#FFD92F"}
+
+# Built once per server process; every chart below is arithmetic on its
+# precomputed hourly arrays.
+@st.cache_resource
+def retrofit_surrogate():
+    return RetrofitSurrogate()
+
+def by_era(values):
+    # ARCHETYPES are ordered era by era, so each era is one row of the reshape.
+    return np.asarray(values).reshape(len(ERAS), len(HEATING_FUELS)).sum(axis=1)
+
+def era_comparison_figure(current, upgraded, upgraded_name, y_title):
+    eras = [ERAS[era]["label"] for era in ERAS]
+    fig = go.Figure([
+        go.Bar(name="Current", x=eras, y=current, marker_color=CURRENT_COLOR),
+        go.Bar(name=upgraded_name, x=eras, y=upgraded, marker_color=UPGRADED_COLOR),
+    ])
+    fig.update_traces(hovertemplate="%{x}: %{y:,.0f}<extra>%{fullData.name}</extra>")
+    fig.update_layout(barmode="group", height=380, margin=dict(t=30, b=10, l=10, r=10), yaxis_title=y_title,
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+@st.cache_data
+def home_impact_figure(package, fuel):
+    home = retrofit_surrogate().per_home(package)
+    rows = [ARCHETYPES.index((era, fuel)) for era in ERAS]
+    return era_comparison_figure(home["kwh"][rows], home["upgraded_kwh"][rows],
+                                 f"With {PACKAGE_LABELS[package].lower()}", "Annual energy use (kWh)")
+
+# One pass over the ~1.1M-parcel synthetic metro inventory takes a few hundred
+# milliseconds, so each (package, adoption) result is cached.
+@st.cache_data
+def metro_portfolio(package, adoption):
+    return evaluate_portfolio(package, adoption)
+
+def contribution_pie(contributions, labels, colors):
+    fig = go.Figure(go.Pie(
+        labels=[labels[key] for key in contributions],
+        values=[round(mw) for mw in contributions.values()],
+        sort=False,
+        marker=dict(colors=[colors[key] for key in contributions]),
+        hovertemplate="%{label}: %{value:,} MW (%{percent})<extra></extra>",
+    ))
+    fig.update_layout(height=320, margin=dict(t=10, b=10, l=10, r=10))
+    return fig
+
+def load_shape_figures(current, upgraded, upgraded_name):
+    # Monthly and seasonal totals add gas (as kWh) to electricity; the peak
+    # day is electricity only, since that is what the grid has to serve.
+    def trace(figure, x, y, name, color, kind):
+        if kind == "line":
+            figure.add_trace(go.Scatter(x=x, y=y, name=name, mode="lines+markers", line=dict(color=color, shape="spline")))
+        else:
+            figure.add_trace(go.Bar(x=x, y=y, name=name, marker_color=color))
+
+    charts = {
+        "monthly": (MONTH_NAMES, "line", "Monthly energy use (kWh)"),
+        "seasonal": (list(SEASONS), "bar", "Seasonal energy use (kWh)"),
+        "peak_day_profile": ([f"{h:02d}:00" for h in range(24)], "line", "Electric demand (kW)"),
+    }
+    figures = {}
+    for name, (x, kind, y_title) in charts.items():
+        fig = go.Figure()
+        for summary, label, color in ((current, "Current", CURRENT_COLOR), (upgraded, upgraded_name, UPGRADED_COLOR)):
+            y = summary[name][0] if name == "peak_day_profile" else summary[name].sum(axis=0)
+            trace(fig, x, y, label, color, kind)
+        fig.update_traces(hovertemplate="%{x}: %{y:,.1f}<extra>%{fullData.name}</extra>")
+        fig.update_layout(barmode="group", height=320, margin=dict(t=30, b=10, l=10, r=10), yaxis_title=y_title,
+                          legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+        figures[name] = fig
+    return figures
+
+def savings_by_fuel_figure(savings, y_title, value_format):
+    eras = [ERAS[era]["label"] for era in ERAS]
+    fig = go.Figure([
+        go.Bar(name=f"{label} homes", x=eras, y=[savings[ARCHETYPES.index((era, fuel))] for era in ERAS],
+               marker_color=FUEL_BAR_COLORS[fuel], hovertemplate=f"%{{x}}: %{{y:{value_format}}}<extra>%{{fullData.name}}</extra>")
+        for fuel, label in HEATING_FUELS.items()
+    ])
+    fig.update_layout(barmode="group", height=340, margin=dict(t=30, b=10, l=10, r=10), yaxis_title=y_title,
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
 
 left_col, right_col = st.columns([1,3])
 
@@ -76,13 +137,7 @@ with left_col:
     <h2 style="color: #1E5C8E; margin-bottom: 0.75rem;">Energy Efficiency</h2>
     """, unsafe_allow_html=True)
 
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{ee_house_base64}" 
-             style="width: 60%; height: auto; border-radius: 10px;" 
-             alt="Energy efficient home with sustainable features">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("ee_house.png", 1/4, alt="Energy efficient home with sustainable features", width="60%", container_style="text-align: center; margin-bottom: 15px;", lazy=False)
     
     st.markdown("""
     <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
@@ -107,13 +162,7 @@ with right_col:
     </div>
     """, unsafe_allow_html=True)
 
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{ee_energy_savings_base64}" 
-             style="width: 70%; height: auto; border-radius: 10px;" 
-             alt="Energy savings comparison">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("ee_energy_savings.png", 3/4, alt="Energy savings comparison", width="70%", lazy=False)
 
 # break
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
@@ -130,19 +179,13 @@ with left_col:
         <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
             Heat pumps transfer heat instead of generating it. In the winter, they move heat inside from the air outside, and in the summer, they remove heat from your home.
             <br><br>
-            Compared to gas furnaces and resistive electric heaters, heat pumps are 2.5 to 4 times more efficient. In Atlanta's mild winters, they work especially well year-round. Replacing older systems with heat pumps can reduce heating energy use by up to 50%. A bar graph shows annual energy consumption for a typical pre-1980 era Atlanta home with and without heat pumps.
+            Compared to gas furnaces and resistive electric heaters, heat pumps are 2.5 to 4 times more efficient. In Atlanta's mild winters, they work especially well year-round. Replacing older systems with heat pumps can reduce heating energy use by up to 50%. The bar graph shows annual energy consumption for typical gas-heated Atlanta homes of each construction era with and without a heat pump.
         </p>
     </div>
     """, unsafe_allow_html=True)
 
 with right_col:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{ee_impact_heat_pump_base64}" 
-             style="width: 80%; height: auto; border-radius: 10px;" 
-             alt="Energy savings comparison">
-    </div>
-    """, unsafe_allow_html=True)
+    st.plotly_chart(home_impact_figure("heat_pump", "gas"), use_container_width=True)
 
 # break
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
@@ -159,19 +202,63 @@ with left_col:
         <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
             Older homes waste energy through poor insulation, air leaks, and outdated systems. Upgrading the building envelope and switching to efficient heat pumps can nearly cut energy use in half and significantly reduce carbon emissions.
             <br><br>
-            A bar chart compares annual energy use with envelope and heat pump upgrades.
+            The bar chart compares annual energy use of gas-heated homes with envelope and heat pump upgrades.
         </p>
     </div>
     """, unsafe_allow_html=True)
 
 with right_col:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{ee_impact_full_retrofit_base64}" 
-             style="width: 80%; height: auto; border-radius: 10px;" 
-             alt="Energy savings comparison">
-    </div>
-    """, unsafe_allow_html=True)
+    st.plotly_chart(home_impact_figure("full_retrofit", "gas"), use_container_width=True)
+
+# break
+st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
+
+st.markdown("""
+<h2 style="color: #1E5C8E; margin-bottom: 0.75rem;">When do homes use energy?</h2>
+""", unsafe_allow_html=True)
+
+st.markdown("""
+<div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+    <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+        Atlanta homes use the most energy in winter, for heating, and in late summer, for cooling. Upgrades cut both peaks, and a heat pump moves winter heating from gas to electricity. Choose a home and an upgrade to compare its monthly and seasonal energy use and its electricity demand on its busiest day of the year.
+    </p>
+</div>
+""", unsafe_allow_html=True)
+
+# Isolated so that changing the home or upgrade reruns only these charts. The
+# aggregates are computed once per model version and read from the build
+# store after that.
+@st.fragment
+def render_load_shapes():
+    st.markdown("<br>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns(3)
+    era = c1.selectbox("Construction era", list(ERAS), format_func=lambda key: ERAS[key]["label"])
+    fuel = c2.selectbox("Heating", list(HEATING_FUELS), index=1, format_func=HEATING_FUELS.get)
+    package = c3.selectbox("Upgrade", ["heat_pump", "envelope", "full_retrofit"], format_func=PACKAGE_LABELS.get)
+    current = load_shape_summary(era, fuel, "none")
+    upgraded = load_shape_summary(era, fuel, package)
+    figures = load_shape_figures(current, upgraded, f"With {PACKAGE_LABELS[package].lower()}")
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Annual energy use", f"{upgraded['annual'].sum():,.0f} kWh",
+              delta=f"{upgraded['annual'].sum() - current['annual'].sum():+,.0f} kWh", delta_color="inverse")
+    m2.metric("Winter energy use", f"{upgraded['seasonal'][:, 0].sum():,.0f} kWh",
+              delta=f"{upgraded['seasonal'][:, 0].sum() - current['seasonal'][:, 0].sum():+,.0f} kWh", delta_color="inverse")
+    m3.metric("Peak electric demand", f"{upgraded['peak_day_profile'][0].max():,.1f} kW",
+              delta=f"{upgraded['peak_day_profile'][0].max() - current['peak_day_profile'][0].max():+,.1f} kW", delta_color="inverse")
+
+    left, middle, right = st.columns(3)
+    with left:
+        st.markdown("##### Monthly energy use")
+        st.plotly_chart(figures["monthly"], use_container_width=True)
+    with middle:
+        st.markdown("##### Seasonal energy use")
+        st.plotly_chart(figures["seasonal"], use_container_width=True)
+    with right:
+        st.markdown("##### Busiest day for electricity")
+        st.plotly_chart(figures["peak_day_profile"], use_container_width=True)
+
+render_load_shapes()
 
 # break
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
@@ -188,28 +275,97 @@ with left_col:
         <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
             Efficiency upgrades also deliver big savings. Better insulation, smarter heating, and efficient appliances reduce electricity and gas use lowering bills by hundreds of dollars each year.
             <br><br>
-            A bar chart shows household energy cost savings by home type. Both all-electric and gas-heated homes benefit, especially older ones. These improvements make homes healthier, more comfortable, and more affordable. 
+            The calculator below shows household energy cost savings by home type. Both all-electric and gas-heated homes benefit, especially older ones. These improvements make homes healthier, more comfortable, and more affordable.
         </p>
     </div>
     """, unsafe_allow_html=True)
 
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{ee_what_if_base64}" 
-             style="width: 75%; height: auto; border-radius: 10px;" 
-             alt="What if we changed?">
-    </div>
+with right_col:
+    st.markdown("""
+    <h2 style="color: #1E5C8E; margin-bottom: 0.75rem;">What if?</h2>
     """, unsafe_allow_html=True)
 
-with right_col:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{ee_annual_cost_savings_base64}" 
-             style="width: 80%; height: auto; border-radius: 10px;" 
-             alt="Annual energy cost savings">
+    st.markdown("""
+    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+        <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+            Pick the upgrades and the share of Georgia homes that make them to see what the state could save every year in energy, utility bills and emissions, and how much it would lower the peak demand on the grid.
+        </p>
     </div>
     """, unsafe_allow_html=True)
 
+# Isolated so that moving the slider or changing measures reruns and resends
+# only the calculator. Each rerun is a handful of array operations on the
+# cached surrogate, well under 50 ms.
+@st.fragment
+def render_retrofit_calculator():
+    surrogate = retrofit_surrogate()
+    st.markdown("<br>", unsafe_allow_html=True)
+    c1, c2 = st.columns([1, 1])
+    measures = c1.multiselect("Upgrades", list(MEASURES), default=list(MEASURES), format_func=MEASURES.get, key="retrofit_measures")
+    adoption = c2.slider("Share of homes that upgrade (%)", 0, 100, 45, step=5, key="retrofit_adoption") / 100
+    package = package_of(measures)
+    home = surrogate.per_home(package)
+    stock = surrogate.evaluate(package, adoption)
+
+    saved_gwh = (stock["kwh"] - stock["upgraded_kwh"]).sum() / 1e6
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Energy saved", f"{saved_gwh:,.0f} GWh/yr", help=f"About {saved_gwh / REACTOR_GWH:.1f} nuclear reactors' annual output")
+    m2.metric("Bill savings", f"${(stock['cost'] - stock['upgraded_cost']).sum() / 1e6:,.0f}M/yr")
+    m3.metric("Peak demand reduction", f"{stock['peak_reduction_mw']:,.0f} MW")
+    m4.metric("CO₂ avoided", f"{(stock['co2_t'] - stock['upgraded_co2_t']).sum() / 1e6:,.2f} Mt/yr")
+
+    left, middle, right = st.columns(3)
+    with left:
+        st.markdown("##### Annual cost savings per household ($/yr)")
+        st.plotly_chart(savings_by_fuel_figure(home["cost"] - home["upgraded_cost"], "$/yr", "$,.0f"), use_container_width=True)
+    with middle:
+        st.markdown("##### Statewide energy use (GWh/yr)")
+        st.plotly_chart(era_comparison_figure(by_era(stock["kwh"]) / 1e6, by_era(stock["upgraded_kwh"]) / 1e6,
+                                              f"{adoption:.0%} upgraded", "GWh/yr"), use_container_width=True)
+    with right:
+        st.markdown("##### Emissions avoided (kt CO₂/yr)")
+        st.plotly_chart(savings_by_fuel_figure((stock["co2_t"] - stock["upgraded_co2_t"]) / 1000, "kt CO₂/yr", ",.0f"),
+                        use_container_width=True)
+
+render_retrofit_calculator()
+
+# The metro-wide run takes a few hundred milliseconds per new setting, so it
+# lives in its own fragment and only runs on request, for the calculator's
+# current settings; the calculator above never waits on it.
+@st.fragment
+def render_metro_portfolio():
+    st.markdown("#### Across metro Atlanta's building stock")
+    measures = st.session_state.get("retrofit_measures", list(MEASURES))
+    adoption = st.session_state.get("retrofit_adoption", 45) / 100
+    if st.button("Evaluate these upgrades across metro Atlanta"):
+        st.session_state["metro_portfolio_settings"] = (package_of(measures), adoption)
+    settings = st.session_state.get("metro_portfolio_settings")
+    if settings is None:
+        st.caption("Run the upgrades chosen above on every single-family parcel in the metro area.")
+        return
+
+    package, adoption = settings
+    portfolio = metro_portfolio(package, adoption)
+    st.caption(f"{PACKAGE_LABELS[package] if package != 'none' else 'No upgrades'} at {adoption:.0%} adoption across "
+               f"{portfolio['parcels']:,} single-family parcels (synthetic inventory); "
+               f"grid stress is the average demand over the {STRESS_HOURS} highest-load hours of the year.")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Homes upgraded", f"{portfolio['adopters']:,}")
+    m2.metric("Energy saved", f"{portfolio['gwh_saved']:,.0f} GWh/yr")
+    m3.metric("Peak demand reduction", f"{portfolio['peak_reduction_mw']:,.0f} MW")
+    m4.metric("Grid stress reduction", f"{portfolio['stress_reduction_mw']:,.0f} MW")
+    if portfolio["stress_reduction_mw"] > 0:
+        left, right = st.columns(2)
+        with left:
+            st.markdown("##### Grid stress reduction by upgrade")
+            st.plotly_chart(contribution_pie(portfolio["stress_by_measure"], MEASURES, MEASURE_COLORS), use_container_width=True)
+        with right:
+            st.markdown("##### Grid stress reduction by construction era")
+            st.plotly_chart(contribution_pie(portfolio["stress_by_era"], {era: p["label"] for era, p in ERAS.items()}, ERA_COLORS),
+                            use_container_width=True)
+
+render_metro_portfolio()
+
 # add a footer that says "Sources: DOE, EIA, Southface, NREL, ENERGY STAR and Georgia Power data estimates"
 st.markdown("""
     <div style="text-align: center; margin-top: 2rem;">
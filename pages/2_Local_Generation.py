@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import numpy as np
 import os
 import sys
-import base64
 
 # Add parent directory to path to import styles
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -23,7 +25,10 @@ load_css()
 
 # Import shared components
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from shared_components import create_sidebar, show_wip_warning
+from shared_components import create_sidebar, show_wip_warning, render_image
+from models.profiles import MONTH_NAMES, MONTH_START_DAY
+from models.solar_storage import RESOLUTIONS, dispatch, home_profiles, summarize
+from models.stress_events import EVENTS, HOME_BATTERY_KW, HOME_BATTERY_KWH, replay
 
 # Store current page in session state for sidebar to access
 st.session_state['current_page'] = __file__
@@ -40,29 +45,6 @@ create_sidebar(os.path.basename(__file__))
 
 from PIL import Image
 
-# Image Paths
-lg_bat_path = r"assets/lg_bat.png"
-lg_capacity_path = r"assets/lg_capacity.png"
-lg_flexible_path = r"assets/lg_flexible.png"
-lg_texas_path = r"assets/lg_texas.png"
-
-# Load the images as bytes and convert to base64
-with open(lg_bat_path, "rb") as f:
-    lg_bat_bytes = f.read()
-    lg_bat_base64 = base64.b64encode(lg_bat_bytes).decode()
-
-with open(lg_capacity_path, "rb") as f:
-    lg_capacity_bytes = f.read()
-    lg_capacity_base64 = base64.b64encode(lg_capacity_bytes).decode()
-    
-with open(lg_flexible_path, "rb") as f:
-    lg_flexible_bytes = f.read()
-    lg_flexible_base64 = base64.b64encode(lg_flexible_bytes).decode()
-    
-with open(lg_texas_path, "rb") as f:
-    lg_texas_bytes = f.read()
-    lg_texas_base64 = base64.b64encode(lg_texas_bytes).decode()
-
 ## Actual page content begins
 
 # title
@@ -145,37 +127,58 @@ with left_col:
     </div>
     """, unsafe_allow_html=True)
 
+# Every (event, fleet size) the slider can reach is a small cache entry, so
+# sweeping the fleet size back and forth doesn't recompute anything.
+@st.cache_data(max_entries=512)
+def stress_replay(event_id, homes):
+    return replay(event_id, homes)
+
+def stress_event_figure(result):
+    hours = np.arange(len(result["load_mw"]))
+    days = hours / 24
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+    fig.add_trace(go.Scatter(x=days, y=result["load_mw"] / 1000, name="Demand", line=dict(color="#808080")), row=1, col=1)
+    fig.add_trace(go.Scatter(x=days, y=result["available_mw"] / 1000, name="Available supply", line=dict(color="#1E5C8E")),
+                  row=1, col=1)
+    fig.add_trace(go.Bar(x=days, y=result["shed_mw"] / 1000, name="Outages without batteries", marker_color="#F4A6A6"),
+                  row=1, col=1)
+    fig.add_trace(go.Bar(x=days, y=result["shed_with_fleet_mw"] / 1000, name="Outages with batteries", marker_color="#D32F2F"),
+                  row=1, col=1)
+    fig.add_trace(go.Bar(x=days, y=result["fleet_mw"] / 1000, name="Battery fleet output", marker_color="#2E7D32"), row=2, col=1)
+    fig.update_traces(hovertemplate="%{y:,.1f} GW<extra>%{fullData.name}</extra>")
+    fig.update_yaxes(title_text="GW", row=1, col=1)
+    fig.update_yaxes(title_text="GW", row=2, col=1)
+    fig.update_xaxes(title_text="Day of event", row=2, col=1)
+    fig.update_layout(height=460, margin=dict(t=30, b=10, l=10, r=10), barmode="overlay", bargap=0, hovermode="x unified",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+# Isolated so that changing the event or fleet size reruns only this chart.
+@st.fragment
+def render_stress_replay():
+    event_id = st.selectbox("Grid stress event", list(EVENTS), format_func=lambda key: EVENTS[key]["label"])
+    homes = st.slider("Homes with a battery", 0, 2_000_000, 250_000, step=50_000, format="%d",
+                      help=f"Each home has a {HOME_BATTERY_KWH:g} kWh, {HOME_BATTERY_KW:g} kW battery.")
+    result = stress_replay(event_id, homes)
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Energy cut off", f"{result['shed_with_fleet_mwh'] / 1000:,.1f} GWh",
+              delta=f"{(result['shed_with_fleet_mwh'] - result['shed_mwh']) / 1000:+,.1f} GWh", delta_color="inverse")
+    m2.metric("Hours with outages", f"{result['outage_hours_with_fleet']}",
+              delta=f"{result['outage_hours_with_fleet'] - result['outage_hours']:+d}", delta_color="inverse")
+    m3.metric("Fleet earnings", f"${result['value'] / 1e6:,.1f}M", help="Energy sold at event prices less the cost of recharging")
+    st.plotly_chart(stress_event_figure(result), use_container_width=True)
+    st.caption("Synthetic reconstructions of each event's shape, not measured data.")
+
 with right_col:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{lg_texas_base64}" 
-             style="width: 60%; height: auto; border-radius: 10px;" 
-             alt="Energy efficient home with sustainable features">
-    </div>
-    <p style="font-size: 1rem; color: #2c3e50; line-height: 1.5; margin: 0; text-align: center;">Texas Winter-related power outage Source: NPR</p>
-    """, unsafe_allow_html=True)
+    render_stress_replay()
 
 left_img, right_img = st.columns([1,1])
 
 with left_img:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{lg_bat_base64}" 
-             style="width: 70%; height: auto; border-radius: 10px;" 
-             alt="Energy efficient home with sustainable features">
-    </div>
-    <p style="font-size: 1rem; color: #2c3e50; line-height: 1.5; margin: 0; text-align: center;">Battery Storage Source: Georgia Power</p>
-    """, unsafe_allow_html=True)
+    render_image("lg_bat.png", 1/2, alt="Battery storage", width="70%", caption="Battery Storage Source: Georgia Power")
 
 with right_img:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{lg_capacity_base64}" 
-             style="width: 70%; height: auto; border-radius: 10px;" 
-             alt="Energy efficient home with sustainable features">
-    </div>
-    <p style="font-size: 1rem; color: #2c3e50; line-height: 1.5; margin: 0; text-align: center;">Source: US Energy Information Administration</p>
-    """, unsafe_allow_html=True)
+    render_image("lg_capacity.png", 1/2, alt="Battery storage capacity growth", width="70%", caption="Source: US Energy Information Administration")
 
 # break
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
@@ -185,12 +188,97 @@ st.markdown("""
 <h2 style="color: #1E5C8E; padding-top: 0rem; margin-top: 0.5rem;">Flexible Energy Management</h2>
 """, unsafe_allow_html=True)
 
-st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="data:image/png;base64,{lg_flexible_base64}" 
-             style="width: 90%; height: auto; border-radius: 10px;" 
-             alt="Energy efficient home with sustainable features">
-    </div>
-    """, unsafe_allow_html=True)
+render_image("lg_flexible.png", 1, alt="Flexible energy management")
+
+    
+
+# break
+st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
+
+st.markdown("""
+<h2 style="color: #1E5C8E; padding-top: 0rem; margin-top: 0.5rem;">Try It: Solar and a Battery at Home</h2>
+""", unsafe_allow_html=True)
+
+st.markdown("""
+<div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+    <p style="font-size: 1.2rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+        Size a rooftop solar system and a home battery for a typical all-electric Atlanta home and see a full year of operation. The battery stores solar power the home doesn't use right away and releases it when the home needs more than its panels make. Raising the discharge threshold holds the battery back for the highest-demand hours, trading everyday savings for a lower peak.
+    </p>
+</div>
+""", unsafe_allow_html=True)
 
-    
\ No newline at end of file
+@st.cache_data
+def home_series(steps_per_hour):
+    return home_profiles(steps_per_hour)
+
+def week_figure(load, pv, result, steps_per_hour, week):
+    steps = slice(week * 7 * 24 * steps_per_hour, (week + 1) * 7 * 24 * steps_per_hour)
+    x = np.arange(steps.stop - steps.start) / steps_per_hour / 24
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+    fig.add_trace(go.Scatter(x=x, y=load[steps], name="Home load", line=dict(color="#808080")), row=1, col=1)
+    fig.add_trace(go.Scatter(x=x, y=pv[steps], name="Solar", line=dict(color="#FFB300"), fill="tozeroy"), row=1, col=1)
+    fig.add_trace(go.Scatter(x=x, y=result["grid_kw"][steps], name="From the grid", line=dict(color="#1E5C8E")), row=1, col=1)
+    fig.add_trace(go.Scatter(x=x, y=result["soc_kwh"][steps], name="Battery charge", line=dict(color="#2E7D32"), fill="tozeroy"),
+                  row=2, col=1)
+    fig.update_traces(hovertemplate="%{y:,.2f}<extra>%{fullData.name}</extra>")
+    fig.update_yaxes(title_text="kW", row=1, col=1)
+    fig.update_yaxes(title_text="kWh", row=2, col=1)
+    fig.update_xaxes(title_text="Day of week", row=2, col=1)
+    fig.update_layout(height=480, margin=dict(t=30, b=10, l=10, r=10), hovermode="x unified",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+def monthly_grid_figure(result, steps_per_hour):
+    # Daily import and export energy, then summed by month.
+    grid = result["grid_kw"].reshape(-1, 24 * steps_per_hour) / steps_per_hour
+    imports = np.add.reduceat(np.maximum(grid, 0.0).sum(axis=1), MONTH_START_DAY)
+    exports = np.add.reduceat(np.maximum(-grid, 0.0).sum(axis=1), MONTH_START_DAY)
+    fig = go.Figure([
+        go.Bar(x=MONTH_NAMES, y=imports, name="Bought from the grid", marker_color="#1E5C8E"),
+        go.Bar(x=MONTH_NAMES, y=-exports, name="Sent to the grid", marker_color="#FFB300"),
+    ])
+    fig.update_traces(hovertemplate="%{x}: %{y:,.0f} kWh<extra>%{fullData.name}</extra>")
+    fig.update_layout(barmode="relative", height=480, margin=dict(t=30, b=10, l=10, r=10), yaxis_title="kWh",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+# Isolated so that moving a slider reruns only the simulator. A year of
+# dispatch takes about 10 ms at either resolution.
+@st.fragment
+def render_storage_simulator():
+    st.markdown("<br>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns(3)
+    pv_kw = c1.slider("Solar size (kW)", 0.0, 15.0, 7.0, step=0.5)
+    capacity_kwh = c2.slider("Battery size (kWh)", 0.0, 40.0, 13.5, step=0.5)
+    power_kw = c3.slider("Battery power (kW)", 0.0, 15.0, 5.0, step=0.5)
+    c1, c2, c3 = st.columns(3)
+    round_trip = c1.slider("Round-trip efficiency (%)", 70, 98, 90) / 100
+    threshold_kw = c2.slider("Discharge only above (kW)", 0.0, 8.0, 0.0, step=0.25)
+    resolution = c3.radio("Time step", list(RESOLUTIONS), horizontal=True)
+
+    steps_per_hour = RESOLUTIONS[resolution]
+    load, pv_per_kw = home_series(steps_per_hour)
+    pv = pv_kw * pv_per_kw
+    efficiency = round_trip ** 0.5
+    result = dispatch(load, pv, capacity_kwh, power_kw, efficiency, efficiency, threshold_kw, steps_per_hour)
+    summary = summarize(load, pv, result, capacity_kwh, steps_per_hour)
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Solar used at home", f"{summary['self_consumption']:.0%}")
+    m2.metric("Load met without the grid", f"{summary['self_sufficiency']:.0%}")
+    m3.metric("Peak shaving", f"{summary['peak_shaving_kw']:,.1f} kW",
+              help=f"Peak grid draw {summary['peak_import_kw']:,.1f} kW vs. a {summary['peak_load_kw']:,.1f} kW peak load")
+    m4.metric("Bought from the grid", f"{summary['import_kwh']:,.0f} kWh/yr",
+              delta=f"{summary['import_kwh'] - summary['load_kwh']:+,.0f} kWh", delta_color="inverse")
+
+    peak_week = int(np.argmax(load) // (7 * 24 * steps_per_hour))
+    left, right = st.columns([3, 2])
+    with left:
+        week = st.slider("Week of the year", 1, 52, min(peak_week, 51) + 1,
+                         help="Starts on the week of the home's highest demand.") - 1
+        st.plotly_chart(week_figure(load, pv, result, steps_per_hour, week), use_container_width=True)
+    with right:
+        st.markdown("##### Grid energy by month")
+        st.plotly_chart(monthly_grid_figure(result, steps_per_hour), use_container_width=True)
+
+render_storage_simulator()
@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import os
+import time
 import sys
-import base64
 from PIL import Image
 
 # Add parent directory to path to import styles
@@ -22,7 +23,11 @@ st.set_page_config(
 load_css()
 
 # Import shared components
-from shared_components import create_sidebar, show_wip_warning
+from shared_components import create_sidebar, show_wip_warning, render_image
+from models.demand_growth import BASE_YEAR, COMPONENTS, END_YEAR, SCENARIOS, project
+from models.retrofit import ERAS, HEATING_FUELS, PACKAGE_LABELS, PACKAGES
+from models.profiles import EV_WINDOWS, MONTH_NAMES
+from models.tariffs import CUSTOMER_GROUPS, TARIFFS, bills, customer_profile, monthly_bills, population_bills
 
 # Store current page in session state for sidebar to access
 st.session_state['current_page'] = __file__
@@ -32,49 +37,6 @@ create_sidebar(os.path.basename(__file__))
 
 ######################## PAGE CONTENT ########################
 
-# Image Paths
-gup_icon1_path = r"assets/gup_icon1.png"
-gup_icon2_path = r"assets/gup_icon2.png"
-gup_icon3_path = r"assets/gup_icon3.png"
-gup_affordable_path = r"assets/gup_affordable.png"
-gup_cost_time_path = r"assets/gup_cost_time.png"
-gup_demand_path = r"assets/gup_demand.png"
-gup_reduced_cost_path = r"assets/gup_reduced_cost.png"
-gup_high_cost_path = r"assets/gup_high_cost.png"
-
-# Load the images as bytes and convert to base64
-with open(gup_icon1_path, "rb") as f:
-    gup_icon1_bytes = f.read()
-    gup_icon1_base64 = base64.b64encode(gup_icon1_bytes).decode()
-
-with open(gup_icon2_path, "rb") as f:
-    gup_icon2_bytes = f.read()
-    gup_icon2_base64 = base64.b64encode(gup_icon2_bytes).decode()   
-
-with open(gup_icon3_path, "rb") as f:
-    gup_icon3_bytes = f.read()
-    gup_icon3_base64 = base64.b64encode(gup_icon3_bytes).decode()
-
-with open(gup_affordable_path, "rb") as f:
-    gup_affordable_bytes = f.read()
-    gup_affordable_base64 = base64.b64encode(gup_affordable_bytes).decode()
-
-with open(gup_cost_time_path, "rb") as f:
-    gup_cost_time_bytes = f.read()
-    gup_cost_time_base64 = base64.b64encode(gup_cost_time_bytes).decode()
-
-with open(gup_demand_path, "rb") as f:
-    gup_demand_bytes = f.read()
-    gup_demand_base64 = base64.b64encode(gup_demand_bytes).decode()
-
-with open(gup_reduced_cost_path, "rb") as f:
-    gup_reduced_cost_bytes = f.read()
-    gup_reduced_cost_base64 = base64.b64encode(gup_reduced_cost_bytes).decode()
-
-with open(gup_high_cost_path, "rb") as f:
-    gup_high_cost_bytes = f.read()
-    gup_high_cost_base64 = base64.b64encode(gup_high_cost_bytes).decode()
-
 # Title
 st.markdown("""
     <h1 style="font-size: 2.5rem; color: #1E5C8E; margin-bottom: 1rem;">Grid Under Pressure</h1>
@@ -102,13 +64,7 @@ st.markdown("""
 _, icons, text, _ = st.columns([1,1,7,1])
 
 with icons:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_icon1_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Increased Demand Icon">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_icon1.png", 1/10, alt="Increased Demand Icon", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;", lazy=False)
 
 with text:
     st.markdown("""
@@ -119,6 +75,82 @@ with text:
     </div>
     """, unsafe_allow_html=True)
     
+COMPONENT_COLORS = {
+    "baseline": "#808080",
+    "data_centers": "#1E5C8E",
+    "ev_evening": "#D32F2F",
+    "ev_overnight": "#F48FB1",
+    "electrification": "#FFB300",
+}
+SCENARIO_DASHES = {"slow": "dot", "reference": "dash", "data_center_boom": "dashdot"}
+
+def peak_growth_figure(projection, labels):
+    fig = go.Figure()
+    for s, (scenario_id, label) in enumerate(labels.items()):
+        fig.add_trace(go.Scatter(
+            x=projection["years"], y=projection["peak_mw"][s] / 1000, name=label, mode="lines",
+            line=dict(color="#1E5C8E" if scenario_id == "custom" else "#808080", width=3 if scenario_id == "custom" else 2,
+                      dash=SCENARIO_DASHES.get(scenario_id, "solid")),
+            hovertemplate="%{x}: %{y:,.1f} GW<extra>%{fullData.name}</extra>"))
+    fig.update_layout(height=380, margin=dict(t=30, b=10, l=10, r=10), yaxis_title="Annual peak (GW)",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+def energy_growth_figure(projection, s):
+    fig = go.Figure([
+        go.Scatter(x=projection["years"], y=projection["energy_by_component"][s, :, c], name=label, stackgroup="energy",
+                   mode="lines", line=dict(width=0.5, color=COMPONENT_COLORS[component]),
+                   hovertemplate="%{x}: %{y:,.1f} TWh<extra>%{fullData.name}</extra>")
+        for c, (component, label) in enumerate(COMPONENTS.items())
+    ])
+    fig.update_layout(height=380, margin=dict(t=30, b=10, l=10, r=10), yaxis_title="Annual energy (TWh)",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+# Isolated so that moving a slider reprojects only this chart. Every scenario
+# and year is projected at once as a single matrix product.
+@st.fragment
+def render_demand_growth():
+    reference = SCENARIOS["reference"]
+    st.markdown(f"##### Build your own {END_YEAR} scenario")
+    c1, c2, c3, c4, c5 = st.columns(5)
+    custom = {
+        "label": "Your scenario",
+        "data_center_mw": 1000 * c1.slider("Data centers (GW)", 1.5, 20.0, reference["data_center_mw"] / 1000, step=0.5),
+        "ev_share": c2.slider("Cars that are electric (%)", 2, 80, round(100 * reference["ev_share"])) / 100,
+        "managed_charging": c3.slider("EVs charging overnight (%)", 0, 100, round(100 * reference["managed_charging"])) / 100,
+        "heat_pump_share": c4.slider("Gas homes switched to heat pumps (%)", 0, 80, round(100 * reference["heat_pump_share"])) / 100,
+        "baseline_growth": c5.slider("Other growth (%/yr)", 0.0, 2.0, 100 * reference["baseline_growth"], step=0.1) / 100,
+        "midpoint": reference["midpoint"],
+    }
+    scenarios = {**SCENARIOS, "custom": custom}
+    start = time.perf_counter()
+    projection = project(list(scenarios.values()))
+    seconds = time.perf_counter() - start
+    s = len(SCENARIOS)
+
+    peak, energy = projection["peak_mw"][s], projection["energy_twh"][s]
+    c1, c2, c3 = st.columns(3)
+    c1.metric(f"Peak demand in {END_YEAR}", f"{peak[-1] / 1000:,.1f} GW", delta=f"{peak[-1] / peak[0] - 1:+.0%} vs. {BASE_YEAR}",
+              delta_color="inverse")
+    c2.metric(f"Electricity used in {END_YEAR}", f"{energy[-1]:,.0f} TWh", delta=f"{energy[-1] / energy[0] - 1:+.0%} vs. {BASE_YEAR}",
+              delta_color="inverse")
+    data_center_share = projection["peak_by_component"][s, -1, list(COMPONENTS).index("data_centers")] / peak[-1]
+    c3.metric(f"New data centers' share of the {END_YEAR} peak", f"{data_center_share:.0%}")
+
+    left, right = st.columns(2)
+    with left:
+        st.markdown("##### Peak demand by scenario")
+        st.plotly_chart(peak_growth_figure(projection, {key: value["label"] for key, value in scenarios.items()}),
+                        use_container_width=True)
+    with right:
+        st.markdown("##### What your scenario's electricity is used for")
+        st.plotly_chart(energy_growth_figure(projection, s), use_container_width=True)
+    st.caption(f"{len(scenarios)} scenarios × {len(projection['years'])} years × 8,760 hours projected in {seconds * 1000:,.0f} ms. "
+               "Growth levels are illustrations drawn from recent utility planning, not forecasts.")
+
+render_demand_growth()
+
 st.markdown("""
 <h2 style="color: #1E5C8E; margin-bottom: 0.1rem;">Irregular Demand</h2>
 """, unsafe_allow_html=True)
@@ -126,13 +158,7 @@ st.markdown("""
 _, icons, text, _ = st.columns([1,1,7,1])
 
 with icons:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_icon2_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Irregular Demand Icon">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_icon2.png", 1/10, alt="Irregular Demand Icon", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;", lazy=False)
 
 with text:
     st.markdown("""
@@ -150,13 +176,7 @@ st.markdown("""
 _, icons, text, _ = st.columns([1,1,7,1])
 
 with icons:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_icon3_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Infrastructural Difficulties Icon">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_icon3.png", 1/10, alt="Infrastructural Difficulties Icon", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
 
 with text:
     st.markdown("""
@@ -184,23 +204,90 @@ col1, col2 = st.columns([1,1])
 
 # image 1
 with col1:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_demand_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Increased Demand">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_demand.png", 1/2, alt="Increased Demand", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
     
 # image 2
 with col2:
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_cost_time_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Increased Demand">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_cost_time.png", 1/2, alt="Increased Demand", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
+
+st.markdown("""
+<h2 style="color: #1E5C8E; margin-bottom: 0.1rem;">What Peak Demand Costs You</h2>
+""", unsafe_allow_html=True)
+
+st.markdown("""
+<div style="background-color: rgba(240, 248, 255, 0.8); padding: 20px; border-radius: 5px; margin-bottom: 20px;">
+    <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.6;">
+        Because peak power is the most expensive to supply, some rate plans charge more for electricity used when the grid is busiest. Time-of-use plans raise the price on summer weekday afternoons, demand-charge plans bill the highest hour of use in those afternoons, and critical-peak plans reserve a very high price for the few days a year when the grid is most strained. Build a household below to compare its bill under each plan, and see which kinds of customers pay more or less.
+    </p>
+</div>
+""", unsafe_allow_html=True)
+
+TARIFF_COLORS = {"flat": "#808080", "tou": "#1E5C8E", "demand": "#FFB300", "critical_peak": "#D32F2F"}
+POPULATION_SIZE = 5000
+
+# Billing the whole synthetic population is a few hundred milliseconds of
+# matrix products, so it runs once per process.
+@st.cache_data
+def population_bill_changes():
+    start = time.perf_counter()
+    totals, groups = population_bills(POPULATION_SIZE)
+    seconds = time.perf_counter() - start
+    changes = {group: (totals[mask] / totals[mask, :1] - 1).mean(axis=0) for group, mask in groups.items()}
+    return changes, seconds
+
+def monthly_bill_figure(monthly):
+    fig = go.Figure([
+        go.Scatter(x=MONTH_NAMES, y=monthly[t], name=spec["label"], mode="lines+markers", line=dict(color=TARIFF_COLORS[tariff_id]))
+        for t, (tariff_id, spec) in enumerate(TARIFFS.items())
+    ])
+    fig.update_traces(hovertemplate="%{x}: $%{y:,.0f}<extra>%{fullData.name}</extra>")
+    fig.update_layout(height=360, margin=dict(t=30, b=10, l=10, r=10), yaxis_title="$/month",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+def bill_change_figure(changes):
+    fig = go.Figure([
+        go.Bar(x=[CUSTOMER_GROUPS[group] for group in changes], y=[100 * change[t] for change in changes.values()],
+               name=spec["label"], marker_color=TARIFF_COLORS[tariff_id])
+        for t, (tariff_id, spec) in enumerate(TARIFFS.items()) if tariff_id != "flat"
+    ])
+    fig.update_traces(hovertemplate="%{x}: %{y:+.1f}%<extra>%{fullData.name}</extra>")
+    fig.update_layout(barmode="group", height=360, margin=dict(t=30, b=10, l=10, r=10), yaxis_title="Change vs. flat rate (%)",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+# Isolated so that changing the household reruns only the calculator. A bill
+# under every plan is one matrix product with the precompiled rate vectors.
+@st.fragment
+def render_bill_calculator():
+    c1, c2, c3 = st.columns(3)
+    era = c1.selectbox("Home built", list(ERAS), index=1, format_func=lambda key: ERAS[key]["label"])
+    fuel = c2.selectbox("Heating", list(HEATING_FUELS), format_func=HEATING_FUELS.get)
+    package = c3.selectbox("Upgrades", PACKAGES, format_func=lambda key: "None" if key == "none" else PACKAGE_LABELS[key])
+    c1, c2, c3 = st.columns(3)
+    ev_kwh = c1.slider("EV charging (kWh per day)", 0, 20, 0)
+    ev_window = c2.radio("EV charges", list(EV_WINDOWS), horizontal=True,
+                         format_func=lambda key: "In the evening" if key == "ev_evening" else "Overnight")
+    solar_kw = c3.slider("Rooftop solar (kW)", 0.0, 10.0, 0.0, step=0.5)
+
+    profile = customer_profile((era, fuel), package, ev_kwh, ev_window, solar_kw)
+    totals = bills(profile)["total"][0]
+    for column, (t, (tariff_id, spec)) in zip(st.columns(len(TARIFFS)), enumerate(TARIFFS.items())):
+        delta = None if tariff_id == "flat" else f"{totals[t] - totals[0]:+,.0f} vs. flat"
+        column.metric(spec["label"], f"${totals[t]:,.0f}/yr", delta=delta, delta_color="inverse")
+
+    left, right = st.columns(2)
+    with left:
+        st.markdown("##### Monthly bill for this household")
+        st.plotly_chart(monthly_bill_figure(monthly_bills(profile)), use_container_width=True)
+    with right:
+        st.markdown("##### Who pays more?")
+        changes, seconds = population_bill_changes()
+        st.plotly_chart(bill_change_figure(changes), use_container_width=True)
+        st.caption(f"Average bill change for {POPULATION_SIZE:,} synthetic customers, billed under every plan in {seconds * 1000:,.0f} ms. "
+                   "Rates are illustrative and set so the average customer pays about the same under each plan.")
+
+render_bill_calculator()
 
 # Title
 st.markdown("""
@@ -240,13 +327,7 @@ with col1:
     """, unsafe_allow_html=True)
     
     # image 1
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_high_cost_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Increased Demand">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_high_cost.png", 1/3, alt="Increased Demand", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
     # small font caption under image in red text
     st.markdown("""
     <div style="text-align: center; margin-bottom: 15px;">
@@ -271,13 +352,7 @@ with col2:
     """, unsafe_allow_html=True)
     
     # image 1
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_reduced_cost_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Increased Demand">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_reduced_cost.png", 1/3, alt="Increased Demand", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
     # small font caption under image in red text
     st.markdown("""
     <div style="text-align: center; margin-bottom: 15px;">
@@ -302,13 +377,7 @@ with col3:
     """, unsafe_allow_html=True)
     
     # image 1
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px;">
-        <img src="data:image/png;base64,{gup_affordable_base64}" 
-             style="width: 70%; height: auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);" 
-             alt="Increased Demand">
-    </div>
-    """, unsafe_allow_html=True)
+    render_image("gup_affordable.png", 1/3, alt="Increased Demand", width="70%", style="box-shadow: 0 4px 8px rgba(0,0,0,0.1);", container_style="text-align: center; margin-bottom: 15px;")
     # small font caption under image in red text
     st.markdown("""
     <div style="text-align: center; margin-bottom: 15px;">
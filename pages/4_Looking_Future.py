@@ -1,9 +1,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import pydeck as pdk
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import os
 import sys
-import base64
+import time
 
 # Add parent directory to path to import styles
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -21,7 +25,15 @@ st.set_page_config(
 load_css()
 
 # Import shared components
-from shared_components import create_sidebar, show_wip_warning
+from shared_components import create_sidebar, show_wip_warning, deferred_section
+from asset_cache import media_src
+from models.solar_comparison import build_animation, load_profiles
+from models.supply_stack import FUEL_COLORS, SupplyStack
+from models.scenario_store import SCENARIOS, annual_summary
+from models import aoi, dasymetric, weighting
+from models.aoi_upload import AOIUploadError, read_aoi
+from models.h3_pyramid import MAX_MAP_CELLS, H3Pyramid, fit_zoom, select_view
+from models.profiles import MONTH_NAMES, month_of_hour, solar_capacity_factor, system_load
 
 # Store current page in session state for sidebar to access
 st.session_state['current_page'] = __file__
@@ -38,25 +50,6 @@ create_sidebar(os.path.basename(__file__))
 
 from PIL import Image
 
-# Image Paths
-temp_agem = r"assets/temp_images/agem.png"
-temp_ss1 = r"assets/temp_images/ss1.png"
-temp_ss2 = r"assets/temp_images/ss2.png"
-
-
-# Load the images as bytes and convert to base64
-with open(temp_agem, "rb") as f:
-    temp_agem_bytes = f.read()
-    temp_agem_base64 = base64.b64encode(temp_agem_bytes).decode()
-
-with open(temp_ss1, "rb") as f:
-    temp_ss1_bytes = f.read()
-    temp_ss1_base64 = base64.b64encode(temp_ss1_bytes).decode()
-
-with open(temp_ss2, "rb") as f:
-    temp_ss2_bytes = f.read()
-    temp_ss2_base64 = base64.b64encode(temp_ss2_bytes).decode()
-
 # actual page content
 
 # title
@@ -79,7 +72,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.markdown(f"""
 <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-    <img src="https://i.imgur.com/qJpCqbP.gif" 
+    <img src="{media_src("residential_heatpump_comparison.gif")}" 
             style="width: 60%; height: auto; border-radius: 10px;" 
             alt="Energy efficient home with sustainable features">
 </div>
@@ -92,14 +85,14 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.markdown(f"""
 <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-    <img src="https://i.imgur.com/3XtFCgq.gif" 
+    <img src="{media_src("commercial_heatpump_comparison.gif")}" 
             style="width: 60%; height: auto; border-radius: 10px;" 
             alt="Energy efficient home with sustainable features">
 </div>
 """, unsafe_allow_html=True)
 st.markdown(f"""
 <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-    <img src="https://i.imgur.com/7D9aWnT.gif" 
+    <img src="{media_src("commercial_heatpump_comparison_2.gif")}" 
             style="width: 60%; height: auto; border-radius: 10px;" 
             alt="Energy efficient home with sustainable features">
 </div>
@@ -108,122 +101,227 @@ st.markdown(f"""
 # break
 st.markdown("<hr style='margin: 3rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
 
-st.header('Energy Supply and Demand Scenarios')
-st.markdown("""
-##### This mock outcome shows how the energy landscape can change under different scenarios. We compare three key situations:
-""")
-
-c1,c2,c3 = st.columns(3)
-c1.markdown(""" 
-###### Baseline Energy Mix:
-- Shows how Atlanta currently gets and uses its electricity
-- Represents our current mix of power sources (solar, natural gas, nuclear, etc.)
-- Serves as a reference point for comparing changes
-""")
+SOURCE_COLORS = {"Utility Solar": "#FDD835", "Rooftop Solar": "#FFB300", **FUEL_COLORS}
+
+def energy_mix_figure(summary):
+    mix = {source: gwh for source, gwh in summary["energy_mix"].items() if gwh > 0}
+    fig = go.Figure(go.Pie(
+        labels=list(mix),
+        values=[round(gwh) for gwh in mix.values()],
+        hole=0.45,
+        sort=False,
+        marker=dict(colors=[SOURCE_COLORS[source] for source in mix]),
+        hovertemplate="%{label}: %{value:,} GWh (%{percent})<extra></extra>",
+    ))
+    fig.update_layout(height=380, margin=dict(t=10, b=10, l=10, r=10),
+                      annotations=[dict(text=f"{summary['total_gwh'] / 1000:,.0f} TWh", showarrow=False, font=dict(size=18))])
+    return fig
+
+def render_scenario_summary(scenario_id, baseline=None):
+    summary = annual_summary(scenario_id)
+    st.markdown(f"<div style='text-align: center;'><h3>{SCENARIOS[scenario_id]['label']}</h3></div>", unsafe_allow_html=True)
+    m1, m2 = st.columns(2)
+    if baseline is None:
+        m1.metric("Production cost", f"${summary['cost_per_mwh']:,.2f}/MWh")
+        m2.metric("CO₂ emissions", f"{summary['co2_mt']:,.1f} Mt")
+    else:
+        m1.metric("Production cost", f"${summary['cost_per_mwh']:,.2f}/MWh",
+                  delta=f"{summary['cost_per_mwh'] - baseline['cost_per_mwh']:+,.2f}", delta_color="inverse")
+        m2.metric("CO₂ emissions", f"{summary['co2_mt']:,.1f} Mt",
+                  delta=f"{summary['co2_mt'] - baseline['co2_mt']:+,.1f}", delta_color="inverse")
+    st.plotly_chart(energy_mix_figure(summary), use_container_width=True)
+    return summary
+
+# Isolated so that changing the scenario reruns and resends only this panel
+# instead of the whole page. Results come from the precomputed scenario store,
+# so switching is a lookup rather than a new dispatch run.
+@st.fragment
+def render_scenario_viewer():
+    _,center,_ = st.columns([4,5,1])
+    with center:
+        scenario_id = st.radio("Please select a scenario", ["utility_renewables", "der_grid_edge"],
+                               format_func=lambda key: SCENARIOS[key]["label"])
+    left, right = st.columns(2)
+    with left:
+        baseline = render_scenario_summary("baseline")
+        st.markdown("<br>", unsafe_allow_html=True)
+
+    with right:
+        render_scenario_summary(scenario_id, baseline)
+
+def render_scenarios():
+    st.header('Energy Supply and Demand Scenarios')
+    st.markdown("""
+    ##### This mock outcome shows how the energy landscape can change under different scenarios. We compare three key situations:
+    """)
+
+    c1,c2,c3 = st.columns(3)
+    c1.markdown(""" 
+    ###### Baseline Energy Mix:
+    - Shows how Atlanta currently gets and uses its electricity
+    - Represents our current mix of power sources (solar, natural gas, nuclear, etc.)
+    - Serves as a reference point for comparing changes
+    """)
+
+    c2.markdown("""
+    ###### Utility-Led Changes:
+    - Shows what happens if power companies lead the green energy transition
+    - Focuses on large-scale renewable projects
+    """)
+
+    c3.markdown("""
+    ###### Community-Driven Changes:
+    - Shows what happens when customers adopt new behind-the-meter (BTM) technologies
+    - Includes impacts of renewables, energy storage, and smart devices
+    - Reflects a more distributed energy future
+    """)
 
-c2.markdown("""
-###### Utility-Led Changes:
-- Shows what happens if power companies lead the green energy transition
-- Focuses on large-scale renewable projects
-""")
+    st.markdown("""
+    ##### Each scenario shows the annual energy mix together with the production cost and CO₂ emissions of the associated fuel mix.
+    ##### NOTE: The results come from a synthetic generator fleet and load profile and are not empirically accurate. They are for conceptual purposes.
+    """)
 
-c3.markdown("""
-###### Community-Driven Changes:
-- Shows what happens when customers adopt new behind-the-meter (BTM) technologies
-- Includes impacts of renewables, energy storage, and smart devices
-- Reflects a more distributed energy future
-""")
+    st.divider()
+    st.write("##### Our tool will allow users to select a pre-ran scenario to observe how it affects the energy spread!")
+    render_scenario_viewer()
 
-st.markdown("""
-##### Please observe the black triangle ▲ which indicates the cost and level of induced pollution of the associated fuel mix.
-##### NOTE: None of the following results are empirically accurate, nor are they drawn to scale. They are mockups for conceptual purposes. 
-""")
+deferred_section("scenarios", "Energy Supply and Demand Scenarios", render_scenarios,
+                 description="Compare the baseline energy mix with utility-led and community-driven scenarios.")
 
 st.divider()
-st.write("##### Our tool will allow users to select a pre-ran scenario to observe how it affects the energy spread!")
-_,center,_ = st.columns([4,5,1])
-with center:
-    scenario_choice = st.radio("Please select a scenario", ['Utility Investment in Renewables','DER investment at Grid Edge'])
-left, right = st.columns(2)
-with left:
-    st.markdown("<div style='text-align: center;'><h3>Baseline Energy Mix</h3></div>", unsafe_allow_html=True)
-    st.markdown(
-        """
-        <div style="text-align: center;">
-            <img src="https://i.imgur.com/rh77Nzv.png" width="500">
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
 
-    st.markdown("<br>", unsafe_allow_html=True)
+@st.cache_data
+def solar_comparison_figure():
+    return build_animation(load_profiles())
 
-with right:
-    if scenario_choice == "Utility Investment in Renewables":
-        st.markdown("<div style='text-align: center;'><h3>Utility Investment in Renewables</h3></div>", unsafe_allow_html=True)
-        st.markdown(
-            """
-            <div style="text-align: center;">
-                <img src="https://i.imgur.com/1wlZaIK.png" width="530">
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-    else:
-        st.markdown("<div style='text-align: center;'><h3>DER investment at Grid Edge</h3></div>", unsafe_allow_html=True)
-        st.markdown(
-            """
-            <div style="text-align: center;">
-                <img src="https://i.imgur.com/cxuTk9f.png" width="550">
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+def render_solar_comparison():
+    st.title("Comparison how Solar impacts Energy Usage")
 
-st.divider()
-st.title("Comparison how Solar impacts Energy Usage")
+    #text
+    st.markdown("""
+    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+        <p style="font-size: 1.2rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+            <b>Left:</b> Current Energy Usage
+            <br><br>
+            <b>Right:</b> Post Solar+Battery Incentives for Residential Single Family Homes
+            <br><br>
+            <b>Residential peaks are softened via solar+battery incentives.</b> Press play or drag the slider to step through a typical day in each month.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+    st.plotly_chart(solar_comparison_figure(), use_container_width=True)
 
-#text
-st.markdown("""
-<div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
-    <p style="font-size: 1.2rem; color: #2c3e50; line-height: 1.5; margin: 0;">
-        <b>Left:</b> Current Energy Usage
-        <br><br>
-        <b>Right:</b> Post Solar+Battery Incentives for Residential Single Family Homes
-        <br><br>
-        <b>Residential peaks are softened via solar+battery incentives.</b>
-    </p>
-</div>
-""", unsafe_allow_html=True)
-st.markdown(f"""
-<div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-    <img src="https://i.imgur.com/IGZtDZV.gif" width="60%">
-</div>
-""", unsafe_allow_html=True)
+deferred_section("solar_comparison", "Comparison how Solar impacts Energy Usage", render_solar_comparison,
+                 description="How solar+battery incentives soften residential peaks.")
 
 # supply stack content
 st.divider()
-st.markdown("""
-<h2 style="color: #1E5C8E; padding-top: 2rem; margin-top: 0.5rem;">Supply Stack <br> (Balancing authority: SOCO)</h2>
-""", unsafe_allow_html=True)
 
-# image
-st.markdown(f"""
-<div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-    <img src="data:image/png;base64,{temp_ss1_base64}" 
-            style="width: 90%; height: auto; border-radius: 10px;" 
-            alt="Energy efficient home with sustainable features">
-</div>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def soco_supply_stack():
+    return SupplyStack.from_csv()
+
+@st.cache_data
+def soco_net_load(utility_solar_mw):
+    return system_load() - utility_solar_mw * solar_capacity_factor()
+
+def supply_curve_figure(stack, demand_mw):
+    curve = stack.supply_curve()
+    fig = go.Figure()
+    for fuel, color in FUEL_COLORS.items():
+        units = curve[curve["fuel"] == fuel]
+        if units.empty:
+            continue
+        fig.add_trace(go.Bar(
+            x=(units["start_mw"] + units["end_mw"]) / 2,
+            y=units["marginal_cost"],
+            width=units["end_mw"] - units["start_mw"],
+            customdata=units["unit"],
+            name=fuel,
+            marker=dict(color=color, line=dict(width=0.5, color="white")),
+            hovertemplate="%{customdata}<br>%{y:$.2f}/MWh<extra></extra>",
+        ))
+    price = float(stack.clearing_price(demand_mw))
+    fig.add_vline(x=demand_mw, line=dict(color="#1E5C8E", width=2, dash="dash"))
+    fig.add_hline(y=price, line=dict(color="#1E5C8E", width=1, dash="dot"))
+    fig.update_layout(
+        height=420,
+        bargap=0,
+        margin=dict(t=30, b=40, l=60, r=20),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        xaxis_title="Cumulative capacity (MW)",
+        yaxis_title="Marginal cost ($/MWh)",
+        yaxis_range=[0, max(80, price * 1.1)],
+    )
+    return fig
+
+def price_series_figure(load_mw, price, month):
+    hours = month_of_hour() == month
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Scatter(y=load_mw[hours].round(), name="Net load (MW)", line=dict(color="#8E9AAF", width=1)),
+                  secondary_y=False)
+    fig.add_trace(go.Scatter(y=price[hours], name="Clearing price ($/MWh)", line=dict(color="#1E88E5", width=1.5, shape="hv")),
+                  secondary_y=True)
+    fig.update_layout(
+        height=420,
+        margin=dict(t=30, b=40, l=60, r=60),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        xaxis_title="Hour of month",
+    )
+    fig.update_yaxes(title_text="Net load (MW)", secondary_y=False)
+    fig.update_yaxes(title_text="Price ($/MWh)", secondary_y=True)
+    return fig
+
+# Isolated so that moving a slider reclears the stack and redraws only these charts.
+@st.fragment
+def render_supply_stack_explorer():
+    stack = soco_supply_stack()
+    c1, c2, c3 = st.columns(3)
+    load_growth = c1.slider("Load growth (%)", 0, 30, 0, step=1)
+    utility_solar_mw = c2.slider("Utility-scale solar (MW)", 0, 15000, 3000, step=500)
+    month = c3.select_slider("Month", options=list(range(1, 13)), value=7, format_func=lambda m: MONTH_NAMES[m - 1])
+
+    load_mw = soco_net_load(utility_solar_mw) * (1 + load_growth / 100)
+    result = stack.dispatch(load_mw)
+
+    left, right = st.columns(2)
+    with left:
+        st.markdown("##### Supply curve")
+        demand_mw = st.slider("Demand (MW)", 0, int(stack.total_capacity_mw * 1.05),
+                              int(load_mw.max()), step=100)
+        marginal = stack.units.iloc[int(stack.marginal_unit(demand_mw))]
+        m1, m2 = st.columns(2)
+        m1.metric("Clearing price", f"${float(stack.clearing_price(demand_mw)):,.2f}/MWh")
+        m2.metric("Marginal unit", marginal["unit"] if demand_mw <= stack.total_capacity_mw else "Shortfall",
+                  help=f"{marginal['fuel']}, {marginal['capacity_mw']:,} MW")
+        st.plotly_chart(supply_curve_figure(stack, demand_mw), use_container_width=True)
+    with right:
+        st.markdown(f"##### Hourly prices, {MONTH_NAMES[month - 1]}")
+        m1, m2 = st.columns(2)
+        m1.metric("Load-weighted price (year)", f"${(result['price'] * load_mw).sum() / load_mw.sum():,.2f}/MWh")
+        m2.metric("Hours above $50/MWh", f"{int((result['price'] > 50).sum()):,}")
+        st.plotly_chart(price_series_figure(load_mw, result["price"], month), use_container_width=True)
+
+def render_supply_stack():
+    st.markdown("""
+    <h2 style="color: #1E5C8E; padding-top: 2rem; margin-top: 0.5rem;">Supply Stack <br> (Balancing authority: SOCO)</h2>
+    """, unsafe_allow_html=True)
+    st.markdown("""
+    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+        <p style="font-size: 1.2rem; color: #2c3e50; line-height: 1.5; margin: 0;">
+            Generators are dispatched from cheapest to most expensive until demand is met; the last unit needed sets the price.
+            Drag the sliders to grow demand or add solar and watch the clearing price move across all 8,760 hours of the year.
+            <br><br>
+            <b>NOTE:</b> The generator fleet and load are synthetic approximations for illustration.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+    st.markdown("<br>", unsafe_allow_html=True)
+    render_supply_stack_explorer()
+
+deferred_section("supply_stack", "Supply Stack (Balancing authority: SOCO)", render_supply_stack,
+                 description="Which generators are dispatched, in merit order, to meet demand.")
 
-st.markdown(f"""
-<div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-    <img src="data:image/png;base64,{temp_ss2_base64}" 
-            style="width: 90%; height: auto; border-radius: 10px;" 
-            alt="Energy efficient home with sustainable features">
-</div>
-""", unsafe_allow_html=True)
-    
 # divide
 st.divider()
 st.markdown("""
@@ -250,61 +348,188 @@ c2.markdown("""
 # break
 st.divider()
 
-st.title("Disaggregation into Generic Geometries")
-
-# --- Disaggregation into Generic Geometries (Dasymetric / AOI downscaling) ---
-
-st.markdown("""
-<div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
-  <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.6; margin: 0;">
-    Sometimes users only have a <b>generic area of interest (AOI)</b> (e.g., a city boundary or neighborhood polygon),
-    but the model’s native output is <b>coarser</b> than what they need for interpretation.
-    <br><br>
-    We can produce a <b>higher-resolution view</b> by <b>dasymetric downscaling</b>:
-    redistribute each coarse cell’s value into smaller cells using a correlated high-resolution variable
-    (e.g., <b>building density</b>) while preserving the original totals.
-  </p>
-</div>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def metro_grid():
+    parents = dasymetric.grid_parents()
+    return parents, dasymetric.synthetic_parent_values(parents), aoi.ParentIndex(parents)
+
+UPLOAD_AOI = "Upload a file…"
+
+# Isolated so that switching AOIs or weighting layers reruns only this panel.
+@st.fragment
+def render_aoi_clipping():
+    parents, parent_values, index = metro_grid()
+    left, right = st.columns([1, 2])
+    aoi_name = left.selectbox("Area of interest", [*aoi.SAMPLE_AOIS, UPLOAD_AOI])
+    if aoi_name == UPLOAD_AOI:
+        uploaded = left.file_uploader("GeoJSON or zipped shapefile (WGS 84)", type=["geojson", "json", "zip"])
+        if uploaded is None:
+            return
+        # Parse each upload once per session; fragment reruns reuse the result.
+        cached = st.session_state.get("aoi_upload")
+        if cached is None or cached[0] != uploaded.file_id:
+            try:
+                cached = (uploaded.file_id, read_aoi(uploaded))
+            except AOIUploadError as e:
+                left.error(str(e))
+                return
+            st.session_state["aoi_upload"] = cached
+        upload = cached[1]
+        left.caption(f"{upload['features']:,} features, {upload['vertices']:,} vertices after simplifying to "
+                     f"{upload['tolerance_km'] * 1000:,.0f} m"
+                     + (" (downsampled to fit the vertex limit)" if upload["downsampled"] else ""))
+        area = upload["aoi"]
+    else:
+        area = aoi.sample_aoi(aoi_name)
+    layer = left.selectbox("Weighting layer", list(weighting.LAYERS), format_func=lambda key: weighting.LAYERS[key]["label"])
+    left.caption(weighting.LAYERS[layer]["description"])
+    clip = aoi.clip_summary(index, area, parent_values)
+    if not len(clip["positions"]):
+        right.info("The AOI doesn't overlap the metro Atlanta grid.")
+        return
+    with right:
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("AOI area", f"{clip['area_km2']:,.1f} km²")
+        m2.metric("Parents clipped", f"{len(clip['positions']):,}",
+                  help=f"{int((clip['fractions'] >= 0.999).sum()):,} fully inside, the rest partly inside.")
+        m3.metric("Load in AOI", f"{clip['total'] / 1000:,.1f} GWh/yr")
+        m4.metric("Clip time", f"{clip['seconds'] * 1000:,.1f} ms")
+    run = metro_downscaling(layer)
+    render_aoi_map(area, parents[clip["positions"]], run["pyramid"])
+
+    st.markdown("###### Metro Atlanta run")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("H3 res-8 parents", f"{len(parents):,}")
+    m2.metric("H3 res-10 children", f"{len(run['children']):,}")
+    m3.metric("Re-weighting time", f"{run['seconds'] * 1000:,.1f} ms",
+              help="Time to redistribute every parent with the stored shares of the selected layer.")
+    m4.metric("Max parent-total error", f"{run['conservation_error']:.1e} MWh",
+              help="Largest difference between a parent's value and the sum of its children.")
+
+@st.cache_resource
+def metro_child_index():
+    parents, parent_values, _ = metro_grid()
+    children, parent_positions = weighting.child_index(parents)
+    return children, parent_values[parent_positions]
+
+@st.cache_resource
+def metro_downscaling(layer):
+    parents, parent_values, _ = metro_grid()
+    children, child_parent_values = metro_child_index()
+    shares = weighting.load_shares(layer, parents)
+    start = time.perf_counter()
+    child_values = weighting.redistribute(child_parent_values, shares)
+    seconds = time.perf_counter() - start
+    return {
+        "children": children,
+        "child_values": child_values,
+        "seconds": seconds,
+        "conservation_error": dasymetric.check_conservation(parents, parent_values, children, child_values,
+                                                            rtol=weighting.FLOAT32_RTOL),
+        "pyramid": H3Pyramid(children, child_values),
+    }
+
+# Hexagons are colored client-side from their value rank ``t`` (0-1), on a
+# light-to-dark blue ramp, so only ids and two numbers per cell are sent.
+HEX_FILL_COLOR = "[222 - 214 * t, 235 - 187 * t, 247 - 140 * t, 170]"
+
+def value_ranks(values):
+    # Color by rank so a few very large cells don't wash out the rest of the view.
+    # Two decimals are 100 color steps, more than the ramp can show apart.
+    return (np.argsort(np.argsort(values)) / max(len(values) - 1, 1)).round(2)
+
+def render_aoi_map(area, aoi_parents, pyramid):
+    min_lng, min_lat, max_lng, max_lat = area.bounds
+    zoom = st.slider("Map zoom", 8.0, 16.0, float(np.clip(round(fit_zoom(area.bounds), 1), 8, 16)), step=0.5,
+                     help=f"Finer hexagons are drawn as you zoom in, up to {MAX_MAP_CELLS:,} per view.")
+    res, cells, values = select_view(pyramid, zoom, aoi_parents)
+    # Only H3 ids and rounded values cross the wire; deck.gl derives each
+    # hexagon's geometry from its id in the browser. Values are rounded to
+    # whole MWh (the tooltip's precision) to keep each record short.
+    hexagons = pd.DataFrame({
+        "hex": dasymetric.uint64_to_cells(cells),
+        "mwh": values.round().astype(np.int64),
+        "t": value_ranks(values),
+    })
+    outline = [[np.round(p.exterior.coords, 5).tolist() for p in getattr(area, "geoms", [area])]]
+    deck = pdk.Deck(
+        layers=[
+            pdk.Layer("H3HexagonLayer", hexagons, get_hexagon="hex", get_fill_color=HEX_FILL_COLOR,
+                      stroked=False, extruded=False, pickable=True),
+            pdk.Layer("PolygonLayer", pd.DataFrame({"polygon": outline}), get_polygon="polygon", filled=False,
+                      get_line_color=[30, 92, 142], line_width_min_pixels=2),
+        ],
+        initial_view_state=pdk.ViewState(latitude=(min_lat + max_lat) / 2, longitude=(min_lng + max_lng) / 2, zoom=zoom),
+        map_provider="carto",
+        map_style="light",
+        tooltip={"text": "{mwh} MWh/yr"},
+    )
+    st.pydeck_chart(deck)
+    st.caption(f"H3 resolution {res}: {len(cells):,} hexagons.")
 
-st.markdown("<br>", unsafe_allow_html=True)
+def render_disaggregation():
+    st.title("Disaggregation into Generic Geometries")
 
-c1, c2, c3 = st.columns([1.2, 1.2, 1.6])
+    # --- Disaggregation into Generic Geometries (Dasymetric / AOI downscaling) ---
 
-with c1:
-    st.markdown("###### 1) User supplies AOI")
-    st.markdown("- Upload/choose a polygon AOI (shapefile/geojson)\n- Tool clips to relevant parents")
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="https://i.imgur.com/Ez3IdQq.png" width="60%">
+    st.markdown("""
+    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px;">
+      <p style="font-size: 1.1rem; color: #2c3e50; line-height: 1.6; margin: 0;">
+        Sometimes users only have a <b>generic area of interest (AOI)</b> (e.g., a city boundary or neighborhood polygon),
+        but the model’s native output is <b>coarser</b> than what they need for interpretation.
+        <br><br>
+        We can produce a <b>higher-resolution view</b> by <b>dasymetric downscaling</b>:
+        redistribute each coarse cell’s value into smaller cells using a correlated high-resolution variable
+        (e.g., <b>building density</b>) while preserving the original totals.
+      </p>
     </div>
     """, unsafe_allow_html=True)
 
-with c2:
-    st.markdown("###### 2) Coarse model output")
-    st.markdown("- Model runs on H3 parents (e.g., res 8)\n- Values are correct but spatially coarse")
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="https://i.imgur.com/Sf9dVCj.png" width="60%">
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown("<br>", unsafe_allow_html=True)
 
-with c3:
-    st.markdown("###### 3) Dasymetric redistribution")
-    st.markdown("- Generate all children (e.g., res 10)\n- Weight by building counts (or other proxy)\n- **Parent totals conserved by construction**")
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
-        <img src="https://i.imgur.com/VrQCj6I.png" width="60%">
-    </div>
-    """, unsafe_allow_html=True)
+    c1, c2, c3 = st.columns([1.2, 1.2, 1.6])
 
-with st.expander("What this is (and is not)"):
-    st.markdown("""
-- ✅ Produces a *higher-resolution allocation* consistent with the parent totals  
-- ✅ Useful for visualization and AOI-specific reporting  
-- ⚠️ Not “new measurements” at fine scale — it’s a principled redistribution  
-- 🔁 We can swap the weighting layer (buildings, population, land-use, etc.)
-""")
+    with c1:
+        st.markdown("###### 1) User supplies AOI")
+        st.markdown("- Upload/choose a polygon AOI (shapefile/geojson)\n- Tool clips to relevant parents")
+        st.markdown(f"""
+        <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
+            <img src="{media_src("dasymetric_aoi.png")}" width="60%">
+        </div>
+        """, unsafe_allow_html=True)
+
+    with c2:
+        st.markdown("###### 2) Coarse model output")
+        st.markdown("- Model runs on H3 parents (e.g., res 8)\n- Values are correct but spatially coarse")
+        st.markdown(f"""
+        <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
+            <img src="{media_src("dasymetric_parents.png")}" width="60%">
+        </div>
+        """, unsafe_allow_html=True)
+
+    with c3:
+        st.markdown("###### 3) Dasymetric redistribution")
+        st.markdown("- Generate all children (e.g., res 10)\n- Weight by building counts (or other proxy)\n- **Parent totals conserved by construction**")
+        st.markdown(f"""
+        <div style="text-align: center; margin-bottom: 15px; margin-top: 15px;">
+            <img src="{media_src("dasymetric_children.png")}" width="60%">
+        </div>
+        """, unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("###### Clip an AOI to the parent grid")
+    render_aoi_clipping()
+
+    with st.expander("What this is (and is not)"):
+        st.markdown("""
+    - ✅ Produces a *higher-resolution allocation* consistent with the parent totals  
+    - ✅ Useful for visualization and AOI-specific reporting  
+    - ⚠️ Not “new measurements” at fine scale — it’s a principled redistribution  
+    - 🔁 The weighting layer can be swapped above (buildings, population, developed land, or uniform)
+    """)
+
+deferred_section("disaggregation", "Disaggregation into Generic Geometries", render_disaggregation,
+                 description="Downscaling coarse model output to a user-supplied area of interest.")
 
 st.markdown("<hr style='margin: 2rem 0; border-top: 2px solid #e0e0e0;'>", unsafe_allow_html=True)
 
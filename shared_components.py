@@ -1,5 +1,12 @@
 import streamlit as st
 import os
+from asset_cache import picture_html
+
+# Streamlit stacks columns below this viewport width, so every image is then
+# laid out at the full page width.
+MOBILE_BREAKPOINT_PX = 640
+
+DEFAULT_CAPTION_STYLE = "font-size: 1rem; color: #2c3e50; line-height: 1.5; margin: 0; text-align: center;"
 
 def show_wip_warning():
     """
@@ -25,6 +32,81 @@ def show_wip_warning():
         unsafe_allow_html=True
     )
 
+def render_image(asset_key, layout_width, alt, width="90%", style="border-radius: 10px;",
+                 container_style="text-align: center; margin-bottom: 15px; margin-top: 15px;",
+                 caption=None, caption_style=DEFAULT_CAPTION_STYLE, lazy=True):
+    """
+    Render a centered image from the assets folder with responsive markup.
+
+    The ``sizes`` attribute is derived from the layout so the browser picks
+    the smallest built variant that still fills the rendered box, e.g. a 70%
+    wide image in one of two equal columns gets ``35vw`` on desktop and
+    ``70vw`` once the columns stack on mobile.
+
+    Args:
+        asset_key (str): Image path relative to ``assets/`` (e.g. "lg_bat.png").
+        layout_width (float): Share of the page width taken by the column that
+            holds the image (1.0 for full width, 0.5 for one of two equal columns).
+        alt (str): Alternative text for the image.
+        width (str, optional): CSS width of the image within its column.
+        style (str, optional): Extra inline CSS for the image.
+        container_style (str, optional): Inline CSS for the wrapping div.
+        caption (str, optional): Caption shown below the image.
+        caption_style (str, optional): Inline CSS for the caption.
+        lazy (bool, optional): Defer loading until the image nears the viewport.
+            Pass False for images on the first screen of a page.
+
+    Returns:
+        None
+    """
+    share = float(width.rstrip("%")) / 100 if width.endswith("%") else 1.0
+    sizes = (
+        f"(max-width: {MOBILE_BREAKPOINT_PX}px) {round(share * 100)}vw, "
+        f"{max(1, round(layout_width * share * 100))}vw"
+    )
+    attrs = 'decoding="async"' + (' loading="lazy"' if lazy else "")
+    image = picture_html(asset_key, alt=alt, style=f"width: {width}; height: auto; {style}".strip(),
+                         sizes=sizes, attrs=attrs)
+    caption_html = f'<p style="{caption_style}">{caption}</p>' if caption else ""
+    st.markdown(f'<div style="{container_style}">{image}{caption_html}</div>', unsafe_allow_html=True)
+
+def deferred_section(key, label, render, description=None):
+    """
+    Render a below-the-fold section only once the user asks for it.
+
+    Until then the section costs one small placeholder and a button, so the
+    first screen of a long page renders sooner and reruns don't rebuild
+    content nobody has scrolled to. Once opened, the section stays open for
+    the rest of the session.
+
+    Args:
+        key (str): Unique key for the section within the app.
+        label (str): Section name shown on the placeholder.
+        render (callable): Function that draws the section content.
+        description (str, optional): One-line teaser shown on the placeholder.
+
+    Returns:
+        None
+    """
+    state_key = f"deferred_section_{key}"
+    if st.session_state.get(state_key):
+        render()
+        return
+
+    teaser = f'<p style="font-size: 1rem; color: #2c3e50; margin: 0.5rem 0 0 0;">{description}</p>' if description else ""
+    st.markdown(f"""
+    <div style="background-color: rgba(240, 248, 255, 0.8); padding: 15px; border-radius: 5px; text-align: center; margin-bottom: 10px;">
+        <p style="font-size: 1.3rem; color: #1E5C8E; font-weight: 600; margin: 0;">{label}</p>
+        {teaser}
+    </div>
+    """, unsafe_allow_html=True)
+    _, center, _ = st.columns([2, 1, 2])
+    center.button("Show section", key=f"{state_key}_button", on_click=_open_section, args=(state_key,),
+                  use_container_width=True)
+
+def _open_section(state_key):
+    st.session_state[state_key] = True
+
 def create_sidebar(current_page=None):
     """
     Creates a consistent sidebar for the Atlanta Energyshed application.
@@ -0,0 +1,99 @@
+"""
+Mirror the remote images used by the pages into a local content-addressed store.
+
+Every entry in ``remote_media.json`` is downloaded once into
+``static/media/<sha256><ext>``. ``asset_cache.media_src`` serves that copy
+instead of hotlinking the original host, so pages load with predictable
+latency and keep working offline. Because files are named by their content
+hash they never change in place and can be cached indefinitely by a proxy or
+CDN in front of the app.
+
+Entries without a pinned ``sha256`` are pinned on their first successful
+download; commit the updated ``remote_media.json`` afterwards. Pinned entries
+are verified, and a download whose hash doesn't match is rejected.
+
+Usage:
+    python sync_media.py            # fetch anything missing from the store
+    python sync_media.py --check    # exit non-zero if anything is missing
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import urllib.request
+
+from asset_cache import MEDIA_DIR, REMOTE_MEDIA_PATH, media_store_path
+
+USER_AGENT = "atlanta-energyshed-media-sync/1.0"
+TIMEOUT_SECONDS = 30
+
+
+def fetch(url):
+    """
+    Download a URL into a temporary file in the store, hashing it on the way.
+
+    Returns:
+        tuple: (temporary file path, sha256 hex digest)
+    """
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    tmp = os.path.join(MEDIA_DIR, f".download.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=TIMEOUT_SECONDS) as response, open(tmp, "wb") as f:
+        for chunk in iter(lambda: response.read(1 << 16), b""):
+            digest.update(chunk)
+            f.write(chunk)
+    return tmp, digest.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mirror remote page media into static/media/.")
+    parser.add_argument("--check", action="store_true", help="only report missing media")
+    args = parser.parse_args(argv)
+
+    with open(REMOTE_MEDIA_PATH) as f:
+        media = json.load(f)
+
+    missing = failed = 0
+    pinned_new = False
+    for key, entry in sorted(media.items()):
+        sha256 = entry.get("sha256")
+        if sha256 and os.path.exists(media_store_path(sha256, entry["url"])):
+            print(f"  present  {key}")
+            continue
+        missing += 1
+        if args.check:
+            print(f"  missing  {key}")
+            continue
+
+        try:
+            tmp, digest = fetch(entry["url"])
+        except OSError as e:
+            failed += 1
+            print(f"   failed  {key}: {e}")
+            continue
+        if sha256 and digest != sha256:
+            os.remove(tmp)
+            failed += 1
+            print(f"   failed  {key}: expected sha256 {sha256}, got {digest}")
+            continue
+        os.replace(tmp, media_store_path(digest, entry["url"]))
+        if not sha256:
+            entry["sha256"] = digest
+            pinned_new = True
+        print(f"  fetched  {key}")
+
+    if pinned_new:
+        with open(REMOTE_MEDIA_PATH, "w") as f:
+            json.dump(media, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"Pinned new hashes in {os.path.basename(REMOTE_MEDIA_PATH)}; commit it.")
+
+    if args.check:
+        return 1 if missing else 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
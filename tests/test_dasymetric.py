@@ -0,0 +1,77 @@
+import h3
+import numpy as np
+import pytest
+
+from models.dasymetric import (CHILD_RES, PARENT_RES, cell_to_children, cells_to_uint64, downscale, grid_parents,
+                               run_downscaling, synthetic_building_counts, synthetic_parent_values)
+
+
+@pytest.fixture(scope="module")
+def metro_parents():
+    return grid_parents()
+
+
+@pytest.fixture(scope="module")
+def pentagon_parents():
+    return np.sort(cells_to_uint64(h3.get_pentagons(PARENT_RES)))
+
+
+def parent_sums(parents, result):
+    # Map each flat child back to its parent with h3 itself, independently of
+    # the bit arithmetic under test.
+    children = [h3.int_to_str(int(child)) for child in result["children"]]
+    child_parents = cells_to_uint64([h3.cell_to_parent(child, PARENT_RES) for child in children])
+    position = np.searchsorted(parents, child_parents)
+    assert np.array_equal(parents[position], child_parents)
+    return np.bincount(position, weights=result["child_values"], minlength=len(parents))
+
+
+def test_metro_grid_conserves_parent_totals(metro_parents):
+    values = synthetic_parent_values(metro_parents)
+    children, valid = cell_to_children(metro_parents)
+    child_values = downscale(values, synthetic_building_counts(metro_parents, children), valid)
+    np.testing.assert_allclose(child_values.sum(axis=1), values, rtol=1e-12)
+    assert not child_values[~valid].any()
+
+    result = run_downscaling(metro_parents, values)
+    totals = np.bincount(np.nonzero(valid)[0], weights=result["child_values"], minlength=len(metro_parents))
+    np.testing.assert_allclose(totals, values, rtol=1e-12)
+
+
+def test_metro_grid_sample_matches_h3_parents(metro_parents):
+    sample = metro_parents[:: max(len(metro_parents) // 200, 1)]
+    values = synthetic_parent_values(sample)
+    np.testing.assert_allclose(parent_sums(sample, run_downscaling(sample, values)), values, rtol=1e-12)
+
+
+def test_pentagon_parents_conserve_parent_totals(pentagon_parents):
+    values = np.linspace(100.0, 1200.0, len(pentagon_parents))
+    result = run_downscaling(pentagon_parents, values)
+    np.testing.assert_allclose(parent_sums(pentagon_parents, result), values, rtol=1e-12)
+    expected = sum(len(h3.cell_to_children(h3.int_to_str(int(p)), CHILD_RES)) for p in pentagon_parents)
+    assert len(result["children"]) == expected
+
+
+def test_zero_weight_parents_fall_back_to_uniform(metro_parents, pentagon_parents):
+    parents = np.sort(np.concatenate([metro_parents[:50], pentagon_parents]))
+    values = np.arange(1.0, len(parents) + 1.0)
+
+    def no_buildings(parents, children):
+        return np.zeros(children.shape, dtype=np.int32)
+
+    result = run_downscaling(parents, values, weights_fn=no_buildings)
+    np.testing.assert_allclose(parent_sums(parents, result), values, rtol=1e-12)
+
+    children, valid = cell_to_children(parents)
+    child_values = downscale(values, np.zeros(children.shape), valid)
+    expected = np.where(valid, (values / valid.sum(axis=1))[:, None], 0.0)
+    np.testing.assert_allclose(child_values, expected, rtol=1e-12)
+
+
+def test_cell_to_children_matches_h3(metro_parents, pentagon_parents):
+    rng = np.random.default_rng(0)
+    sample = np.concatenate([rng.choice(metro_parents, 100, replace=False), pentagon_parents])
+    children, valid = cell_to_children(sample)
+    for parent, row, mask in zip(sample, children, valid):
+        expected = cells_to_uint64(h3.cell_to_children(h3.int_to_str(int(parent)), CHILD_RES))
+        assert np.array_equal(np.sort(row[mask]), np.sort(expected))
@@ -0,0 +1,22 @@
+import numpy as np
+
+from models.demand_growth import BASE_YEAR, COMPONENTS, END_YEAR, SCENARIOS, project
+from models.profiles import system_load
+
+
+def test_base_year_reproduces_system_load():
+    load = system_load()
+    projection = project(list(SCENARIOS.values()), np.array([BASE_YEAR]))
+    np.testing.assert_allclose(projection["peak_mw"][:, 0], load.max(), rtol=1e-9)
+    np.testing.assert_allclose(projection["energy_twh"][:, 0], load.sum() / 1e6, rtol=1e-9)
+    baseline = list(COMPONENTS).index("baseline")
+    others = np.delete(projection["energy_by_component"][:, 0], baseline, axis=-1)
+    np.testing.assert_allclose(others, 0.0, atol=1e-12)
+
+
+def test_scenarios_grow_in_order():
+    projection = project([SCENARIOS[key] for key in ("slow", "reference", "data_center_boom")])
+    peak = projection["peak_mw"]
+    assert np.all(np.diff(peak[:, -1]) > 0)
+    assert np.all(peak[:, -1] > peak[:, 0])
+    assert projection["years"][-1] == END_YEAR
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from models import portfolio
+from models.portfolio import evaluate_portfolio, parcel_keys, synthetic_chunk
+
+
+def write_inventory(path, parcel_ids):
+    n = len(parcel_ids)
+    pq.write_table(pa.table({
+        "parcel_id": pa.array(parcel_ids, type=pa.string()),
+        "era": pa.array(["1980_2020"] * n, type=pa.string()),
+        "heating_fuel": pa.array(["gas"] * n, type=pa.string()),
+        "floor_area_sqft": pa.array(np.full(n, 2200.0, dtype=np.float32)),
+    }), path)
+
+
+def test_string_parcel_ids(tmp_path):
+    inventory = tmp_path / "parcels.parquet"
+    output = tmp_path / "results.parquet"
+    write_inventory(inventory, [f"14 0078 {i:04d} 045" for i in range(2000)])
+    summary = evaluate_portfolio("full_retrofit", 0.5, inventory=str(inventory), output=str(output))
+    assert summary["parcels"] == 2000
+    assert 800 < summary["adopters"] < 1200
+    results = pq.read_table(output)
+    assert results.num_rows == 2000
+    assert results.column("adopted").to_numpy().sum() == summary["adopters"]
+
+
+def test_parcel_keys_are_stable():
+    ids = pa.array(["14 0078 0001 045", "14 0078 0001 046"])
+    keys = parcel_keys(ids)
+    assert keys[0] != keys[1]
+    assert np.array_equal(keys, parcel_keys(pa.chunked_array([ids[:1], ids[1:]])))
+    assert np.array_equal(parcel_keys(pa.array([7, 8])), np.array([7, 8], dtype=np.uint64))
+    with pytest.raises(ValueError):
+        parcel_keys(pa.array(["14 0078 0001 045", None]))
+
+
+def test_empty_inventory_writes_empty_results(tmp_path):
+    inventory = tmp_path / "parcels.parquet"
+    output = tmp_path / "results.parquet"
+    write_inventory(inventory, [])
+    summary = evaluate_portfolio("envelope", 0.5, inventory=str(inventory), output=str(output))
+    assert summary["parcels"] == 0 and summary["gwh_saved"] == 0
+    assert pq.read_table(output).num_rows == 0
+    assert sorted(os.listdir(tmp_path)) == ["parcels.parquet", "results.parquet"]
+
+
+def test_failed_run_removes_temporary_file(tmp_path, monkeypatch):
+    output = tmp_path / "results.parquet"
+
+    def failing_chunk(task, *args):
+        if task[1] > 0:
+            raise RuntimeError("chunk failed")
+        return original(task, *args)
+
+    original = portfolio.evaluate_chunk
+    monkeypatch.setattr(portfolio, "evaluate_chunk", failing_chunk)
+    with pytest.raises(RuntimeError):
+        evaluate_portfolio("envelope", 0.5, parcels=3000, chunk_size=1000, output=str(output))
+    assert os.listdir(tmp_path) == []
+
+
+def test_synthetic_adoption_unchanged():
+    # Integer IDs key the draw directly, as before string IDs were supported.
+    chunk = synthetic_chunk(0, 1000)
+    assert np.array_equal(parcel_keys(chunk.column("parcel_id")), np.arange(1000, dtype=np.uint64))
+
+
+def test_single_row_group_inventory_is_chunked(tmp_path):
+    inventory = tmp_path / "parcels.parquet"
+    write_inventory(inventory, [f"14 0078 {i:04d} 045" for i in range(2500)])
+    assert pq.ParquetFile(inventory).num_row_groups == 1
+
+    tasks = portfolio.inventory_tasks(str(inventory), chunk_size=1000)
+    assert [task[3:] for task in tasks] == [(0, 1000), (1000, 1000), (2000, 500)]
+    ids = pa.concat_arrays([portfolio._load_chunk(task).column("parcel_id").combine_chunks() for task in tasks])
+    assert ids.equals(pq.read_table(inventory).column("parcel_id").combine_chunks())
+
+    whole = evaluate_portfolio("full_retrofit", 0.5, inventory=str(inventory), chunk_size=5000)
+    chunked = evaluate_portfolio("full_retrofit", 0.5, inventory=str(inventory), chunk_size=1000, jobs=2)
+    assert whole["chunks"] == 1 and chunked["chunks"] == 3
+    assert chunked["adopters"] == whole["adopters"]
+    assert chunked["gwh_saved"] == pytest.approx(whole["gwh_saved"])